@@ -190,6 +190,44 @@ class Dataset(list):
         return components
 
 
+    def as_array(self, components=['Z', 'R', 'T']):
+        """ Returns numeric trace data from all streams as a single
+        contiguous NumPy array
+
+        Returns an array of shape `(number of streams, number of components,
+        number of samples)`, with zeros in place of missing components
+
+        .. note ::
+
+          The array is a copy, so traces are left unchanged, and changes to
+          trace data made afterwards are not reflected in the array
+
+        .. warning ::
+
+          Requires that all traces have the same number of samples
+
+        """
+        nt = None
+        for stream in self:
+            for trace in stream:
+                nt = len(trace.data)
+                break
+            if nt is not None:
+                break
+
+        if nt is None:
+            raise Exception("No traces to stack")
+
+        array = np.zeros((len(self), len(components), nt))
+        for _i, stream in enumerate(self):
+            for _j, component in enumerate(components):
+                selected = stream.select(component=component)
+                if len(selected) > 0:
+                    array[_i, _j, :] = selected[0].data
+
+        return array
+
+
     def get_stations(self):
         """ Returns station metadata from all streams as a `list` of
         `mtuq.station.Stations` objects
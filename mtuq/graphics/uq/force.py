@@ -324,6 +324,11 @@ def _likelihoods_random(df, var, **kwargs):
 
 
 def _marginals_random(df, var, **kwargs):
+    if df.attrs.get('sampled', False):
+        # samples are drawn from the posterior, so marginals are given by 
+        # the number of samples in each cell
+        return _count(df.reset_index(), **kwargs)
+
     df = df.copy()
     df = np.exp(-df/(2.*var))
     df = df.reset_index()
@@ -375,6 +380,31 @@ def _bin(df, handle, npts_phi=60, npts_h=30):
 
 
 
+def _count(df, npts_phi=60, npts_h=30):
+    """ Counts force samples in rectangular cells
+    """
+    # define centers of cells
+    centers_phi = open_interval(0., 360., npts_phi)
+    centers_h = open_interval(-1., +1., npts_h)
+
+    # define corners of cells
+    phi = closed_interval(0., 360, npts_phi+1)
+    h = closed_interval(-1., +1., npts_h+1)
+
+    counts, _, _ = np.histogram2d(df['phi'], df['h'], bins=(phi, h))
+
+    da = DataArray(
+        dims=('phi', 'h'),
+        coords=(centers_phi, centers_h),
+        data=counts
+        )
+    da.values /= 4.*np.pi*da.values.sum()
+
+    return da.assign_attrs({
+        'best_force': _max_force(da)
+        })
+
+
 #
 # utility functions
 #
@@ -11,7 +11,8 @@ from mtuq.grid.moment_tensor import _semiregular
 from mtuq.grid_search import DataArray, DataFrame, MTUQDataArray, MTUQDataFrame
 from mtuq.graphics.uq._gmt import _plot_vw_gmt
 from mtuq.graphics.uq._matplotlib import _plot_vw_matplotlib
-from mtuq.util import dataarray_idxmin, dataarray_idxmax, defaults, product
+from mtuq.util import dataarray_idxmin, dataarray_idxmax, defaults, product,\
+    warn
 from mtuq.util.math import closed_interval, open_interval,\
     to_v, to_w, to_gamma, to_delta, to_mij, to_Mw
 
@@ -441,6 +442,15 @@ def _likelihoods_vw_random(df, var, **kwargs):
 
 
 def _marginals_vw_random(df, var, **kwargs):
+    if df.attrs.get('sampled', False):
+        # samples are drawn from the posterior, so marginals are given by 
+        # the density of samples in each cell
+        da = _count_vw_semiregular(df.reset_index(), **kwargs)
+
+        return da.assign_attrs({
+            'best_vw': _max_vw(da),
+            })
+
     df = df.copy()
     df = np.exp(-df/(2.*var))
     df = df.reset_index()
@@ -500,26 +510,8 @@ def _bin_vw_regular(df, handle, npts_v=20, npts_w=40):
 def _bin_vw_semiregular(df, handle, npts_v=20, npts_w=40, tightness=0.6, normalize=False):
     """ Bins irregularly-spaced moment tensors into rectangular v,w cells
     """
-    # at which points will we plot values?
-    centers_v, centers_w = _semiregular(
-        npts_v, npts_w, tightness=tightness)
-
-    # what cell edges correspond to the above centers?
-    centers_gamma = to_gamma(centers_v)
-    edges_gamma = np.array(centers_gamma[:-1] + centers_gamma[1:])/2.
-    edges_v = to_v(edges_gamma)
-
-    centers_delta = to_delta(centers_w)
-    edges_delta = np.array(centers_delta[:-1] + centers_delta[1:])/2.
-    edges_w = to_w(edges_delta)
-
-    edges_v = np.pad(edges_v, 1)
-    edges_v[0] = -1./3.
-    edges_v[-1] = +1./3.
-
-    edges_w = np.pad(edges_w, 1)
-    edges_w[0] = -3.*np.pi/8.
-    edges_w[-1] = +3.*np.pi/8
+    centers_v, centers_w, edges_v, edges_w = _cells_vw_semiregular(
+        npts_v, npts_w, tightness)
 
 
     # bin grid points into cells
@@ -549,6 +541,54 @@ def _bin_vw_semiregular(df, handle, npts_v=20, npts_w=40, tightness=0.6, normali
         )
 
 
+def _count_vw_semiregular(df, npts_v=20, npts_w=40, tightness=0.6):
+    """ Counts moment tensor samples in rectangular v,w cells
+    """
+    centers_v, centers_w, edges_v, edges_w = _cells_vw_semiregular(
+        npts_v, npts_w, tightness)
+
+    counts, _, _ = np.histogram2d(
+        df['v'], df['w'], bins=(edges_v, edges_w))
+
+    # normalize by area of cell
+    density = counts/np.outer(np.diff(edges_v), np.diff(edges_w))
+    density /= density.sum()
+    density /= vw_area
+
+    return DataArray(
+        dims=('v', 'w'),
+        coords=(centers_v, centers_w),
+        data=density
+        )
+
+
+def _cells_vw_semiregular(npts_v, npts_w, tightness):
+    """ Returns centers and edges of semiregular v,w cells
+    """
+    # at which points will we plot values?
+    centers_v, centers_w = _semiregular(
+        npts_v, npts_w, tightness=tightness)
+
+    # what cell edges correspond to the above centers?
+    centers_gamma = to_gamma(centers_v)
+    edges_gamma = np.array(centers_gamma[:-1] + centers_gamma[1:])/2.
+    edges_v = to_v(edges_gamma)
+
+    centers_delta = to_delta(centers_w)
+    edges_delta = np.array(centers_delta[:-1] + centers_delta[1:])/2.
+    edges_w = to_w(edges_delta)
+
+    edges_v = np.pad(edges_v, 1)
+    edges_v[0] = -1./3.
+    edges_v[-1] = +1./3.
+
+    edges_w = np.pad(edges_w, 1)
+    edges_w[0] = -3.*np.pi/8.
+    edges_w[-1] = +3.*np.pi/8
+
+    return centers_v, centers_w, edges_v, edges_w
+
+
 #
 # utility functions
 #
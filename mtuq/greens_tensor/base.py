@@ -202,6 +202,43 @@ class GreensTensor(Stream):
         return synthetics
 
 
+    def get_synthetics_array(self, sources, components=None, out=None):
+        """ Generates synthetics for many sources at once
+
+        Returns a NumPy array of shape `(number of sources, number of 
+        components, number of samples)`
+
+        .. rubric :: Input arguments
+
+        ``sources`` (`list` of `MomentTensor` or `Force` objects, or NumPy 
+        array of shape `(number of sources, 6 or 9)`):
+        Sources, or source vectors in `up-south-east` convention
+
+        ``components`` (`list`):
+        List containing zero or more of the following components: 
+        ``Z``, ``R``, ``T``. (Defaults to ``['Z', 'R', 'T']``.)
+
+        ``out`` (`NumPy array`):
+        Optional preallocated array in which to place the result
+
+        """
+        if components is None:
+            # Components argument was not given, so check that attribute is
+            # already set
+            assert(hasattr(self, 'components'))
+
+        else:
+            self._set_components(components)
+
+        sources = _as_array(sources)
+        nc, nr, nt = self._array.shape
+
+        # all linear combinations are carried out in a single matrix
+        # multiplication
+        greens = self._array.transpose(1, 0, 2).reshape(nr, nc*nt)
+        return _matmul(sources, greens, (len(sources), nc, nt), out)
+
+
     def convolve(self, wavelet):
         """ Convolves time series with given wavelet
 
@@ -317,6 +354,93 @@ class GreensTensorList(list):
             raise ValueError
 
 
+    def get_synthetics_array(self, sources, components=None, out=None):
+        """ Generates synthetics for many sources at once
+
+        Returns a NumPy array of shape `(number of sources, number of 
+        stations, number of components, number of samples)`
+
+        .. rubric :: Input arguments
+
+        ``sources`` (`list` of `MomentTensor` or `Force` objects, or NumPy 
+        array of shape `(number of sources, 6 or 9)`):
+        Sources, or source vectors in `up-south-east` convention
+
+        ``components`` (`list`):
+        List containing zero or more of the following components: 
+        ``Z``, ``R``, ``T``, used for all stations. (Defaults to 
+        ``['Z', 'R', 'T']``.)
+
+        ``out`` (`NumPy array`):
+        Optional preallocated array in which to place the result
+
+        .. note ::
+
+          Requires that all `GreensTensors` have the same number of samples
+
+        """
+        sources = _as_array(sources)
+        greens = self.as_array(components)
+        ns, nc, nr, nt = greens.shape
+
+        # Green's functions for all stations are combined in a single matrix
+        # multiplication
+        greens = greens.transpose(2, 0, 1, 3).reshape(nr, ns*nc*nt)
+        return _matmul(sources, greens, (len(sources), ns, nc, nt), out)
+
+
+    def as_array(self, components=None):
+        """ Returns Green's functions from all `GreensTensors` as a single
+        contiguous NumPy array
+
+        Returns an array of shape `(number of stations, number of components,
+        number of Green's functions, number of samples)`, in which each row
+        holds the linear combination array used by `get_synthetics`
+
+        .. rubric :: Input arguments
+
+        ``components`` (`list`):
+        Components to set before collecting arrays (if not given, components 
+        must already be set)
+
+        .. note ::
+
+          The array is cached.  Afterwards, each `GreensTensor` refers to its
+          own row rather than to a separate array, so repeated calls return 
+          the cached array without copying, until `GreensTensors` are
+          appended or their components change
+
+        """
+        for tensor in self:
+            if components is not None:
+                tensor._set_components(components)
+            if not hasattr(tensor, '_array'):
+                raise Exception("Components must be set before stacking")
+
+        arrays = [tensor._array for tensor in self]
+
+        if getattr(self, '_stack', None) is None or\
+           len(arrays) != len(self._views) or\
+           any(array is not view for array, view in zip(arrays, self._views)):
+
+            stack = _get_rows(self)
+
+            if stack is not None:
+                # the GreensTensors already refer to consecutive rows of an
+                # array stacked (or shared) by another GreensTensorList, such
+                # as the one this list was selected from
+                self._stack, self._views = stack, arrays
+
+            else:
+                for array in arrays:
+                    if array.shape != arrays[0].shape:
+                        raise Exception("Arrays differ in shape")
+
+                self._set_stack(np.array(arrays))
+
+        return self._stack
+
+
     # the next three methods can be used to apply signal processing or other
     # operations to all time series in all GreensTensors
     def apply(self, function, *args, **kwargs):
@@ -430,8 +554,112 @@ class GreensTensorList(list):
         Source wavelet
 
         """
+        from mtuq.wavelet import Wavelet
+
+        if type(wavelet).convolve is not Wavelet.convolve:
+            # respect custom convolution methods
+            for tensor in self:
+                tensor.convolve(wavelet)
+            return
+
+        # rather than convolving one trace at a time, all traces with the same
+        # time sampling are convolved together in the frequency domain
+        groups = {}
         for tensor in self:
-            tensor.convolve(wavelet)
+            if type(tensor).convolve is not GreensTensor.convolve:
+                tensor.convolve(wavelet)
+                continue
+
+            for trace in tensor:
+                key = (trace.stats.delta, trace.stats.npts)
+                groups.setdefault(key, []).append(trace)
+
+        for (dt, nt), traces in groups.items():
+            convolved = wavelet._convolve_array(
+                np.array([trace.data for trace in traces]), dt)
+
+            for trace, data in zip(traces, convolved):
+                trace.data = data
+
+
+    def share(self, components=None, comm=None):
+        """ Moves Green's function arrays into memory shared between MPI
+        processes on the same node
+
+        Must be called by all MPI processes, each holding the same Green's
+        functions.  Afterwards, the arrays used by `get_synthetics` and by
+        the misfit functions are read-only views into a single shared memory
+        window per node, so that memory use no longer grows with the number
+        of processes per node.
+
+        .. rubric :: Input arguments
+
+        ``components`` (`list`):
+        Components to set before sharing, which should match the components
+        present in the data (if not given, components must already be set)
+
+        ``comm`` (`mpi4py.MPI.Comm`):
+        MPI communicator (defaults to ``MPI.COMM_WORLD``)
+
+        .. note ::
+
+            Call after any signal processing or wavelet convolution, and
+            avoid changing components afterwards, since either of these
+            causes the arrays to be recomputed as private copies
+
+        .. note ::
+
+            The shared memory window belongs to this `GreensTensorList`.
+            Calling ``share`` again, or calling ``unshare``, frees it after
+            replacing the arrays that refer to it
+
+        """
+        from mpi4py import MPI
+        from mtuq.util import share_arrays
+
+        if comm is None:
+            comm = MPI.COMM_WORLD
+
+        # a single shared array holds the Green's functions of all stations
+        window, (stack,) = share_arrays(comm, [self.as_array(components)])
+
+        self._set_stack(stack)
+        self._free_window()
+        self._window = window
+
+        return self
+
+
+    def unshare(self):
+        """ Replaces arrays in shared memory with private copies, and frees
+        the shared memory window created by ``share``
+
+        Must be called by all MPI processes that called ``share``
+        """
+        if getattr(self, '_window', None) is None:
+            return self
+
+        self._set_stack(self._stack.copy())
+        self._free_window()
+
+        return self
+
+
+    def _set_stack(self, stack):
+        # makes each GreensTensor refer to its own row of the given array
+        self._stack = stack
+        self._views = list(stack)
+
+        for _i, (tensor, view) in enumerate(zip(self, self._views)):
+            tensor._array = view
+            tensor._row = (stack, _i, view)
+
+
+    def _free_window(self):
+        # arrays in the window must no longer be referenced at this point
+        if getattr(self, '_window', None) is not None:
+            self._window.Free()
+            self._window = None
 
 
     def tag_add(self, tag):
@@ -476,6 +704,13 @@ class GreensTensorList(list):
         self.sort(key=function, reverse=reverse)
 
 
+    def __getstate__(self):
+        # shared memory windows cannot be pickled or copied
+        state = self.__dict__.copy()
+        state.pop('_window', None)
+        return state
+
+
     def __copy__(self):
         try:
             new_id = self.id+'_copy'
@@ -496,3 +731,42 @@ class GreensTensorList(list):
            pickle.dump(self, file)
 
 
+
+def _get_rows(tensors):
+    # if the given GreensTensors refer to consecutive rows of the same stacked
+    # array, returns those rows as a slice of that array, or otherwise None
+    if len(tensors)==0 or not hasattr(tensors[0], '_row'):
+        return None
+
+    stack, start, _ = tensors[0]._row
+
+    for _i, tensor in enumerate(tensors):
+        row = getattr(tensor, '_row', None)
+        if row is None or row[0] is not stack or row[1] != start+_i or\
+           tensor._array is not row[2]:
+            return None
+
+    return stack[start:start+len(tensors)]
+
+
+def _as_array(sources):
+    # converts a list of sources, or an array of source vectors, to a 2D 
+    # array with one row per source
+    if isinstance(sources, np.ndarray):
+        return np.atleast_2d(np.asarray(sources, dtype=np.float64))
+    else:
+        return np.array([source.as_vector() for source in sources])
+
+
+def _matmul(sources, greens, shape, out=None):
+    # multiplies (number of sources, 6 or 9) source array by (6 or 9, ...)
+    # Green's function array, writing the result to the given output array
+    # if possible
+    if out is None:
+        return np.matmul(sources, greens).reshape(shape)
+
+    assert out.shape==shape and out.flags['C_CONTIGUOUS'],\
+        ValueError("Bad input argument: out")
+    np.matmul(sources, greens, out=out.reshape(len(sources), -1))
+    return out
+
@@ -62,6 +62,9 @@ class Grid(object):
     ``get_dict(i)`` returns the `i`-th grid point as a dictionary of coordinate
     axis names and coordinate values without applying any callback.
 
+    ``get_many(indices)`` returns multiple grid points at once as a NumPy array
+    without applying any callback.
+
     """
     def __init__(self, dims=None, coords=None, start=0, stop=None, callback=None):
         # list of axis names
@@ -95,10 +98,25 @@ class Grid(object):
     def to_array(self):
         """ Returns the entire set of grid points as a NumPy array
         """
-        array = np.zeros((self.size, self.ndim))
-        for _i in range(self.size):
-            array[_i, :] = self.get(_i+self.start, callback=None)
-        return array
+        return self._to_array(self.start, self.stop)
+
+
+    def chunks(self, chunk_size):
+        """ Iterates over grid points in blocks
+
+        Yields NumPy arrays of at most `chunk_size` grid points each, making it
+        possible to process very large grids without holding all grid points
+        in memory at once
+        """
+        for start in range(self.start, self.stop, chunk_size):
+            stop = min(start+chunk_size, self.stop)
+            yield self._to_array(start, stop)
+
+
+    def _to_array(self, start, stop):
+        """ Returns grid points from `start` to `stop` as a NumPy array
+        """
+        return self.get_many(np.arange(start, stop))
 
 
     def to_dataarray(self, values=None):
@@ -152,13 +170,7 @@ class Grid(object):
         else:
             callback = self.callback
 
-        vals = self.coords
-        array = np.zeros(self.ndim)
-
-        for _k in range(self.ndim-1, -1, -1):
-            val = vals[_k]
-            array[_k] = val[int(i%len(val))]
-            i/=len(val)
+        array = self.get_many([i])[0]
 
         if callback:
             return callback(*array)
@@ -166,6 +178,25 @@ class Grid(object):
             return array
 
 
+    def get_many(self, indices):
+        """ Returns grid points corresponding to the given indices
+
+        Returns a NumPy array of shape `(len(indices), ndim)`, in which each
+        row is a grid point.  Unlike ``get``, no callback function is applied.
+        
+        Rather than looping over grid points, coordinates along all axes are
+        obtained at once from ``np.unravel_index``, which makes it practical to 
+        work with large blocks of grid points
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        subscripts = np.unravel_index(indices, self.shape)
+
+        array = np.empty((len(indices), self.ndim))
+        for _k in range(self.ndim):
+            array[:, _k] = self.coords[_k][subscripts[_k]]
+        return array
+
+
     def get_dict(self, i):
         """ Returns `i`-th grid point grid as a dictionary of parameter names 
         and values
@@ -259,6 +290,9 @@ class UnstructuredGrid(object):
     ``get_dict(i)`` returns the `i`-th grid point as a dictionary of coordinate
     axis names and coordinate values without applying any callback.
 
+    ``get_many(indices)`` returns multiple grid points at once as a NumPy array
+    without applying any callback.
+
 
     """
     def __init__(self, dims=None, coords=None, start=0, stop=None, callback=None):
@@ -295,10 +329,25 @@ class UnstructuredGrid(object):
     def to_array(self):
         """ Returns the entire set of grid points as a NumPy array
         """
-        array = np.zeros((self.size, self.ndim))
-        for _i in range(self.size):
-            array[_i, :] = self.get(_i+self.start, callback=None)
-        return array
+        return self._to_array(self.start, self.stop)
+
+
+    def chunks(self, chunk_size):
+        """ Iterates over grid points in blocks
+
+        Yields NumPy arrays of at most `chunk_size` grid points each, making it
+        possible to process very large grids without holding all grid points
+        in memory at once
+        """
+        for start in range(self.start, self.stop, chunk_size):
+            stop = min(start+chunk_size, self.stop)
+            yield self._to_array(start, stop)
+
+
+    def _to_array(self, start, stop):
+        """ Returns grid points from `start` to `stop` as a NumPy array
+        """
+        return self.get_many(np.arange(start, stop))
 
 
     def to_dataframe(self, values=None):
@@ -337,12 +386,7 @@ class UnstructuredGrid(object):
         else:
             callback = self.callback
 
-        i -= self.start
-        vals = self.coords
-        array = np.zeros(self.ndim)
-
-        for _k in range(self.ndim):
-            array[_k] = vals[_k][i]
+        array = self.get_many([i])[0]
 
         if callback:
             return callback(*array)
@@ -350,6 +394,21 @@ class UnstructuredGrid(object):
             return array
 
 
+    def get_many(self, indices):
+        """ Returns grid points corresponding to the given indices
+
+        Returns a NumPy array of shape `(len(indices), ndim)`, in which each
+        row is a grid point.  Unlike ``get``, no callback function is applied.
+        """
+        # coordinate arrays hold only the points from self.start onward
+        indices = np.asarray(indices, dtype=np.int64) - self.start
+
+        array = np.empty((len(indices), self.ndim))
+        for _k in range(self.ndim):
+            array[:, _k] = self.coords[_k][indices]
+        return array
+
+
     def get_dict(self, i):
         """ Returns `i`-th grid point as a dictionary of parameter names and
         values
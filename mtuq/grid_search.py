@@ -9,8 +9,9 @@ from collections.abc import Iterable
 from mtuq.event import Origin
 from mtuq.grid import DataFrame, DataArray, Grid, UnstructuredGrid
 from mtuq.util import gather2, iterable, timer, remove_list, warn,\
-    ProgressCallback, dataarray_idxmin, dataarray_idxmax
-from os.path import splitext
+    Null, ProgressCallback, dataarray_idxmin, dataarray_idxmax
+from os import fsync
+from os.path import exists, splitext
 from xarray.core.formatting import unindexed_dims_repr
 
 
@@ -18,7 +19,8 @@ xarray.set_options(keep_attrs=True)
 
 
 def grid_search(data, greens, misfit, origins, sources, 
-    msg_interval=25, timed=True, verbose=1, gather=True):
+    msg_interval=25, timed=True, verbose=1, gather=True, filename=None,
+    resume=False, scheduler='static', task_size=None):
 
     """ Evaluates misfit over grids
 
@@ -69,13 +71,44 @@ def grid_search(data, greens, misfit, origins, sources,
     (ignored outside MPI environment)
 
 
+    ``filename`` (`str`):
+    If given, misfit values are written to an HDF5 file one origin at a time,
+    as soon as they are computed, so that partial results survive an 
+    interrupted run.  Partial or complete results can be read back using
+    ``open_ds``.  Combined with `gather=False`, this avoids holding all
+    results in memory on process 0
+
+
+    ``resume`` (`bool`):
+    If `True` and an interrupted grid search has left behind `filename`, 
+    origins already completed are read from disk rather than recomputed.
+    Completed blocks are recorded in a sidecar checkpoint file
+    `filename + '.checkpoint'` (requires `filename`)
+
+
+    ``scheduler`` (`str`):
+    How work is divided among MPI processes, either `'static'` or 
+    `'dynamic'` (see note below; ignored outside MPI environment)
+
+
+    ``task_size`` (`int`):
+    Number of sources per task handed out by the `'dynamic'` scheduler
+    (by default, chosen to give each process about ten tasks)
+
+
     .. note:
 
-      If invoked from an MPI environment, the grid is partitioned between
-      processes and each process runs ``_grid_search_serial`` on its given
-      partition. If not invoked from an MPI environment, `grid_search`
+      If invoked from an MPI environment, the origins and sources are 
+      partitioned between processes and each process runs 
+      ``_grid_search_serial`` on its given partition. If not invoked from an MPI environment, `grid_search`
       reduces to ``_grid_search_serial``.
 
+      With `scheduler='dynamic'`, process 0 instead hands out 
+      `(origin, source chunk)` tasks to the other processes on demand, 
+      so that faster processes, or processes given cheaper origins, 
+      simply complete more tasks.  Process 0 returns all results, and
+      other processes return `None`.
+
     """
 
     # check input arguments
@@ -86,13 +119,22 @@ def grid_search(data, greens, misfit, origins, sources,
     if type(sources) not in (Grid, UnstructuredGrid):
         raise TypeError
 
+    assert filename or not resume,\
+        ValueError("Bad input argument: resume requires filename")
+
+    assert scheduler in ['static', 'dynamic'],\
+        ValueError("Bad input argument: scheduler")
+
     if _is_mpi_env():
         from mpi4py import MPI
         comm = MPI.COMM_WORLD
         iproc, nproc = comm.rank, comm.size
 
-        if nproc > sources.size:
-            raise Exception('Number of CPU cores exceeds size of grid')
+        if scheduler=='static':
+            # process grid of shape (number of origin groups, number of
+            # source groups)
+            nrow, ncol = _decompose(nproc, len(origins), len(sources))
+            row, col = divmod(iproc, ncol)
 
 
     # print debugging information
@@ -109,14 +151,29 @@ def grid_search(data, greens, misfit, origins, sources,
             (len(origins)*len(sources)))
 
 
+    if _is_mpi_env() and scheduler=='dynamic':
+        return _grid_search_dynamic(
+            data, greens, misfit, origins, sources, comm, timed=timed,
+            msg_interval=msg_interval, filename=filename, resume=resume,
+            task_size=task_size)
+
+
+    origin_start = 0
     if _is_mpi_env():
         #
-        # divide up the grid search over MPI processes
+        # divide up the grid search over MPI processes, first by origin and
+        # then by source, so that each process only ever needs the Green's
+        # functions for its own origins
         #
+        _origins = origins
+        _ranges = _partition(len(origins), nrow)
+        origin_start, origin_stop = _ranges[row]
+        origins = origins[origin_start:origin_stop]
+
         _all = sources
         _subsets = None
         if iproc == 0:
-            _subsets = sources.partition(nproc)
+            _subsets = nrow*sources.partition(ncol)
         sources = comm.scatter(_subsets, root=0)
 
         if iproc != 0:
@@ -124,39 +181,497 @@ def grid_search(data, greens, misfit, origins, sources,
             msg_interval = 0
 
 
+    #
+    # optionally, write results to disk as they are computed
+    #
+    callback = None
+    cached = None
+    if filename and _is_mpi_env():
+        # private communicator for sending blocks of results to process 0
+        _comm = comm.Dup()
+
+        writer = None
+        restored = None
+        requests = []
+        pending = 0
+        if iproc == 0:
+            try:
+                writer = StreamingWriter(
+                    filename, _origins, _all, resume=resume)
+
+                # collect blocks completed by an earlier run
+                restored = []
+                for _iproc, subset in enumerate(_subsets):
+                    _start, _stop = _ranges[_iproc // ncol]
+                    restored += [{
+                        _i: writer.read(_i, subset.start, subset.stop)
+                        for _i in range(_start, _stop)
+                        if writer.is_completed(_i, subset.start, subset.stop)}]
+                    if _iproc != 0:
+                        pending += _stop-_start-len(restored[-1])
+
+            except Exception as error:
+                # raise on all processes, rather than leaving them waiting
+                restored = nproc*[error]
+
+        restored = _comm.scatter(restored, root=0)
+        if isinstance(restored, Exception):
+            raise restored
+
+        def receive(blocking=False):
+            # writes blocks of results received from other MPI processes
+            nonlocal pending
+            while pending > 0 and (blocking or
+                _comm.Iprobe(source=MPI.ANY_SOURCE, tag=_BLOCK)):
+                _i, start, values = _comm.recv(
+                    source=MPI.ANY_SOURCE, tag=_BLOCK)
+                writer.write(values, _i, start)
+                pending -= 1
+
+        def callback(origin_idx, values):
+            origin_idx += origin_start
+            if iproc == 0:
+                writer.write(values, origin_idx, sources.start)
+                receive()
+            else:
+                requests.append(_comm.isend(
+                    (origin_idx, sources.start, values), dest=0, tag=_BLOCK))
+
+        def cached(origin_idx):
+            return restored.get(origin_start+origin_idx)
+
+    elif filename:
+        writer = StreamingWriter(filename, origins, sources, resume=resume)
+        restored = {_i: writer.read(_i) for _i in range(len(origins))
+            if writer.is_completed(_i)}
+
+        def callback(origin_idx, values):
+            writer.write(values, origin_idx)
+
+        def cached(origin_idx):
+            return restored.get(origin_idx)
+
+    if verbose>0 and resume and (not _is_mpi_env() or iproc==0):
+        print('  Number of origins already completed: %d\n' %\
+            len(writer.completed_origins()))
+
+
     #
     # evaluate misfit over grids
     #
     values = _grid_search_serial(
         data, greens, misfit, origins, sources, timed=timed,
-        msg_interval=msg_interval)
+        msg_interval=msg_interval, callback=callback, cached=cached)
+
+    if filename and _is_mpi_env():
+        if iproc == 0:
+            receive(blocking=True)
+            writer.close()
+        else:
+            MPI.Request.waitall(requests)
+        _comm.Free()
+
+    elif filename:
+        writer.close()
 
 
     #
     # collect results
     #
     if _is_mpi_env() and gather:
-        # gather results from MPI processes
-        values = gather2(comm, values)
+        # gather results from MPI processes, first over sources and then
+        # over origins
+        _comm = comm.Split(row, col)
+        values = gather2(_comm, values)
+        _comm.Free()
+
+        _comm = comm.Split(0 if col==0 else MPI.UNDEFINED, row)
+        if col == 0:
+            values = gather2(_comm, np.ascontiguousarray(values.T))
+            _comm.Free()
+
+        origins = _origins
         sources = _all
+        origin_start = 0
 
         if iproc!=0:
             return
 
-    # convert from NumPy array to DataArray or DataFrame
+        values = values.T
+
+    # convert from NumPy array to DataArray or DataFrame (if results are not
+    # gathered, origin indices still refer to the full list of origins)
     if issubclass(type(sources), Grid):
-        return _to_dataarray(origins, sources, values)
+        return _to_dataarray(origins, sources, values, origin_start)
 
     elif issubclass(type(sources), UnstructuredGrid):
-        return _to_dataframe(origins, sources, values)
+        return _to_dataframe(origins, sources, values, origin_start)
+
+
+def grid_search_adaptive(data, greens, misfit, origins, sources,
+    npasses=4, keep=10, threshold=None, refinement=3, verbose=1, **kwargs):
+
+    """ Evaluates misfit over successively refined grids
+
+    .. rubric :: Usage
+
+    Starting from a coarse regularly-spaced grid, repeatedly subdivides the
+    grid cells with the lowest misfit, so that misfit is evaluated densely
+    only in the neighborhood of the best-fitting sources.
+
+    Returns an `MTUQDataFrame` containing misfit values and corresponding 
+    grid points from all passes, which can be plotted in the same way as
+    grid search results over an `UnstructuredGrid`.
+
+
+    .. rubric :: Input arguments
+
+    ``data``, ``greens``, ``misfit``, ``origins``:
+    Same as for `grid_search`
+
+
+    ``sources`` (`mtuq.Grid`):
+    Coarse regularly-spaced source grid from which refinement begins, such as
+    `DoubleCoupleGridRegular` or `FullMomentTensorGridSemiregular`
+
+
+    ``npasses`` (`int`):
+    Number of refinement passes after the initial coarse pass
+
+
+    ``keep`` (`int`):
+    Maximum number of cells subdivided in each pass (those with the lowest
+    misfit over all origins, among cells not yet subdivided)
+
+
+    ``threshold`` (`float`):
+    If given, only cells with misfit less than `threshold` times the minimum
+    misfit so far are subdivided.  With `keep=None`, all such cells are
+    subdivided
+
+
+    ``refinement`` (`int`):
+    Number of subcells along each axis into which each cell is divided
+    (must be odd, so that the old cell center is also a new cell center)
+
+
+    Other keyword arguments, such as ``msg_interval`` or ``scheduler``, are
+    passed to `grid_search`.
+
+
+    .. note:
+
+      Axes of `sources` with a single value, such as `v` and `w` for double
+      couple grids or `rho` for grids with a single magnitude, are held fixed.
+      Refined grid points are kept within the range of moment tensor or force
+      parameters, with `kappa` and `phi` treated as periodic.
+
+    .. note:
+
+      Because sources change from pass to pass, the `source_idx` level of the
+      returned `MTUQDataFrame` refers to grid points in the order they were
+      evaluated, not to `sources`.  Best-fitting parameters can be read off
+      directly, for example:
+
+      .. code::
+
+        df = results.reset_index()
+        best = df.loc[df[0].idxmin()]
+
+      If invoked from an MPI environment, process 0 returns all results and
+      any other processes return `None`.
+
+    """
+    if type(sources) is not Grid:
+        raise TypeError
+
+    assert npasses >= 0,\
+        ValueError("Bad input argument: npasses")
+
+    assert keep is None or keep >= 1,\
+        ValueError("Bad input argument: keep")
+
+    assert keep is not None or threshold is not None,\
+        ValueError("Bad input argument: keep or threshold required")
+
+    assert refinement >= 3 and refinement % 2 == 1,\
+        ValueError("Bad input argument: refinement")
+
+    origins = iterable(origins)
+    iproc = 0
+    if _is_mpi_env():
+        from mpi4py import MPI
+        comm = MPI.COMM_WORLD
+        iproc = comm.rank
+
+    kwargs.update({'verbose': 0, 'timed': False, 'gather': True})
+
+    # the first pass is an ordinary grid search over the coarse grid
+    points = sources.to_array()
+    spacing = _get_spacing(sources)
+    values = _to_values(grid_search(
+        data, greens, misfit, origins, sources, **kwargs), 
+        len(sources), len(origins))
+
+    if verbose>0 and iproc==0:
+        print('  Pass 0 of %d: %d misfit evaluations\n' %
+            (npasses, len(origins)*len(points)))
+
+    subdivided = np.zeros(len(points), dtype=bool)
+
+    for _pass in range(1, npasses+1):
+        #
+        # choose cells to subdivide
+        #
+        new_points = None
+        if iproc==0:
+            misfit_min = values.min(axis=1)
+
+            indices = np.flatnonzero(~subdivided)
+            indices = indices[np.argsort(misfit_min[indices], kind='stable')]
+
+            if threshold is not None:
+                indices = indices[
+                    misfit_min[indices] < threshold*misfit_min.min()]
+
+            if keep is not None:
+                indices = indices[:keep]
+
+            subdivided[indices] = True
+            new_points, new_spacing = _subdivide(
+                points[indices], spacing[indices], sources.dims, refinement)
+
+        if _is_mpi_env():
+            new_points = comm.bcast(new_points, root=0)
+
+        if len(new_points)==0:
+            break
+
+        #
+        # evaluate misfit over new cell centers
+        #
+        new_values = _to_values(grid_search(
+            data, greens, misfit, origins, UnstructuredGrid(
+            dims=sources.dims, coords=new_points.T, callback=sources.callback),
+            **kwargs), len(new_points), len(origins))
+
+        if verbose>0 and iproc==0:
+            print('  Pass %d of %d: %d misfit evaluations\n' %
+                (_pass, npasses, len(origins)*len(new_points)))
+
+        if iproc==0:
+            points = np.concatenate([points, new_points])
+            spacing = np.concatenate([spacing, new_spacing])
+            values = np.concatenate([values, new_values])
+            subdivided = np.concatenate(
+                [subdivided, np.zeros(len(new_points), dtype=bool)])
+
+    if iproc!=0:
+        return
+
+    return _to_dataframe(origins, UnstructuredGrid(
+        dims=sources.dims, coords=points.T, callback=sources.callback), values)
+
+
+def local_search(data, greens, misfit, origins, sources, results,
+    nstart=1, tol=1.e-3, maxiter=None, verbose=1):
+
+    """ Refines grid search results using a local optimizer
+
+    .. rubric :: Usage
+
+    Starting from each of the `nstart` grid points with the lowest misfit,
+    minimizes misfit over continuous source parameters using the 
+    Nelder-Mead simplex method, so that the accuracy of the best-fitting
+    source is no longer limited by grid spacing.
+
+    Returns an `MTUQDataFrame` containing the refined sources and their
+    misfit values, one for each starting point.
+
+
+    .. rubric :: Input arguments
+
+    ``data``, ``greens``, ``misfit``, ``origins``, ``sources``:
+    Same as for `grid_search`
+
+
+    ``results`` (`MTUQDataArray` or `MTUQDataFrame`):
+    Output of `grid_search` over `origins` and `sources`
+
+
+    ``nstart`` (`int`):
+    Number of starting points, chosen in order of increasing misfit over
+    all origins and sources
+
+
+    ``tol`` (`float`):
+    Convergence tolerance, as a fraction of grid spacing
+
+
+    ``maxiter`` (`int`):
+    Maximum number of iterations for each starting point (defaults to
+    the `scipy.optimize.minimize` default)
+
+
+    .. note:
+
+      Misfit is evaluated using ``Misfit.get_function``, so that data and
+      Green's function cross-correlations are computed only once for each
+      origin, and each evaluation during optimization costs about as much
+      as a single grid point in `grid_search`.
+
+    .. note:
+
+      Axes along which `sources` take a single value, such as `v` and `w` for
+      double couple grids, are held fixed.  Origins are also held fixed.
+
+    .. note:
+
+      The `source_idx` level of the returned `MTUQDataFrame` refers to
+      starting points, not to `sources`.  Refined parameters can be read off 
+      directly, for example:
+
+      .. code::
+
+        df = refined.reset_index()
+        best = df.loc[df[0].idxmin()]
+
+      Only process 0 of an MPI environment receives grid search results,
+      so on other processes `None` is returned.
+
+    """
+    from scipy.optimize import minimize
+
+    if results is None:
+        return
+
+    assert nstart >= 1,\
+        ValueError("Bad input argument: nstart")
+
+    assert tol > 0.,\
+        ValueError("Bad input argument: tol")
+
+    origins = iterable(origins)
+    values = _to_values(results, len(sources), len(origins))
+
+    # choose starting points
+    nstart = min(nstart, values.size)
+    indices = np.argsort(values, axis=None, kind='stable')[:nstart]
+    source_indices, origin_indices = np.unravel_index(indices, values.shape)
+
+    points = sources.get_many(sources.start + source_indices)
+    spacing = _get_spacing(sources, sources.start + source_indices)
+    free = np.any(spacing > 0., axis=0)
+
+    refined = np.zeros((nstart, sources.ndim))
+    refined_values = np.zeros((nstart, 1))
+    functions = {}
+
+    for _i, (point, delta, _j) in enumerate(
+        zip(points, spacing, origin_indices)):
+
+        # data and Green's function correlations are computed once per origin
+        if _j not in functions:
+            functions[_j] = misfit.get_function(
+                data, greens.select(origins[_j]), sources.dims)
+        function = functions[_j]
+
+        # optimization variables are offsets from the starting point, in
+        # units of grid spacing
+        def to_point(offsets):
+            new_point = point.copy()
+            new_point[free] += offsets*delta[free]
+            return _in_range(new_point, sources.dims)
+
+        def objective(offsets):
+            return function(to_point(offsets))[0, 0]
+
+        nfree = np.sum(free)
+        simplex = np.vstack([np.zeros(nfree), np.eye(nfree)])
+
+        result = minimize(objective, np.zeros(nfree), method='Nelder-Mead',
+            options={'initial_simplex': simplex, 'xatol': tol,
+                'fatol': tol*abs(values[source_indices[_i], _j]),
+                'maxiter': maxiter})
+
+        refined[_i] = to_point(result.x)
+        refined_values[_i] = objective(result.x)
+
+        if verbose>0:
+            print('  Starting point %d of %d: misfit %.6e -> %.6e '
+                '(%d evaluations)\n' % (_i+1, nstart,
+                values[source_indices[_i], _j], refined_values[_i, 0],
+                result.nfev))
+
+    return _to_dataframe_paired(origin_indices, UnstructuredGrid(
+        dims=sources.dims, coords=refined.T, callback=sources.callback),
+        refined_values)
+
+
+# parameter ranges within which refined grid points are kept
+_RANGES = {
+    'MomentTensor': {
+        'rho': (0., np.inf),
+        'v': (-1./3., 1./3.),
+        'w': (-3./8.*np.pi, 3./8.*np.pi),
+        'sigma': (-90., 90.),
+        'h': (0., 1.),
+        },
+    'Force': {
+        'F0': (0., np.inf),
+        'h': (-1., 1.),
+        },
+    }
+
+# periodic parameters, in degrees
+_PERIODIC = ['kappa', 'phi']
+
+
+def _decompose(nproc, norigins, nsources):
+    """ Chooses how many groups to divide origins and sources into
+
+    Returns `(nrow, ncol)` such that `nrow*ncol == nproc`, minimizing the 
+    number of misfit evaluations on the busiest process and, among equally
+    good choices, preferring more origin groups
+    """
+    best = None
+    for nrow in range(1, min(nproc, norigins)+1):
+        if nproc % nrow:
+            continue
+        ncol = nproc//nrow
+        if ncol > nsources:
+            continue
+        cost = int(np.ceil(norigins/nrow))*int(np.ceil(nsources/ncol))
+        if best is None or cost <= best[0]:
+            best = (cost, nrow, ncol)
+
+    if best is None:
+        raise Exception('Number of CPU cores exceeds size of grid')
+
+    return best[1:]
+
+
+def _partition(size, nparts):
+    """ Divides `range(size)` into `nparts` contiguous `(start, stop)` ranges
+    """
+    return [(int(_i*size/nparts), int((_i+1)*size/nparts))
+        for _i in range(nparts)]
 
 
 
 @timer
 def _grid_search_serial(data, greens, misfit, origins, sources, 
-    timed=True, msg_interval=25):
+    timed=True, msg_interval=25, callback=None, cached=None):
     """ Evaluates misfit over origin and source grids 
     (serial implementation)
+
+    If a `callback` function is given, it is called as
+    `callback(origin_idx, values)` after misfit has been evaluated for each 
+    origin
+
+    If a `cached` function is given, it is called as `cached(origin_idx)`
+    before misfit is evaluated for each origin, and any values it returns
+    are used in place of evaluating misfit
     """
     ni = len(origins)
     nj = len(sources)
@@ -164,6 +679,12 @@ def _grid_search_serial(data, greens, misfit, origins, sources,
     values = []
     for _i, origin in enumerate(origins):
 
+        if cached:
+            _values = cached(_i)
+            if _values is not None:
+                values += [_values]
+                continue
+
         msg_handle = ProgressCallback(
             start=_i*nj, stop=ni*nj, percent=msg_interval)
 
@@ -171,11 +692,163 @@ def _grid_search_serial(data, greens, misfit, origins, sources,
         values += [misfit(
             data, greens.select(origin), sources, msg_handle)]
 
+        if callback:
+            callback(_i, values[-1])
+
     # returns NumPy array of shape `(len(sources), len(origins))` 
     return np.concatenate(values, axis=1)
 
 
 
+# MPI message tags
+_TASK = 1
+_RESULT = 2
+_BLOCK = 3
+
+
+def _grid_search_dynamic(data, greens, misfit, origins, sources, comm,
+    timed=True, msg_interval=25, filename=None, resume=False, task_size=None):
+    """ Evaluates misfit over origin and source grids
+    (dynamically-scheduled MPI implementation)
+    """
+    ni = len(origins)
+    nj = len(sources)
+    nworkers = comm.size-1
+
+    if not task_size:
+        task_size = int(np.ceil(ni*nj/(10.*nworkers)))
+    task_size = min(max(int(task_size), 1), nj)
+
+    # a private communicator keeps messages from separate grid searches
+    # from being mixed up, since workers may start the next grid search 
+    # before process 0 has finished the current one
+    comm = comm.Dup()
+
+    if comm.rank != 0:
+        _grid_search_worker(data, greens, misfit, origins, sources, comm)
+        comm.Free()
+        return
+
+    writer = None
+    if filename:
+        writer = StreamingWriter(filename, origins, sources, resume=resume)
+
+    values = _grid_search_master(
+        origins, sources, comm, task_size, writer=writer, timed=timed, 
+        msg_interval=msg_interval)
+    comm.Free()
+
+    if writer:
+        writer.close()
+
+    # convert from NumPy array to DataArray or DataFrame
+    if issubclass(type(sources), Grid):
+        return _to_dataarray(origins, sources, values)
+
+    elif issubclass(type(sources), UnstructuredGrid):
+        return _to_dataframe(origins, sources, values)
+
+
+@timer
+def _grid_search_master(origins, sources, comm, task_size, writer=None,
+    timed=True, msg_interval=25):
+    """ Hands out `(origin_idx, start, stop)` tasks to worker processes on 
+    demand and collects results
+    """
+    from mpi4py import MPI
+
+    ni = len(origins)
+    nj = len(sources)
+
+    values = np.empty((nj, ni))
+
+    tasks = []
+    for _i in range(ni):
+        for start in range(0, nj, task_size):
+            stop = min(start+task_size, nj)
+
+            if writer and writer.is_completed(_i, start, stop):
+                values[start:stop, _i] = writer.read(_i, start, stop)[:, 0]
+            else:
+                tasks += [(_i, start, stop)]
+
+    ntasks = len(tasks)
+
+    # tasks are handed out in origin-major order, so that workers can 
+    # usually reuse Green's functions from their previous task
+    tasks.reverse()
+
+    # all tasks may have been completed by an earlier run, in which case
+    # workers are simply told to stop
+    if ntasks > 0:
+        msg_handle = ProgressCallback(
+            start=0, stop=ntasks, percent=msg_interval)
+    else:
+        msg_handle = Null()
+
+    status = MPI.Status()
+    nworkers = comm.size-1
+    while nworkers > 0:
+        result = comm.recv(source=MPI.ANY_SOURCE, tag=_RESULT, status=status)
+        worker = status.Get_source()
+
+        if result is not None:
+            (_i, start, stop), _values = result
+            values[start:stop, _i] = _values[:, 0]
+            if writer:
+                writer.write(_values, _i, start)
+            msg_handle()
+
+        if tasks:
+            comm.send(tasks.pop(), dest=worker, tag=_TASK)
+        else:
+            # no work left, so tell worker to stop
+            comm.send(None, dest=worker, tag=_TASK)
+            nworkers -= 1
+
+    return values
+
+
+def _grid_search_worker(data, greens, misfit, origins, sources, comm):
+    """ Evaluates misfit on tasks received from process 0 until told to stop
+    """
+    origin_idx = None
+
+    # an empty result serves as the first request for work
+    comm.send(None, dest=0, tag=_RESULT)
+
+    while True:
+        task = comm.recv(source=0, tag=_TASK)
+        if task is None:
+            break
+
+        _i, start, stop = task
+        if _i != origin_idx:
+            origin_idx = _i
+            _greens = greens.select(origins[_i])
+
+        msg_handle = ProgressCallback(start=0, stop=stop-start, percent=0)
+
+        _values = misfit(
+            data, _greens, _subset(sources, start, stop), msg_handle)
+
+        comm.send((task, _values), dest=0, tag=_RESULT)
+
+
+def _subset(sources, start, stop):
+    """ Returns grid points `start` through `stop` as a new grid
+    """
+    if type(sources) is Grid:
+        return Grid(sources.dims, sources.coords, 
+            sources.start+start, sources.start+stop, callback=sources.callback)
+
+    elif type(sources) is UnstructuredGrid:
+        coords = [array[start:stop] for array in sources.coords]
+        return UnstructuredGrid(sources.dims, coords,
+            sources.start+start, sources.start+stop, callback=sources.callback)
+
+
+
 class MTUQDataArray(xarray.DataArray):
     """ Data structure for storing values on regularly-spaced grids
 
@@ -263,7 +936,12 @@ class MTUQDataFrame(pandas.DataFrame):
         """
         print('  saving HDF5 file: %s' % filename)
         df = pandas.DataFrame(self.values, index=self.index)
-        df.to_hdf(filename, key='df', mode='w')
+
+        # metadata such as the `sampled` flag of `parallel_tempering` results
+        # are saved along with the values
+        with pandas.HDFStore(filename, mode='w') as store:
+            store.put('df', df)
+            store.get_storer('df').attrs.mtuq_attrs = dict(self.attrs)
 
     @property
     def _constructor(self):
@@ -291,11 +969,14 @@ def _is_mpi_env():
         return False
 
 
-def _to_dataarray(origins, sources, values):
+def _to_dataarray(origins, sources, values, origin_start=0):
     """ Converts grid_search inputs to DataArray
+
+    Origin indices begin at `origin_start`, which allows results for a
+    subset of origins to keep their original indices
     """
     origin_dims = ('origin_idx',)
-    origin_coords = [np.arange(len(origins))]
+    origin_coords = [origin_start + np.arange(len(origins))]
     origin_shape = (len(origins),)
 
     source_dims = sources.dims
@@ -309,37 +990,143 @@ def _to_dataarray(origins, sources, values):
          })
 
 
-def _to_dataframe(origins, sources, values, index_type=2):
+def _to_dataframe(origins, sources, values, origin_start=0, index_type=2):
     """ Converts grid_search inputs to DataFrame
+
+    Origin indices begin at `origin_start`, which allows results for a
+    subset of origins to keep their original indices
     """
-    if len(origins)*len(sources) > 1.e7:
-        print("  pandas indexing becomes very slow with >10 million rows\n"
-              "  consider using index_type=1 in mtuq.grid_search._to_dataframe\n"
-             )
-
-    origin_idx = np.arange(len(origins), dtype='int')
-    source_idx = np.arange(len(sources), dtype='int')
-
-    # Cartesian products
-    origin_idx = list(np.repeat(origin_idx, len(sources)))
-    source_idx = list(np.tile(source_idx, len(origins)))
-    source_coords = []
-    for _i, coords in enumerate(sources.coords):
-        source_coords += [list(np.tile(coords, len(origins)))]
-
-    # assemble coordinates
-    coords = [origin_idx, source_idx]
+    no = len(origins)
+    ns = len(sources)
+
+    # Rather than creating Python lists of coordinates and then calling 
+    # `set_index`, which is very slow for large grids, we construct the 
+    # MultiIndex directly from integer codes. The Cartesian product of
+    # origins and sources then requires only `np.repeat` and `np.tile`
+    levels = [origin_start + np.arange(no), np.arange(ns)]
+    codes = [np.repeat(np.arange(no), ns), np.tile(np.arange(ns), no)]
     dims = ('origin_idx', 'source_idx')
+
     if index_type==2:
-        coords += source_coords
+        for _i, coords in enumerate(sources.coords):
+            source_codes, uniques = pandas.factorize(coords[:ns])
+            levels += [uniques]
+            codes += [np.tile(source_codes, no)]
         dims += sources.dims
 
-    # construct DataFrame
-    data = {dims[_i]: coords[_i] for _i in range(len(dims))}
-    data.update({0: values.flatten()})
-    df = MTUQDataFrame(data=data)
-    df = df.set_index(list(dims))
-    return df
+    index = pandas.MultiIndex(
+        levels=levels, codes=codes, names=dims, verify_integrity=False)
+
+    # `values` has shape `(len(sources), len(origins))`, whereas the index
+    # above is ordered by origin first, then by source
+    return MTUQDataFrame({0: values.flatten(order='F')}, index=index)
+
+
+def _to_dataframe_paired(origin_indices, sources, values):
+    """ Converts paired origins and sources to DataFrame
+
+    Unlike `_to_dataframe`, in which each source is paired with each origin,
+    the `i`-th source is paired only with origin `origin_indices[i]`
+    """
+    index = pandas.MultiIndex.from_arrays(
+        [np.asarray(origin_indices), np.arange(len(sources))] +
+        [coords for coords in sources.coords],
+        names=('origin_idx', 'source_idx') + tuple(sources.dims))
+
+    return MTUQDataFrame({0: np.asarray(values).flatten()}, index=index)
+
+
+def _get_spacing(sources, indices=None):
+    """ Returns grid spacing along each axis at the given grid points
+    (zero along axes with a single value)
+
+    For irregular grids, the average spacing is returned instead
+    """
+    if indices is None:
+        indices = np.arange(sources.start, sources.stop)
+
+    spacing = np.zeros((len(indices), sources.ndim))
+
+    if issubclass(type(sources), Grid):
+        subscripts = np.unravel_index(indices, sources.shape)
+        for _k, coords in enumerate(sources.coords):
+            if len(coords) > 1:
+                spacing[:, _k] = np.abs(np.gradient(coords))[subscripts[_k]]
+
+    else:
+        # spacing of a regular grid with the same number of points and
+        # the same extent along each axis
+        extents = np.array([np.ptp(coords) for coords in sources.coords])
+        ndim = np.sum(extents > 0)
+        if ndim > 0:
+            spacing[:] = extents/len(sources)**(1./ndim)
+
+    return spacing
+
+
+def _subdivide(points, spacing, dims, refinement):
+    """ Divides grid cells into `refinement` subcells along each axis
+
+    Returns centers and spacings of the new subcells, excluding the centers
+    of the original cells, which coincide with those of the middle subcells
+    """
+    offsets = (np.arange(refinement) - (refinement-1)/2.)/refinement
+
+    new_points = [np.empty((0, len(dims)))]
+    new_spacing = [np.empty((0, len(dims)))]
+    for point, delta in zip(points, spacing):
+        axes = [point[_k] + offsets*delta[_k] if delta[_k] > 0
+            else point[_k:_k+1] for _k in range(len(dims))]
+
+        subcells = np.reshape(
+            np.meshgrid(*axes, indexing='ij'), (len(dims), -1)).T
+        subcells = subcells[np.any(subcells != point, axis=1)]
+
+        new_points += [subcells]
+        new_spacing += [np.tile(delta/refinement, (len(subcells), 1))]
+
+    new_points = _in_range(np.concatenate(new_points), dims)
+    new_spacing = np.concatenate(new_spacing)
+
+    # points clipped to the same boundary value or shared by neighboring
+    # cells are evaluated only once
+    new_points, _i = np.unique(new_points, axis=0, return_index=True)
+
+    return new_points, new_spacing[_i]
+
+
+def _in_range(points, dims):
+    """ Wraps periodic parameters and clips other parameters to their ranges
+    (modifies `points` in place)
+    """
+    if 'kappa' in dims:
+        ranges = _RANGES['MomentTensor']
+    elif 'phi' in dims:
+        ranges = _RANGES['Force']
+    else:
+        ranges = {}
+
+    for _k, dim in enumerate(dims):
+        if dim in _PERIODIC:
+            points[..., _k] %= 360.
+        elif dim in ranges:
+            points[..., _k] = np.clip(points[..., _k], *ranges[dim])
+
+    return points
+
+
+def _to_values(results, nsources, norigins):
+    """ Converts grid_search output back to a NumPy array of shape
+    `(nsources, norigins)`
+    """
+    if results is None:
+        return None
+
+    elif issubclass(type(results), DataArray):
+        return np.reshape(results.values, (nsources, norigins))
+
+    else:
+        return np.reshape(results[0].values, (nsources, norigins), order='F')
 
 
 #
@@ -364,12 +1151,15 @@ def open_ds(filename, format=None):
             format = 'HDF'
         else:
             try:
-                netCDF.Dataset(filename, "r")
+                netCDF4.Dataset(filename, "r")
                 format = 'NETCDF4'
             except:
                 raise Exception('File format not recognized: %s' % filename)
 
-    if format.upper() in ['H5', 'HDF','HDF5']:
+    if format.upper() in ['H5', 'HDF','HDF5'] and _is_stream(filename):
+        return _open_stream(filename)
+
+    elif format.upper() in ['H5', 'HDF','HDF5']:
         return _open_df(filename)
 
     elif format.upper() in ['NC', 'NC4', 'NETCDF', 'NETCDF4']:
@@ -389,6 +1179,227 @@ def _open_da(filename):
 def _open_df(filename):
     """ Reads MTUQDataFrame from HDF5 file
     """
-    df = pandas.read_hdf(filename)
-    return MTUQDataFrame(df.values, index=df.index)
+    with pandas.HDFStore(filename, mode='r') as store:
+        key = store.keys()[0]
+        df = store.get(key)
+        attrs = getattr(store.get_storer(key).attrs, 'mtuq_attrs', {})
+
+    df = MTUQDataFrame(df.values, index=df.index)
+    df.attrs.update(attrs)
+    return df
+
+
+def _is_stream(filename):
+    """ Checks whether file was written by StreamingWriter
+    """
+    try:
+        with h5py.File(filename, 'r', swmr=True) as file:
+            return file.attrs.get('mtuq_format')==StreamingWriter.format
+    except:
+        return False
+
+
+def _open_stream(filename):
+    """ Reads MTUQDataArray or MTUQDataFrame from file written by
+    StreamingWriter
+
+    Results not yet written are filled with NaN
+    """
+    with h5py.File(filename, 'r', swmr=True) as file:
+        dims = tuple(_to_str(dim) for dim in file.attrs['dims'])
+        coords = [file['coords'][dim][()] for dim in dims]
+        values = file['values'][()]
+        grid_type = _to_str(file.attrs['grid_type'])
+
+    # only the number of origins is needed to reconstruct the results
+    origins = range(values.shape[1])
+
+    if grid_type=='Grid':
+        return _to_dataarray(origins, Grid(dims, coords), values)
+    else:
+        return _to_dataframe(origins, UnstructuredGrid(dims, coords), values)
+
+
+def _to_str(value):
+    if isinstance(value, bytes):
+        return value.decode()
+    return str(value)
+
+
+class StreamingWriter(object):
+    """ Writes grid search results to an HDF5 file incrementally
+
+    .. rubric :: Usage
+
+    .. code::
+
+        writer = StreamingWriter(filename, origins, sources)
+        writer.write(values, origin_idx, start)
+        writer.close()
+
+    Misfit values are stored in a chunked dataset of shape 
+    `(len(sources), len(origins))`, together with the source grid 
+    coordinates.  Each call to ``write`` fills in the block of values for
+    sources `start` through `start+len(values)` and the given origin, and 
+    flushes the file, so that an interrupted grid search leaves behind a
+    valid file containing all completed blocks.  Blocks not yet written are 
+    filled with NaN.
+
+    Partially or fully completed files can be read with ``open_ds``, which 
+    returns an `MTUQDataArray` for regularly-spaced grids and an 
+    `MTUQDataFrame` otherwise
+
+
+    .. rubric :: Checkpointing
+
+    After each block is flushed, its `(origin_idx, start, stop)` indices are
+    appended to a plain text checkpoint file `filename + '.checkpoint'`.
+    Because a block is only recorded once its values are on disk, the
+    checkpoint file never lists incomplete blocks, even if the job is killed
+    mid-write.
+
+    With `resume=True`, an existing results file and checkpoint file are
+    reopened rather than overwritten, and ``completed_origins`` and ``read``
+    can be used to recover the completed blocks
+
+    """
+    format = 'mtuq_grid_search_stream'
+
+    def __init__(self, filename, origins, sources, chunk_size=65536,
+        resume=False):
+
+        if type(sources) not in (Grid, UnstructuredGrid):
+            raise TypeError
+
+        ns = len(sources)
+        no = len(origins)
+
+        self.filename = filename
+        self.checkpoint = filename+'.checkpoint'
+        self.nsources = ns
+        self.completed = {}
+
+        if resume and exists(filename) and exists(self.checkpoint):
+            self._reopen(sources, ns, no)
+        else:
+            self._create(sources, ns, no, chunk_size)
+
+
+    def _create(self, sources, ns, no, chunk_size):
+        # empty checkpoint file, which marks the start of a new grid search
+        open(self.checkpoint, 'w').close()
+
+        self.file = h5py.File(self.filename, 'w', libver='latest')
+
+        self.file.attrs['mtuq_format'] = self.format
+        self.file.attrs['grid_type'] = type(sources).__name__
+        self.file.attrs['dims'] = list(sources.dims)
+
+        group = self.file.create_group('coords')
+        for dim, coords in zip(sources.dims, sources.coords):
+            group.create_dataset(dim, data=coords)
+
+        self.values = self.file.create_dataset('values',
+            shape=(ns, no),
+            dtype='float64',
+            chunks=(max(min(ns, chunk_size), 1), 1),
+            fillvalue=np.nan)
+
+        # allows results to be read while the grid search is still running
+        self.file.swmr_mode = True
+        self.file.flush()
+
+
+    def _reopen(self, sources, ns, no):
+        self.file = h5py.File(self.filename, 'r+', libver='latest')
+
+        if self.file.attrs.get('mtuq_format') != self.format or\
+           self.file['values'].shape != (ns, no) or\
+           [_to_str(dim) for dim in self.file.attrs['dims']] != list(sources.dims) or\
+           not all([np.array_equal(self.file['coords'][dim][()], coords)
+               for dim, coords in zip(sources.dims, sources.coords)]):
+            self.file.close()
+            raise Exception('Grid search does not match checkpoint: %s'
+                % self.filename)
+
+        self.values = self.file['values']
+        self.file.swmr_mode = True
+
+        with open(self.checkpoint, 'r') as file:
+            for line in file:
+                fields = line.split()
+                # skips any incomplete last line
+                if len(fields)==3 and line.endswith('\n'):
+                    self._add_block(*[int(field) for field in fields])
+
+
+    def write(self, values, origin_idx, start=0):
+        """ Writes block of misfit values for the given origin and sources
+        """
+        values = np.asarray(values).reshape(-1)
+        stop = start+len(values)
+
+        self.values[start:stop, origin_idx] = values
+        self.values.flush()
+
+        # record block only after values have been flushed
+        with open(self.checkpoint, 'a') as file:
+            file.write('%d %d %d\n' % (origin_idx, start, stop))
+            file.flush()
+            fsync(file.fileno())
+
+        self._add_block(origin_idx, start, stop)
+
+
+    def read(self, origin_idx, start=0, stop=None):
+        """ Reads block of misfit values for the given origin and sources
+        """
+        if stop is None:
+            stop = self.nsources
+        return self.values[start:stop, origin_idx].reshape(-1, 1)
+
+
+    def is_completed(self, origin_idx, start=0, stop=None):
+        """ Checks whether all values in the given block have been written
+        """
+        if stop is None:
+            stop = self.nsources
+
+        # sweeps over sorted blocks, checking for gaps
+        for _start, _stop in sorted(self.completed.get(origin_idx, [])):
+            if _start > start:
+                break
+            start = max(start, _stop)
+            if start >= stop:
+                return True
+        return start >= stop
+
+
+    def completed_origins(self):
+        """ Returns indices of origins for which all values have been written
+        """
+        return [origin_idx for origin_idx in sorted(self.completed)
+            if self.is_completed(origin_idx)]
+
+
+    def _add_block(self, origin_idx, start, stop):
+        if origin_idx not in self.completed:
+            self.completed[origin_idx] = []
+        self.completed[origin_idx] += [(start, stop)]
+
+
+    def close(self):
+        """ Closes file
+        """
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
 
@@ -10,7 +10,7 @@ import numpy as np
 from obspy.core import Stream
 from os.path import basename
 from mtuq.greens_tensor.AxiSEM import GreensTensor
-from mtuq.io.clients.base import Client as ClientBase
+from mtuq.io.clients.base import Client as ClientBase, GreensTensorCache
 from mtuq.util.signal import get_distance_in_deg, resample
 
 
@@ -45,7 +45,7 @@ class Client(ClientBase):
     """
 
     def __init__(self, path_or_url='', model='', kernelwidth=12,
-        include_mt=True, include_force=False):
+        include_mt=True, include_force=False, cache_size=0):
 
         if not path_or_url:
             raise Exception
@@ -59,8 +59,12 @@ class Client(ClientBase):
         self.include_mt = include_mt
         self.include_force = include_force
 
+        # resampled Green's tensors kept in memory between calls
+        self.cache = GreensTensorCache(cache_size) if cache_size else None
 
-    def get_greens_tensors(self, stations=[], origins=[], verbose=False):
+
+    def get_greens_tensors(self, stations=[], origins=[], verbose=False,
+        **kwargs):
         """ Reads Green's tensors from database
 
         Returns a ``GreensTensorList`` in which each element corresponds to a
@@ -74,7 +78,8 @@ class Client(ClientBase):
 
         ``verbose`` (`bool`)
         """
-        return super(Client, self).get_greens_tensors(stations, origins, verbose)
+        return super(Client, self).get_greens_tensors(
+            stations, origins, verbose, **kwargs)
 
 
     def _get_greens_tensor(self, station=None, origin=None):
@@ -117,14 +122,14 @@ class Client(ClientBase):
         t2_old = float(trace.stats.endtime)
         dt_old = float(trace.stats.delta)
 
-        for trace in stream:
-            trace.stats._component = trace.stats.channel[0]
+        # resample all Green's functions at once
+        data_old = np.array([trace.data for trace in stream])
+        data_new = resample(data_old, t1_old, t2_old, dt_old, 
+                                      t1_new, t2_new, dt_new)
 
-            # resample Green's functions
-            data_old = trace.data
-            data_new = resample(data_old, t1_old, t2_old, dt_old, 
-                                          t1_new, t2_new, dt_new)
-            trace.data = data_new
+        for _i, trace in enumerate(stream):
+            trace.stats._component = trace.stats.channel[0]
+            trace.data = data_new[_i]
             trace.stats.starttime = t1_new
             trace.stats.delta = dt_new
 
@@ -138,6 +143,22 @@ class Client(ClientBase):
             include_mt=self.include_mt, include_force=self.include_force)
 
 
+    def _get_key(self, station=None, origin=None):
+        # moment tensor responses depend only on the distance, depth and
+        # origin time used to query the database and on the time window they
+        # are resampled to, but force responses also depend on azimuth
+        window = (float(station.starttime), float(station.endtime),
+            float(station.delta))
+
+        if self.include_force:
+            return (station.id, station.latitude, station.longitude,
+                origin.latitude, origin.longitude, origin.depth_in_m,
+                float(origin.time)) + window
+
+        return (get_distance_in_deg(station, origin), origin.depth_in_m,
+            float(origin.time)) + window
+
+
 
 #
 # utility functions
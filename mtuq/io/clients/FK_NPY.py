@@ -0,0 +1,194 @@
+
+import glob
+import obspy
+import numpy as np
+import os
+
+from os.path import basename, exists, join
+from obspy.core import Trace
+from mtuq.io.clients.base import GreensTensorCache
+from mtuq.io.clients.FK_SAC import Client as ClientFK, EXTENSIONS
+
+
+class Client(ClientFK):
+    """  Memory-mapped FK database client
+
+    .. rubric:: Usage
+
+    First, pack an FK directory tree into a binary store (only needs to be
+    done once per model):
+
+    .. code::
+
+        from mtuq.io.clients.FK_NPY import Client, convert
+        convert(path_to_fk_tree, path_to_store)
+
+    Then the database client can be used to generate GreensTensors, in the
+    same way as with ``mtuq.io.clients.FK_SAC.Client``:
+
+    .. code::
+
+        db = Client(path_to_store)
+        greens_tensors = db.get_greens_tensors(stations, origin)
+
+
+    .. note::
+
+      The store consists of a single NumPy array file ``greens.npy`` of
+      shape `(number of depths, number of distances, 10, number of samples)`
+      and a small header table ``index.npz`` giving the depths, distances
+      and time sampling of each time series.  The array file is
+      memory-mapped, so Green's functions are looked up as array slices
+      rather than by opening and parsing SAC files, and pages of the array
+      are shared by all processes on a node that read the same store.
+
+    """
+    def __init__(self, path_or_url=None, model=None,
+        include_mt=True, include_force=False, cache_size=0):
+
+        if not path_or_url:
+            raise Exception
+
+        if not exists(path_or_url):
+            raise Exception
+
+        if include_force:
+            raise NotImplementedError
+
+        with np.load(join(path_or_url, 'index.npz')) as index:
+            if not model:
+                model = str(index['model'])
+
+            self._depths = {depth: _i for _i, depth in
+                enumerate(index['depths'])}
+
+            self._distances = {distance: _i for _i, distance in
+                enumerate(index['distances'])}
+
+            self._starttime = index['starttime']
+            self._delta = index['delta']
+            self._npts = index['npts']
+
+        self._array = np.load(
+            join(path_or_url, 'greens.npy'), mmap_mode='r')
+
+        # path to binary store
+        self.path = path_or_url
+
+        # model from which fk Green's functions were computed
+        self.model = model
+
+        self.include_mt = include_mt
+        self.include_force = include_force
+
+        # resampled Green's tensors kept in memory between calls
+        self.cache = GreensTensorCache(cache_size) if cache_size else None
+
+
+    def _read_trace(self, dep, dst, ext):
+        # looks up Green's function time series in memory-mapped array
+        try:
+            _i = self._depths[int(dep)]
+            _j = self._distances[int(dst)]
+        except KeyError:
+            raise Exception("Not found in FK store: depth %s km, distance "
+                "%s km" % (dep, dst))
+
+        npts = self._npts[_i, _j]
+        if npts == 0:
+            raise Exception("Not found in FK store: depth %s km, distance "
+                "%s km" % (dep, dst))
+
+        return Trace(self._array[_i, _j, EXTENSIONS.index(ext), :npts],
+            {'starttime': self._starttime[_i, _j],
+             'delta': self._delta[_i, _j]})
+
+
+
+def convert(path, output, model=None, dtype='float32'):
+    """ Packs FK directory tree into binary store read by ``Client``
+
+    .. rubric :: Input arguments
+
+    ``path`` (`str`): FK directory tree, containing SAC files organized as
+    ``{model}_{depth}/{distance}.grn.{ext}``
+
+    ``output`` (`str`): directory in which to write the store
+
+    ``model`` (`str`): model name (defaults to ``basename(path)``)
+
+    ``dtype`` (`str`): data type of stored time series (FK writes single
+    precision SAC files, so ``float32`` loses no information)
+
+    """
+    if not model:
+        model = basename(path)
+
+    # collect depths and distances, and read SAC headers
+    headers = {}
+    for dirname in glob.glob(join(path, '%s_*' % model)):
+        try:
+            depth = int(basename(dirname)[len(model)+1:])
+        except ValueError:
+            continue
+
+        for filename in glob.glob(join(dirname, '*.grn.%s' % EXTENSIONS[0])):
+            distance = int(basename(filename).split('.')[0])
+            stats = obspy.read(filename, format='sac', headonly=True)[0].stats
+            headers[depth, distance] = stats
+
+    if not headers:
+        raise Exception("No FK Green's functions found: %s" % path)
+
+    depths = sorted(set([key[0] for key in headers]))
+    distances = sorted(set([key[1] for key in headers]))
+
+    ni = len(depths)
+    nj = len(distances)
+    nk = len(EXTENSIONS)
+    nt = max([stats.npts for stats in headers.values()])
+
+    starttime = np.zeros((ni, nj))
+    delta = np.zeros((ni, nj))
+    npts = np.zeros((ni, nj), dtype=int)
+
+    if not exists(output):
+        os.makedirs(output)
+
+    # the array is written directly to disk, so conversion never requires
+    # holding the whole database in memory
+    array = np.lib.format.open_memmap(join(output, 'greens.npy'), mode='w+',
+        dtype=dtype, shape=(ni, nj, nk, nt))
+
+    for _i, depth in enumerate(depths):
+        for _j, distance in enumerate(distances):
+            if (depth, distance) not in headers:
+                # missing time series are marked by npts=0
+                continue
+
+            stats = headers[depth, distance]
+            starttime[_i, _j] = float(stats.starttime)
+            delta[_i, _j] = stats.delta
+            npts[_i, _j] = stats.npts
+
+            for _k, ext in enumerate(EXTENSIONS):
+                trace = obspy.read(join(path, '%s_%d' % (model, depth),
+                    '%d.grn.%s' % (distance, ext)), format='sac')[0]
+
+                if trace.stats.npts != stats.npts:
+                    raise Exception("Inconsistent number of samples: %s"
+                        % trace.id)
+
+                array[_i, _j, _k, :stats.npts] = trace.data
+
+    array.flush()
+    del array
+
+    np.savez(join(output, 'index.npz'),
+        model=model,
+        depths=np.array(depths),
+        distances=np.array(distances),
+        starttime=starttime,
+        delta=delta,
+        npts=npts)
+
@@ -4,7 +4,7 @@ import numpy as np
 
 from os.path import basename, exists
 from mtuq.greens_tensor.FK import GreensTensor 
-from mtuq.io.clients.base import Client as ClientBase
+from mtuq.io.clients.base import Client as ClientBase, GreensTensorCache
 from mtuq.util.signal import resample
 from obspy.core import Stream
 from obspy.geodetics import gps2dist_azimuth
@@ -58,7 +58,7 @@ class Client(ClientBase):
 
     """
     def __init__(self, path_or_url=None, model=None,
-        include_mt=True, include_force=False):
+        include_mt=True, include_force=False, cache_size=0):
 
         if not path_or_url:
             raise Exception
@@ -81,9 +81,13 @@ class Client(ClientBase):
         self.include_mt = include_mt
         self.include_force = include_force
 
+        # resampled Green's tensors kept in memory between calls
+        self.cache = GreensTensorCache(cache_size) if cache_size else None
 
 
-    def get_greens_tensors(self, stations=[], origins=[], verbose=False):
+
+    def get_greens_tensors(self, stations=[], origins=[], verbose=False,
+        **kwargs):
         """ Reads Green's tensors from database
 
         Returns a ``GreensTensorList`` in which each element corresponds to a
@@ -98,7 +102,8 @@ class Client(ClientBase):
         ``verbose`` (`bool`)
 
         """
-        return super(Client, self).get_greens_tensors(stations, origins, verbose)
+        return super(Client, self).get_greens_tensors(
+            stations, origins, verbose, **kwargs)
 
 
     def _get_greens_tensor(self, station=None, origin=None):
@@ -110,50 +115,42 @@ class Client(ClientBase):
 
         traces = []
 
-        distance_in_m, _, _ = gps2dist_azimuth(
-            origin.latitude,
-            origin.longitude,
-            station.latitude,
-            station.longitude)
-
         # what are the start and end times of the data?
         t1_new = float(station.starttime)
         t2_new = float(station.endtime)
         dt_new = float(station.delta)
 
-        #dep = str(int(round(origin.depth_in_m/1000.)))
-        dep = str(int(np.ceil(origin.depth_in_m/1000.)))
-        #dst = str(int(round(distance_in_m/1000.)))
-        dst = str(int(np.ceil(distance_in_m/1000.)))
+        dep, dst = self._get_depth_distance(station, origin)
 
         if self.include_mt:
 
             for _i, ext in enumerate(EXTENSIONS):
-                trace = obspy.read('%s/%s_%s/%s.grn.%s' %
-                    (self.path, self.model, dep, dst, ext),
-                    format='sac')[0]
+                trace = self._read_trace(dep, dst, ext)
 
                 trace.stats.channel = CHANNELS[_i]
                 trace.stats._component = CHANNELS[_i][0]
 
+                traces += [trace]
 
-                # what are the start and end times of the Green's function?
-                t1_old = float(origin.time)+float(trace.stats.starttime)
-                t2_old = float(origin.time)+float(trace.stats.endtime)
-                dt_old = float(trace.stats.delta)
-                data_old = trace.data
-
-                # resample Green's function
-                data_new = resample(data_old, t1_old, t2_old, dt_old, 
-                                              t1_new, t2_new, dt_new)
-                trace.data = data_new
-                # convert from 10^-20 dyne to N^-1
-                trace.data *= 1.e-15
+            # what are the start and end times of the Green's functions?
+            # (all time series for a given depth and distance share the same
+            # time sampling)
+            t1_old = float(origin.time)+float(traces[0].stats.starttime)
+            t2_old = float(origin.time)+float(traces[0].stats.endtime)
+            dt_old = float(traces[0].stats.delta)
+            data_old = np.array([trace.data for trace in traces])
+
+            # resample all Green's functions at once
+            data_new = resample(data_old, t1_old, t2_old, dt_old, 
+                                          t1_new, t2_new, dt_new)
+            # convert from 10^-20 dyne to N^-1
+            data_new *= 1.e-15
+
+            for _i, trace in enumerate(traces):
+                trace.data = data_new[_i]
                 trace.stats.starttime = t1_new
                 trace.stats.delta = dt_new
 
-                traces += [trace]
-
         tags = [
             'model:%s' % self.model,
             'solver:%s' % 'FK',
@@ -164,5 +161,37 @@ class Client(ClientBase):
             include_mt=self.include_mt, include_force=self.include_force)
 
 
+    def _read_trace(self, dep, dst, ext):
+        # reads Green's function time series from SAC file
+        return obspy.read('%s/%s_%s/%s.grn.%s' %
+            (self.path, self.model, dep, dst, ext),
+            format='sac')[0]
+
+
+    def _get_key(self, station=None, origin=None):
+        # Green's functions depend only on the depth and distance used to look
+        # up the SAC files and on the time window they are resampled to
+        dep, dst = self._get_depth_distance(station, origin)
+
+        return (dep, dst, float(origin.time), float(station.starttime),
+            float(station.endtime), float(station.delta))
+
+
+    def _get_depth_distance(self, station, origin):
+        # returns depth and distance strings used in FK filenames
+        distance_in_m, _, _ = gps2dist_azimuth(
+            origin.latitude,
+            origin.longitude,
+            station.latitude,
+            station.longitude)
+
+        #dep = str(int(round(origin.depth_in_m/1000.)))
+        dep = str(int(np.ceil(origin.depth_in_m/1000.)))
+        #dst = str(int(round(distance_in_m/1000.)))
+        dst = str(int(np.ceil(distance_in_m/1000.)))
+
+        return dep, dst
+
+
 
 
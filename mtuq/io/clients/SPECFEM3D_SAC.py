@@ -4,7 +4,7 @@ import numpy as np
 
 from obspy.core import Stream
 from mtuq.greens_tensor.SPECFEM3D import GreensTensor 
-from mtuq.io.clients.base import Client as ClientBase
+from mtuq.io.clients.base import Client as ClientBase, GreensTensorCache
 from mtuq.util.signal import resample
 
 
@@ -54,7 +54,7 @@ class Client(ClientBase):
     """
 
     def __init__(self, path_or_url=None, model=None, 
-                 include_mt=True, include_force=False):
+                 include_mt=True, include_force=False, cache_size=0):
 
         self.path = path_or_url
 
@@ -65,8 +65,12 @@ class Client(ClientBase):
         self.include_mt = include_mt
         self.include_force = include_force
 
+        # resampled Green's tensors kept in memory between calls
+        self.cache = GreensTensorCache(cache_size) if cache_size else None
 
-    def get_greens_tensors(self, stations=[], origins=[], verbose=False):
+
+    def get_greens_tensors(self, stations=[], origins=[], verbose=False,
+        **kwargs):
         """ Reads Green's tensors
 
         Returns a ``GreensTensorList`` in which each element corresponds to a
@@ -81,7 +85,8 @@ class Client(ClientBase):
         ``verbose`` (`bool`)
 
         """
-        return super(Client, self).get_greens_tensors(stations, origins, verbose)
+        return super(Client, self).get_greens_tensors(
+            stations, origins, verbose, **kwargs)
 
 
     def _get_greens_tensor(self, station=None, origin=None):
@@ -114,15 +119,16 @@ class Client(ClientBase):
         t2_old = float(stream[0].stats.endtime)
         dt_old = float(stream[0].stats.delta)
 
-        for trace in stream:
-            # resample Green's functions
-            data_old = trace.data
-            data_new = resample(data_old, t1_old, t2_old, dt_old,
-                                          t1_new, t2_new, dt_new)
-            trace.data = data_new
+        # resample all Green's functions at once
+        data_old = np.array([trace.data for trace in stream])
+        data_new = resample(data_old, t1_old, t2_old, dt_old,
+                                      t1_new, t2_new, dt_new)
+
+        for _i, trace in enumerate(stream):
+            trace.data = data_new[_i]
             trace.stats.starttime = t1_new
             trace.stats.delta = dt_new
-            trace.stats.npts = len(data_new)
+            trace.stats.npts = len(data_new[_i])
 
         tags = [
             'model:%s' % self.model,
@@ -133,3 +139,11 @@ class Client(ClientBase):
             station=station, origin=origin, tags=tags,
             include_mt=self.include_mt, include_force=self.include_force)
 
+
+    def _get_key(self, station=None, origin=None):
+        # Green's functions are read from files named by station only, so 
+        # they depend only on the station and the time window they are
+        # resampled to
+        return (station.id, float(station.starttime), float(station.endtime),
+            float(station.delta))
+
@@ -6,7 +6,7 @@ import numpy as np
 import pickle
 
 from mtuq.greens_tensor.SPECFEM3D import GreensTensor
-from mtuq.io.clients.base import Client as ClientBase
+from mtuq.io.clients.base import Client as ClientBase, GreensTensorCache
 from mtuq.util.signal import resample
 
 
@@ -40,7 +40,7 @@ class Client(ClientBase):
     """
 
     def __init__(self, path_or_url=None, model=None,
-                 include_mt=True, include_force=False):
+                 include_mt=True, include_force=False, cache_size=0):
 
         self.path = path_or_url
 
@@ -51,6 +51,9 @@ class Client(ClientBase):
         self.include_mt = include_mt
         self.include_force = include_force
 
+        # resampled Green's tensors kept in memory between calls
+        self.cache = GreensTensorCache(cache_size) if cache_size else None
+
         self.b_initial_db = False
         self.b_new_origin = True
         self.origin = 0
@@ -68,7 +71,8 @@ class Client(ClientBase):
         raise NotImplementedError
 
 
-    def get_greens_tensors(self, stations=[], origins=[], verbose=False):
+    def get_greens_tensors(self, stations=[], origins=[], verbose=False,
+        max_workers=1, **kwargs):
         """ Reads Green's tensors
 
         Returns a ``GreensTensorList`` in which each element corresponds to a
@@ -82,8 +86,20 @@ class Client(ClientBase):
 
         ``verbose`` (`bool`)
 
+
+        .. note::
+
+          Green's tensors are always read one at a time, because the strain
+          Green's tensor manager keeps track of the most recent origin
+          between reads
+
         """
-        return super(Client, self).get_greens_tensors(stations, origins, verbose)
+        if max_workers != 1:
+            raise NotImplementedError(
+                "SPECFEM3D_SGT client does not support max_workers != 1")
+
+        return super(Client, self).get_greens_tensors(
+            stations, origins, verbose, max_workers=1, **kwargs)
 
 
     def _get_greens_tensor(self, station=None, origin=None):
@@ -159,15 +175,16 @@ class Client(ClientBase):
         t2_old = float(origin.time) + float(stream[0].stats.endtime)
         dt_old = float(stream[0].stats.delta)
 
-        for trace in stream:
-            # resample Green's functions
-            data_old = trace.data
-            data_new = resample(data_old, t1_old, t2_old, dt_old,
-                                          t1_new, t2_new, dt_new)
-            trace.data = data_new
+        # resample all Green's functions at once
+        data_old = np.array([trace.data for trace in stream])
+        data_new = resample(data_old, t1_old, t2_old, dt_old,
+                                      t1_new, t2_new, dt_new)
+
+        for _i, trace in enumerate(stream):
+            trace.data = data_new[_i]
             trace.stats.starttime = t1_new
             trace.stats.delta = dt_new
-            trace.stats.npts = len(data_new)
+            trace.stats.npts = len(data_new[_i])
 
         tags = [
             'model:%s' % self.model,
@@ -177,3 +194,11 @@ class Client(ClientBase):
         return GreensTensor(traces=[trace for trace in stream],
             station=station, origin=origin, tags=tags,
             include_mt=self.include_mt, include_force=self.include_force)
+
+
+    def _get_key(self, station=None, origin=None):
+        # Green's functions are generated for each station and origin location
+        return (station.id, station.latitude, station.longitude,
+            origin.latitude, origin.longitude, origin.depth_in_m,
+            float(origin.time), float(station.starttime),
+            float(station.endtime), float(station.delta))
@@ -1,4 +1,7 @@
 
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from copy import copy
 from mtuq.greens_tensor import GreensTensorList
 from mtuq.util import iterable
 
@@ -10,13 +13,19 @@ class Client(object):
     Details regarding how the GreenTensors are created--whether they are 
     downloaded, read from disk, or computed on-the-fly--are deferred to the 
     subclass.
+
+    Subclasses that implement ``_get_key`` can be given a `cache_size` 
+    keyword argument, in which case up to `cache_size` resampled Green's
+    tensors are kept in memory between calls to ``get_greens_tensors``
+    (see ``GreensTensorCache``)
     """
 
     def __init__(self, path_or_url='', **kwargs):
         raise NotImplementedError("Must be implemented by subclass")
 
 
-    def get_greens_tensors(self, stations=[], origins=[], verbose=False):
+    def get_greens_tensors(self, stations=[], origins=[], verbose=False,
+        max_workers=1, executor='thread'):
         """ Reads Green's tensors from database
 
         Returns a ``GreensTensorList`` in which each element corresponds to the
@@ -30,24 +39,110 @@ class Client(object):
 
         ``verbose`` (`bool`)
 
+        ``max_workers`` (`int`): maximum number of Green's tensors read
+        concurrently (by default, Green's tensors are read one at a time;
+        see note below)
+
+        ``executor`` (`str`): read Green's tensors using a pool of
+        ``'thread'`` or ``'process'`` workers (ignored if `max_workers=1`)
+
+
+        .. note::
+
+          If the subclass implements ``_get_key``, (station, origin) pairs
+          with the same key are read only once, and the remaining Green's
+          tensors are copies with the appropriate station and origin
+          attributes. For example, FK Green's functions are looked up by
+          depth and distance rounded to the nearest km, so stations at similar
+          distances often share Green's functions.  Keys are also used to
+          look up Green's tensors in the client's cache, if any.
+
+        .. note::
+
+          Concurrent reads require a client whose ``_get_greens_tensor`` does
+          not modify shared state.  The `FK_SAC`, `FK_NPY`, `SPECFEM3D_SAC`
+          and `syngine` clients can be used with either executor.  The
+          `AxiSEM_NetCDF` client reads through instaseis, which is not
+          known to be thread-safe, so concurrent reads are not recommended.
+          The `SPECFEM3D_SGT` client keeps track of the most recent origin
+          between reads, and raises an error unless `max_workers=1`.
+
         """
         origins = iterable(origins)
         stations = iterable(stations)
         ni = len(origins)
         nj = len(stations)
 
-        tensors = []
-        for _i, origin in enumerate(origins):
+        assert executor in ['thread', 'process'],\
+            ValueError("Bad input argument: executor")
+
+        pairs = [(station, origin) for origin in origins for station in stations]
+        keys = [self._get_key(station, origin) for station, origin in pairs]
+
+        # which pairs need to be read, and which can be copied from earlier
+        # pairs or from the cache?
+        first = {}
+        unique = []
+        for _k, key in enumerate(keys):
+            if key is None or key not in first:
+                first[key] = _k
+                unique += [_k]
+
+        cache = getattr(self, 'cache', None)
+
+        tensors = len(pairs)*[None]
+        if cache is not None:
+            for _k in unique:
+                if keys[_k] is not None:
+                    tensor = cache.get(keys[_k])
+                    if tensor is not None:
+                        tensors[_k] = self._copy_greens_tensor(
+                            tensor, *pairs[_k])
+
+        unique = [_k for _k in unique if tensors[_k] is None]
+
+        if max_workers is None or max_workers > 1:
             if verbose:
-                if len(origins) > 1:
-                    print("  reading %d of %d" % (_i+1, ni))
+                print("  reading %d Green's tensors (%d unique)\n" %
+                    (len(pairs), len(unique)))
+
+            if executor=='thread':
+                pool = ThreadPoolExecutor(max_workers=max_workers)
+            else:
+                pool = ProcessPoolExecutor(max_workers=max_workers)
+
+            with pool:
+                # results are returned in the original order
+                results = list(pool.map(self._get_greens_tensor,
+                    *zip(*[pairs[_k] for _k in unique])))
+
+        else:
+            results = []
+            _k_last = -nj
+            for _k in unique:
+                station, origin = pairs[_k]
+                if verbose and ni > 1 and _k//nj != _k_last//nj:
+                    print("  reading %d of %d" % (_k//nj+1, ni))
                     print("  origin latitude: %.1f" % origin.latitude)
                     print("  origin longitude: %.1f" % origin.longitude)
                     print("  origin depth (km): %d" % int(origin.depth_in_m/1000.))
                     print("")
+                results += [self._get_greens_tensor(station, origin)]
+                _k_last = _k
+
+        for _k, tensor in zip(unique, results):
+            tensors[_k] = tensor
 
-            for _j, station in enumerate(stations):
-                tensors += [self._get_greens_tensor(station, origin)]
+            # cached Green's tensors must not be affected by any processing 
+            # carried out on the returned ones
+            if cache is not None and keys[_k] is not None:
+                cache.put(keys[_k], self._copy_greens_tensor(
+                    tensor, *pairs[_k]))
+
+        for _k, (station, origin) in enumerate(pairs):
+            if tensors[_k] is None:
+                tensors[_k] = self._copy_greens_tensor(
+                    tensors[first[keys[_k]]], station, origin)
 
         return GreensTensorList(tensors)
 
@@ -56,3 +151,89 @@ class Client(object):
         raise NotImplementedError("Must be implemented by subclass")
 
 
+    def _get_key(self, station=None, origin=None):
+        """ Returns hashable key such that (station, origin) pairs with equal
+        keys have identical Green's function time series, or `None` if no
+        such key is available
+        """
+        return None
+
+
+    def _copy_greens_tensor(self, tensor, station, origin):
+        """ Copies time series from an existing Green's tensor, attaching new
+        station and origin attributes
+        """
+        return tensor.__class__(
+            traces=[trace.copy() for trace in tensor],
+            station=station, origin=origin, tags=copy(tensor.tags),
+            include_mt=tensor.include_mt, include_force=tensor.include_force)
+
+
+
+class GreensTensorCache(object):
+    """ In-memory cache of resampled Green's tensors
+
+    .. rubric:: Usage
+
+    .. code::
+
+        db = open_db(path, format='FK', cache_size=1000)
+        greens = db.get_greens_tensors(stations, origins)
+        print(db.cache)
+
+    Green's tensors are keyed by the client's ``_get_key`` method, which
+    accounts for the model (through the client itself), the depth and
+    distance, and the time window to which Green's functions are resampled.
+    At most ``maxsize`` Green's tensors are kept, with the least recently
+    used evicted first.  Hit and miss counts are available through the
+    ``hits`` and ``misses`` attributes.
+
+    """
+    def __init__(self, maxsize=128):
+        assert maxsize >= 0,\
+            ValueError("Bad input argument: maxsize")
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+
+
+    def get(self, key):
+        """ Returns cached `GreensTensor` or `None` if not found
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        return None
+
+
+    def put(self, key, tensor):
+        """ Adds `GreensTensor` to cache
+        """
+        self._entries[key] = tensor
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+    def clear(self):
+        """ Removes all entries and resets hit and miss counts
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+    def __repr__(self):
+        return ('GreensTensorCache(entries=%d, maxsize=%d, hits=%d, misses=%d)'
+            % (len(self), self.maxsize, self.hits, self.misses))
+
@@ -4,8 +4,8 @@ import numpy as np
 
 from obspy.core import Stream
 from mtuq.greens_tensor.syngine import GreensTensor
-from mtuq.io.clients.base import Client as ClientBase
-from mtuq.util.signal import resample
+from mtuq.io.clients.base import Client as ClientBase, GreensTensorCache
+from mtuq.util.signal import get_distance_in_deg, resample
 from mtuq.util import unzip
 from mtuq.util.syngine import download_unzip_mt_response, download_force_response,\
      resolve_model,\
@@ -41,7 +41,7 @@ class Client(ClientBase):
     """
 
     def __init__(self, path_or_url=None, model=None,
-                 include_mt=True, include_force=False):
+                 include_mt=True, include_force=False, cache_size=0):
 
         if not path_or_url:
             path_or_url = 'http://service.iris.edu/irisws/syngine/1'
@@ -54,8 +54,12 @@ class Client(ClientBase):
         self.include_mt = include_mt
         self.include_force = include_force
 
+        # resampled Green's tensors kept in memory between calls
+        self.cache = GreensTensorCache(cache_size) if cache_size else None
 
-    def get_greens_tensors(self, stations=[], origins=[], verbose=False):
+
+    def get_greens_tensors(self, stations=[], origins=[], verbose=False,
+        **kwargs):
         """ Downloads Green's tensors
 
         Returns a ``GreensTensorList`` in which each element corresponds to a
@@ -70,7 +74,8 @@ class Client(ClientBase):
         ``verbose`` (`bool`)
 
         """
-        return super(Client, self).get_greens_tensors(stations, origins, verbose)
+        return super(Client, self).get_greens_tensors(
+            stations, origins, verbose, **kwargs)
 
 
     def _get_greens_tensor(self, station=None, origin=None):
@@ -112,17 +117,17 @@ class Client(ClientBase):
         t2_old = float(stream[0].stats.endtime)
         dt_old = float(stream[0].stats.delta)
 
-        for trace in stream:
-            trace.stats._component = trace.stats.channel[0]
+        # resample all Green's functions at once
+        data_old = np.array([trace.data for trace in stream])
+        data_new = resample(data_old, t1_old, t2_old, dt_old,
+                                      t1_new, t2_new, dt_new)
 
-            # resample Green's functions
-            data_old = trace.data
-            data_new = resample(data_old, t1_old, t2_old, dt_old,
-                                          t1_new, t2_new, dt_new)
-            trace.data = data_new
+        for _i, trace in enumerate(stream):
+            trace.stats._component = trace.stats.channel[0]
+            trace.data = data_new[_i]
             trace.stats.starttime = t1_new
             trace.stats.delta = dt_new
-            trace.stats.npts = len(data_new)
+            trace.stats.npts = len(data_new[_i])
 
         tags = [
             'model:%s' % self.model,
@@ -134,6 +139,22 @@ class Client(ClientBase):
             include_mt=self.include_mt, include_force=self.include_force)
 
 
+    def _get_key(self, station=None, origin=None):
+        # moment tensor responses depend only on the syngine query parameters
+        # and on the time window they are resampled to, but force responses
+        # also depend on azimuth
+        window = (float(station.starttime), float(station.endtime),
+            float(station.delta))
+
+        if self.include_force:
+            return (station.id, station.latitude, station.longitude,
+                origin.latitude, origin.longitude, origin.depth_in_m,
+                float(origin.time)) + window
+
+        return (get_distance_in_deg(station, origin),
+            int(round(origin.depth_in_m)), float(origin.time)) + window
+
+
 
 def download_greens_tensors(stations=[], origins=[], model='', verbose=False, **kwargs):
     """ Downloads Green's tensors from syngine
@@ -1,4 +1,4 @@
 
-from mtuq.misfit.waveform import Misfit
+from mtuq.misfit.waveform import Misfit, CorrelationCache
 
 from mtuq.misfit.polarity import PolarityMisfit
@@ -3,9 +3,10 @@ import numpy as np
 
 from copy import deepcopy
 from mtuq.misfit.waveform import level0, level1, level2
+from mtuq.misfit.waveform._cache import CorrelationCache
 from mtuq.misfit.waveform._stats import estimate_sigma, calculate_norm_data
 from mtuq.util import Null, iterable, warn
-from mtuq.util.math import isclose, list_intersect_with_indices
+from mtuq.util.math import isclose, list_intersect_with_indices, to_Mw
 from mtuq.util.signal import check_padding, get_components, isempty
 
 
@@ -41,10 +42,11 @@ class Misfit(object):
     - ``'L2'``: conventional L2 norm (fast)
     ..  r1**2 + r1**2 + ...
 
-    - ``'L1'``: conventional L1 norm (slow)
+    - ``'L1'``: conventional L1 norm (slower than L2, since residuals must
+      be summed sample by sample rather than evaluated from correlations)
     ..  \|r1\| + \|r2\| + ...
 
-    - ``'hybrid'``: hybrid L1-L2 norm (much faster than L1 but still robust)
+    - ``'hybrid'``: hybrid L1-L2 norm (faster than L1 but still robust)
     ..  (r11**2 + r12**2 + ...)**0.5 + (r21**2 + r22**2 + ...)**0.5 + ...
 
 
@@ -65,6 +67,25 @@ class Misfit(object):
     ``optimization_level`` (`int`): optimization level 
     (see further details below)
 
+    ``num_threads`` (`int`): number of OpenMP threads used by the C extension
+    module (``optimization_level=2`` only). If `None`, the OpenMP default 
+    is used, which can be controlled through the `OMP_NUM_THREADS` 
+    environment variable
+
+    ``cache`` (`CorrelationCache`): optional cache of data and Green's function
+    cross-correlations (``optimization_level=2`` only), which allows repeated
+    misfit evaluations on the same data and Green's functions to skip the
+    cross-correlation step (see ``mtuq.misfit.waveform._cache``)
+
+    ``chunk_size`` (`int`): number of sources passed to the C extension 
+    module at a time (``optimization_level=2`` only). Because sources are
+    converted to NumPy arrays one block at a time, memory usage stays bounded
+    even for very large grids
+
+    ``optimize_magnitude`` (`bool`): whether to minimize misfit over the
+    magnitude of each source (``norm='L2'`` and ``optimization_level=2``
+    only; see below)
+
 
     .. note:: 
 
@@ -72,6 +93,33 @@ class Misfit(object):
       early and need to be shifted forward in time to match the observed data.
 
 
+    .. rubric:: Magnitude optimization
+
+    For the L2 norm, misfit is a quadratic function of the scale of the 
+    source, so that, for a given mechanism, the best-fitting magnitude can be
+    found in closed form from the same cross-correlations used to evaluate 
+    misfit.
+
+    With ``optimize_magnitude=True``, the misfit value returned for each
+    source is the minimum over all magnitudes of the given mechanism, so that
+    magnitudes no longer need to be included in the grid.  For example,
+    `DoubleCoupleGridRegular(magnitudes=[1.])` can be searched in place of a
+    grid with many magnitudes.  Misfit values and the magnitudes that attain
+    them are both returned by ``get_magnitudes``, from a single evaluation:
+
+    .. code::
+
+        misfit = Misfit(norm='L2', optimize_magnitude=True)
+        values, magnitudes = misfit.get_magnitudes(data, greens, sources)
+        Mw = magnitudes[values.argmin()]
+
+    For grid searches over several origins, ``get_magnitudes`` can then be
+    called with the Green's functions of the best-fitting origin only.
+
+    Because time shifts maximize cross-correlation regardless of the scale of
+    the source, they too are unaffected by magnitude optimization.
+
+
     .. rubric:: Optimization Levels
 
     Because misfit evaluation is our most computationally expensive task, we 
@@ -101,6 +149,11 @@ class Misfit(object):
       implementation requires that all ObsPy traces have the same time
       discretization.
 
+      Optionally, sources can be divided among ``num_threads`` OpenMP 
+      threads, all of which share the same cross-correlation arrays.  On
+      many-core nodes, this can replace running one MPI process per core,
+      each with its own copy of the data and Green's functions.
+
 
     .. note:: 
 
@@ -117,6 +170,10 @@ class Misfit(object):
         time_shift_min=0.,
         time_shift_max=0.,
         optimization_level=2,
+        num_threads=1,
+        cache=None,
+        chunk_size=1000000,
+        optimize_magnitude=False,
         ):
         """ Function handle constructor
         """
@@ -130,12 +187,6 @@ class Misfit(object):
         assert time_shift_max >= 0.,\
             ValueError("Bad input argument: time_shift_max")
 
-        if norm=='L1':
-            warn(
-                "Consider using norm='hybrid', which is much faster than "
-                "norm='L1' but still robust against outliers."
-                )
-
         if type(time_shift_groups) not in (list, tuple):
             raise TypeError
 
@@ -146,11 +197,23 @@ class Misfit(object):
 
         assert optimization_level in [0,1,2]
 
+        if num_threads is not None:
+            assert int(num_threads) >= 1,\
+                ValueError("Bad input argument: num_threads")
+
+        if optimize_magnitude:
+            assert norm=='L2',\
+                ValueError("Magnitude optimization requires norm='L2'")
+
         self.norm = norm
         self.time_shift_min = time_shift_min
         self.time_shift_max = time_shift_max
         self.time_shift_groups = time_shift_groups
         self.optimization_level = optimization_level
+        self.num_threads = num_threads
+        self.cache = cache
+        self.chunk_size = chunk_size
+        self.optimize_magnitude = optimize_magnitude
 
 
     def __call__(self, data, greens, sources, progress_handle=Null(), 
@@ -183,6 +246,16 @@ class Misfit(object):
         check_padding(greens, self.time_shift_min, self.time_shift_max)
 
  
+        if self.optimize_magnitude and set_attributes:
+            # attributes would correspond to the magnitude of the given
+            # sources, not the magnitude that attains the returned misfit
+            raise NotImplementedError(
+                "Magnitude optimization does not support set_attributes")
+
+        if self.optimize_magnitude and optimization_level!=2:
+            raise NotImplementedError(
+                "Magnitude optimization requires optimization_level=2")
+
         if optimization_level==0 or set_attributes:
             return level0.misfit(
                 data, greens, sources, self.norm, self.time_shift_groups, 
@@ -195,9 +268,99 @@ class Misfit(object):
                 self.time_shift_min, self.time_shift_max, progress_handle)
 
         if optimization_level==2:
-            return level2.misfit(
+            results = level2.misfit(
                 data, greens, sources, self.norm, self.time_shift_groups,
-                self.time_shift_min, self.time_shift_max, progress_handle)
+                self.time_shift_min, self.time_shift_max, progress_handle,
+                num_threads=self.num_threads, cache=self.cache,
+                chunk_size=self.chunk_size,
+                optimize_magnitude=self.optimize_magnitude)
+
+            # magnitudes are returned by `get_magnitudes`
+            return results[:, :1]
+
+
+    def get_magnitudes(self, data, greens, sources, progress_handle=Null()):
+        """ Returns misfit values and magnitudes that minimize misfit on
+        given data
+
+        For each source, returns the minimum misfit over all sources with the
+        same mechanism, the same values returned by ``__call__``, and the
+        moment magnitude (for moment tensors) or the force magnitude `F0`
+        (for forces) that attains it, both from a single evaluation
+        (``optimize_magnitude=True`` only)
+        """
+        assert self.optimize_magnitude,\
+            ValueError("Requires optimize_magnitude=True")
+
+        sources = iterable(sources)
+
+        if isempty(data):
+            warn("Empty data set. No misfit evaluations will be carried out")
+            return np.zeros((len(sources), 1)), np.zeros(len(sources))
+
+        if len(data) != len(greens):
+            raise Exception("Inconsistent container lengths\n\n  "+
+                "len(data): %d\n  len(greens): %d\n" %
+                (len(data), len(greens)))
+
+        check_padding(greens, self.time_shift_min, self.time_shift_max)
+
+        results = level2.misfit(
+            data, greens, sources, self.norm, self.time_shift_groups,
+            self.time_shift_min, self.time_shift_max, progress_handle,
+            num_threads=self.num_threads, cache=self.cache,
+            chunk_size=self.chunk_size, optimize_magnitude=True)
+
+        # sources for which misfit cannot be reduced by any positive
+        # magnitude are assigned zero moment, i.e. `Mw=-inf`
+        if 'rho' in sources.dims:
+            with np.errstate(divide='ignore'):
+                return results[:, :1], to_Mw(results[:, 1])
+        else:
+            return results[:, :1], results[:, 1]
+
+
+    def get_function(self, data, greens, dims):
+        """ Returns a function that evaluates misfit on given data at NumPy
+        arrays of grid points
+
+        .. rubric:: Usage
+
+        .. code::
+
+            function = misfit.get_function(data, greens, sources.dims)
+            values = function(sources.to_array())
+
+        Cross-correlations of data and Green's functions are computed once,
+        when ``get_function`` is called, and are then reused for each call
+        of the returned function, which makes it suitable for local
+        optimizers or samplers that evaluate one or a few sources at a time.
+
+        ``dims`` (`tuple`): grid dimensions, either
+        `('rho', 'v', 'w', 'kappa', 'sigma', 'h')` or `('F0', 'phi', 'h')`
+        (in any order)
+
+        .. note::
+
+          Regardless of ``optimization_level``, the fast Python/C version
+          is used.
+
+        """
+        if isempty(data):
+            raise Exception("Empty data set")
+
+        if len(data) != len(greens):
+            raise Exception("Inconsistent container lengths\n\n  "+
+                "len(data): %d\n  len(greens): %d\n" %
+                (len(data), len(greens)))
+
+        check_padding(greens, self.time_shift_min, self.time_shift_max)
+
+        return level2.get_function(
+            data, greens, dims, self.norm, self.time_shift_groups,
+            self.time_shift_min, self.time_shift_max,
+            num_threads=self.num_threads, cache=self.cache,
+            optimize_magnitude=self.optimize_magnitude)
 
 
     def collect_attributes(self, data, greens, source):
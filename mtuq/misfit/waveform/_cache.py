@@ -0,0 +1,289 @@
+
+import h5py
+import hashlib
+import numpy as np
+import os
+import time
+
+from collections import OrderedDict
+from os import getpid, makedirs, replace
+from os.path import exists, getmtime, join
+from shutil import rmtree
+from uuid import uuid4
+
+
+class CorrelationCache(object):
+    """ Cache of cross-correlation arrays used by the fast Python/C misfit
+    function
+
+    .. rubric:: Usage
+
+    .. code::
+
+        cache = CorrelationCache(maxsize=8, path='correlations/')
+        misfit = Misfit(norm='L2', cache=cache)
+
+    The auto- and cross-correlations of data and Green's functions
+    (``data_data``, ``greens_greens``, ``greens_data``) depend only on the
+    numeric trace data and on the time-shift padding, not on the sources or
+    the type of norm.  Repeated misfit evaluations, such as reruns with a
+    refined source grid, can therefore reuse them.
+
+    Entries are keyed on a hash of the numeric data and Green's function
+    arrays plus the padding lengths.  In memory, at most ``maxsize`` entries
+    are kept, with the least recently used entries evicted first.
+
+    If a ``path`` is given, entries are also written to and read from disk
+    in NumPy ``.npz`` (``format='npz'``) or HDF5 (``format='hdf5'``) format,
+    so that they persist between sessions.
+
+
+    .. rubric:: Sharing between processes
+
+    With ``format='npy'``, each entry is written as a directory of ``.npy``
+    files, which are then memory-mapped read-only rather than loaded.  All
+    processes using the same ``path`` on a node then share one copy of the
+    arrays through the operating system's page cache.  Choosing a
+    memory-backed ``path``, such as a subdirectory of ``/dev/shm``, gives
+    the effect of a per-node shared memory block:
+
+    .. code::
+
+        cache = CorrelationCache(path='/dev/shm/mtuq', format='npy')
+
+    Whenever a ``path`` is given, the first process to miss on an entry
+    claims it with a lock file, and other processes wait for the entry to
+    be written rather than computing it themselves.  A process that misses
+    must therefore follow up with ``put``, or with ``release`` if the entry
+    could not be computed:
+
+    .. code::
+
+        value = cache.get(key)
+        if value is None:
+            try:
+                value = compute()
+                cache.put(key, value)
+            finally:
+                cache.release(key)
+
+    """
+    def __init__(self, maxsize=8, path=None, format='npz'):
+        assert maxsize >= 0,\
+            ValueError("Bad input argument: maxsize")
+
+        if format.lower() in ['h5', 'hdf', 'hdf5']:
+            format = 'hdf5'
+        assert format in ['npz', 'npy', 'hdf5'],\
+            ValueError("Bad input argument: format")
+
+        if path and not exists(path):
+            makedirs(path)
+
+        self.maxsize = maxsize
+        self.path = path
+        self.format = format
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+
+
+    def get(self, key):
+        """ Returns cached `(data_data, greens_greens, greens_data)` tuple or
+        `None` if not found
+
+        If a `path` was given and `None` is returned, the calling process
+        holds a claim on the entry until it calls ``put`` or ``release``
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        if self.path and self._wait(key):
+            value = self._read(key)
+            self._insert(key, value)
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        return None
+
+
+    def put(self, key, value):
+        """ Adds `(data_data, greens_greens, greens_data)` tuple to cache
+        """
+        value = tuple(value)
+
+        # cached arrays are shared between misfit evaluations, so guard
+        # against accidental modification
+        for array in value:
+            array.setflags(write=False)
+
+        if self.path and not exists(self._filename(key)):
+            self._write(key, value)
+
+        if self.path and self.format=='npy':
+            # replace private arrays with shared, memory-mapped ones
+            value = self._read(key)
+
+        self.release(key)
+        self._insert(key, value)
+
+
+    def release(self, key):
+        """ Gives up the claim on an entry obtained from ``get``, so that
+        other processes stop waiting for it (has no effect if there is no
+        claim)
+        """
+        if self.path:
+            try:
+                os.remove(self._filename(key)+'.lock')
+            except FileNotFoundError:
+                pass
+
+
+    def clear(self):
+        """ Removes all in-memory entries (files on disk are kept)
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+    @staticmethod
+    def get_key(data, greens, padding):
+        """ Returns hash of numeric data and Green's function arrays and
+        padding lengths
+        """
+        hasher = hashlib.blake2b(digest_size=20)
+        for array in (data, greens):
+            array = np.ascontiguousarray(array)
+            hasher.update(str((array.shape, array.dtype.str)).encode())
+            hasher.update(array.data)
+        hasher.update(str(tuple(padding)).encode())
+        return hasher.hexdigest()
+
+
+    def _insert(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+    def _filename(self, key):
+        if self.format=='npz':
+            return join(self.path, key+'.npz')
+        elif self.format=='npy':
+            return join(self.path, key)
+        else:
+            return join(self.path, key+'.h5')
+
+
+    def _wait(self, key):
+        # returns True once the entry exists on disk, or False if the calling
+        # process should compute it instead
+        filename = self._filename(key)
+        while not exists(filename):
+            try:
+                # claims the entry, unless another process already has
+                fd = os.open(filename+'.lock',
+                    os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.close(fd)
+                return False
+            except FileExistsError:
+                pass
+
+            try:
+                if time.time() - getmtime(filename+'.lock') > _TIMEOUT:
+                    # lock left behind by a process that never finished is
+                    # removed, after which the entry is claimed as above
+                    _remove_stale(filename+'.lock')
+                    continue
+            except FileNotFoundError:
+                continue
+
+            time.sleep(_INTERVAL)
+        return True
+
+
+    def _read(self, key):
+        if self.format=='npz':
+            with np.load(self._filename(key)) as file:
+                value = tuple(file[name] for name in _NAMES)
+        elif self.format=='npy':
+            value = tuple(np.load(join(self._filename(key), name+'.npy'),
+                mmap_mode='r') for name in _NAMES)
+        else:
+            with h5py.File(self._filename(key), 'r') as file:
+                value = tuple(file[name][()] for name in _NAMES)
+
+        for array in value:
+            array.setflags(write=False)
+        return value
+
+
+    def _write(self, key, value):
+        # write to a temporary file first, so that other processes sharing
+        # the same path never see a partially written file
+        filename = self._filename(key)
+        tmpname = '%s.%d.tmp' % (filename, getpid())
+
+        if self.format=='npz':
+            with open(tmpname, 'wb') as file:
+                np.savez(file, **dict(zip(_NAMES, value)))
+        elif self.format=='npy':
+            makedirs(tmpname)
+            for name, array in zip(_NAMES, value):
+                np.save(join(tmpname, name+'.npy'), array)
+        else:
+            with h5py.File(tmpname, 'w') as file:
+                for name, array in zip(_NAMES, value):
+                    file.create_dataset(name, data=array)
+
+        try:
+            replace(tmpname, filename)
+        except OSError:
+            # another process already wrote the same entry
+            if self.format=='npy':
+                rmtree(tmpname)
+            else:
+                raise
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+    def __repr__(self):
+        return ('CorrelationCache(entries=%d, maxsize=%d, hits=%d, misses=%d)'
+            % (len(self), self.maxsize, self.hits, self.misses))
+
+
+_NAMES = ('data_data', 'greens_greens', 'greens_data')
+
+
+# seconds between checks for entries being computed by another process, and
+# seconds after which the lock of an unfinished entry is taken over
+_INTERVAL = 0.1
+_TIMEOUT = 3600.
+
+
+def _remove_stale(lockname):
+    # renaming is atomic, so that if several processes find the same stale
+    # lock, only one of them removes it
+    stale = '%s.%s.stale' % (lockname, uuid4().hex)
+    os.rename(lockname, stale)
+
+    if time.time() - getmtime(stale) <= _TIMEOUT:
+        # another process replaced the stale lock in the meantime, so its
+        # claim is restored (unless yet another claim already exists)
+        try:
+            os.link(stale, lockname)
+        except FileExistsError:
+            pass
+
+    os.remove(stale)
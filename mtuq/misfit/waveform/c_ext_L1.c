@@ -0,0 +1,388 @@
+
+#include <Python.h>
+#include <numpy/arrayobject.h>
+#include <numpy/npy_math.h>
+#include <math.h>
+#include <limits.h>
+
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
+
+//
+// array access macros
+//
+#define data(i0,i1,i2)\
+    (*(npy_float64*)((PyArray_DATA(data)+\
+    (i0) * PyArray_STRIDES(data)[0]+\
+    (i1) * PyArray_STRIDES(data)[1]+\
+    (i2) * PyArray_STRIDES(data)[2])))
+
+#define greens(i0,i1,i2,i3)\
+    (*(npy_float64*)((PyArray_DATA(greens)+\
+    (i0) * PyArray_STRIDES(greens)[0]+\
+    (i1) * PyArray_STRIDES(greens)[1]+\
+    (i2) * PyArray_STRIDES(greens)[2]+\
+    (i3) * PyArray_STRIDES(greens)[3])))
+
+#define greens_data(i0,i1,i2,i3)\
+    (*(npy_float64*)((PyArray_DATA(greens_data)+\
+    (i0) * PyArray_STRIDES(greens_data)[0]+\
+    (i1) * PyArray_STRIDES(greens_data)[1]+\
+    (i2) * PyArray_STRIDES(greens_data)[2]+\
+    (i3) * PyArray_STRIDES(greens_data)[3])))
+
+#define sources(i0,i1)\
+    (*(npy_float64*)((PyArray_DATA(sources)+\
+    (i0) * PyArray_STRIDES(sources)[0]+\
+    (i1) * PyArray_STRIDES(sources)[1])))
+
+#define groups(i0,i1)\
+    (*(npy_float64*)((PyArray_DATA(groups)+\
+    (i0) * PyArray_STRIDES(groups)[0]+\
+    (i1) * PyArray_STRIDES(groups)[1])))
+
+#define weights(i0,i1)\
+    (*(npy_float64*)((PyArray_DATA(weights)+\
+    (i0) * PyArray_STRIDES(weights)[0]+\
+    (i1) * PyArray_STRIDES(weights)[1])))
+
+#define results(i0)\
+    (*(npy_float64*)((PyArray_DATA(results)+\
+    (i0) * PyArray_STRIDES(results)[0])))
+
+
+
+//
+//
+// L1 misfit function
+//
+//
+
+static PyObject *misfit(PyObject *self, PyObject *args) {
+
+  // data and Green's function input arrays
+  PyArrayObject *data, *greens;
+
+  // cross-correlation input arrays
+  PyArrayObject *greens_data;
+
+  // other input arrays
+  PyArrayObject *sources, *groups, *weights;
+
+  // scalar input arguments
+  npy_float64 dt;
+  int NPAD1, NPAD2;
+  int debug_level;
+  int msg_start, msg_stop, msg_percent;
+  int num_threads;
+
+  int NSRC, NSTA, NC, NG, NGRP, NT;
+  int isrc, NPAD;
+
+  long iter, next_iter;
+  int msg_count, msg_interval;
+  int failed;
+
+
+  // parse arguments
+  if (!PyArg_ParseTuple(args, "O!O!O!O!O!O!diiiiiii",
+                        &PyArray_Type, &data,
+                        &PyArray_Type, &greens,
+                        &PyArray_Type, &greens_data,
+                        &PyArray_Type, &sources,
+                        &PyArray_Type, &groups,
+                        &PyArray_Type, &weights,
+                        &dt,
+                        &NPAD1,
+                        &NPAD2,
+                        &debug_level,
+                        &msg_start,
+                        &msg_stop,
+                        &msg_percent,
+                        &num_threads)) {
+    return NULL;
+  }
+
+
+  NSRC = (int) PyArray_SHAPE(sources)[0];
+  NSTA = (int) PyArray_SHAPE(weights)[0];
+  NC = (int) PyArray_SHAPE(weights)[1];
+  NG = (int) PyArray_SHAPE(sources)[1];
+  NGRP = (int) PyArray_SHAPE(groups)[0];
+  NT = (int) PyArray_SHAPE(data)[2];
+
+  NPAD = (int) NPAD1+NPAD2+1;
+
+#ifdef _OPENMP
+  if (num_threads < 1) {
+    num_threads = omp_get_max_threads();
+  }
+#else
+  num_threads = 1;
+#endif
+
+  if (debug_level>1) {
+    printf(" number of sources:  %d\n", NSRC);
+    printf(" number of stations:  %d\n", NSTA);
+    printf(" number of components:  %d\n", NC);
+    printf(" number of Green's functions:  %d\n\n", NG);
+    printf(" number of component groups:  %d\n", NGRP);
+    printf(" number of samples:  %d\n", NT);
+    printf(" number of threads:  %d\n", num_threads);
+  }
+
+
+  // allocate arrays
+  npy_intp dims_results[] = {(int)NSRC, 1};
+  PyObject *results = PyArray_SimpleNew(2, dims_results, NPY_DOUBLE);
+  if (results == NULL) {
+    return NULL;
+  }
+
+
+  // initialize progress messages
+  if (msg_percent > 0) {
+    msg_interval = msg_percent/100.*msg_stop;
+    if (msg_interval > 0) {
+      // skip messages already displayed by previous calls, which is
+      // necessary when sources are passed in one block at a time
+      msg_count = (msg_start + msg_interval - 1)/msg_interval;
+    }
+    else {
+      msg_count = 100./msg_percent*msg_start/msg_stop;
+    }
+    iter = (long) msg_start;
+    next_iter = (long) msg_count*msg_interval;
+
+  }
+  else {
+    msg_interval = 0;
+    msg_count = 0;
+    iter = 0;
+    next_iter = LONG_MAX;
+  }
+
+  failed = 0;
+
+  //
+  // Iterate over sources
+  //
+  // As in the L2 extension, sources are divided among OpenMP threads, all of
+  // which read from the same input arrays.  Unlike the L2 norm, the L1 norm
+  // cannot be expressed in terms of cross-correlations alone, so each thread
+  // generates shifted synthetics in its own buffer.
+  //
+
+  Py_BEGIN_ALLOW_THREADS
+
+#ifdef _OPENMP
+  #pragma omp parallel num_threads(num_threads)
+#endif
+  {
+
+  int ista, ic, ig, igrp;
+  int cc_argmax, it, itpad;
+  npy_float64 cc_max, L1_sum, L1_tmp, weight;
+  long my_iter, my_next_iter;
+
+  // thread-private cross-correlation and synthetics buffers
+  npy_float64 *cc = (npy_float64 *) malloc(NPAD*sizeof(npy_float64));
+  npy_float64 *syn = (npy_float64 *) malloc(NT*sizeof(npy_float64));
+
+  if (cc == NULL || syn == NULL) {
+#ifdef _OPENMP
+    #pragma omp atomic write
+#endif
+    failed = 1;
+  }
+
+#ifdef _OPENMP
+  #pragma omp for schedule(static)
+#endif
+  for(isrc=0; isrc<NSRC; ++isrc) {
+
+    if (cc == NULL || syn == NULL) {
+      continue;
+    }
+
+    // display progress message
+#ifdef _OPENMP
+    #pragma omp atomic capture
+#endif
+    my_iter = iter++;
+
+#ifdef _OPENMP
+    #pragma omp atomic read
+#endif
+    my_next_iter = next_iter;
+
+    if (my_iter >= my_next_iter) {
+#ifdef _OPENMP
+      #pragma omp critical (progress)
+#endif
+      {
+        // another thread may have printed the message in the meantime
+        if (my_iter >= next_iter) {
+          printf("  about %d percent finished\n", msg_percent*msg_count);
+          fflush(stdout);
+          msg_count += 1;
+#ifdef _OPENMP
+          #pragma omp atomic write
+#endif
+          next_iter = (long) msg_count*msg_interval;
+        }
+      }
+    }
+
+
+    L1_sum = (npy_float64) 0.;
+
+    for (ista=0; ista<NSTA; ista++) {
+      for (igrp=0; igrp<NGRP; igrp++) {
+
+        /*
+
+        Finds the shift between data and synthetics that yields the maximum
+        cross-correlation value across all components in the given component 
+        group, subject to the (time_shift_min, time_shift_max) constraint
+
+        */
+
+        for (it=0; it<NPAD; it++) {
+          cc[it] = (npy_float64) 0.;
+        }
+
+        for (ic=0; ic<NC; ic++) {
+
+          // Skip components not in the component group being considered
+          if (((int) groups(igrp,ic))==0) {
+            continue;
+           }
+
+          // Skip traces that have been assigned zero weight
+          if (((int) weights(ista,ic))==0) {
+              if (debug_level>1) {
+                if (isrc==0) {
+                  printf(" skipping trace: %d %d\n", ista, ic);
+                }
+              }
+              continue;
+           }
+
+          // Sum cross-correlations of all components being considered
+          for (ig=0; ig<NG; ig++) {
+            for (it=0; it<NPAD; it++) {
+                cc[it] += greens_data(ista,ic,ig,it) * sources(isrc,ig);
+            }
+          }
+        }
+        cc_max = -NPY_INFINITY;
+        cc_argmax = 0;
+        for (it=0; it<NPAD; it++) {
+          if (cc[it] > cc_max) {
+            cc_max = cc[it];
+            cc_argmax= it;
+          }
+        }
+        itpad = cc_argmax;
+
+
+        /*
+
+        Calculates L1 norm of difference between data and synthetics
+        for all components in the given component group
+
+        Synthetics are generated directly from the Green's functions,
+        starting from the sample corresponding to the chosen time shift
+
+        */
+        for (ic=0; ic<NC; ic++) {
+
+          // Skip components not in the component group being considered
+          if (((int) groups(igrp,ic))==0) {
+            continue;
+          } 
+
+          // Skip traces that have been assigned zero weight
+          if (((int) weights(ista,ic))==0) {
+              continue;
+          }
+
+          // generate shifted synthetics
+          for (it=0; it<NT; it++) {
+            syn[it] = (npy_float64) 0.;
+          }
+          for (ig=0; ig<NG; ig++) {
+            weight = sources(isrc,ig);
+            for (it=0; it<NT; it++) {
+              syn[it] += weight * greens(ista,ic,ig,itpad+it);
+            }
+          }
+
+          // sum absolute residuals
+          L1_tmp = 0.;
+          for (it=0; it<NT; it++) {
+            L1_tmp += fabs(syn[it] - data(ista,ic,it));
+          }
+
+          L1_sum += dt * weights(ista,ic) * L1_tmp;
+        }
+
+      }
+    }
+    results(isrc) = L1_sum;
+
+  }
+
+  free(cc);
+  free(syn);
+
+  }
+
+  Py_END_ALLOW_THREADS
+
+  if (failed) {
+    Py_DECREF(results);
+    return PyErr_NoMemory();
+  }
+
+  return results;
+
+}
+
+
+//
+// Boilerplate 
+//
+
+static PyMethodDef methods[] = {
+    { "misfit", misfit, METH_VARARGS, "Misfit function (fast C implementation)."},
+    { NULL, NULL, 0, NULL }
+  };
+
+
+#if PY_MAJOR_VERSION >= 3
+static struct PyModuleDef misfit_module = {
+  PyModuleDef_HEAD_INIT,
+  "c_ext_L1",
+  "Misfit function (fast C implementation)",
+  -1,                  /* m_size */
+  methods,             /* m_methods */
+  };
+#endif
+
+
+#if PY_MAJOR_VERSION >= 3
+PyMODINIT_FUNC PyInit_c_ext_L1(void) {
+  Py_Initialize();
+  import_array();
+  return PyModule_Create(&misfit_module);
+  }
+#else
+PyMODINIT_FUNC initc_ext_L1(void) {
+  (void) Py_InitModule("c_ext_L1", methods);
+  import_array();
+  }
+#endif
@@ -3,6 +3,11 @@
 #include <numpy/arrayobject.h>
 #include <numpy/npy_math.h>
 #include <math.h>
+#include <limits.h>
+
+#ifdef _OPENMP
+#include <omp.h>
+#endif
 
 
 //
@@ -43,13 +48,10 @@
     (i0) * PyArray_STRIDES(weights)[0]+\
     (i1) * PyArray_STRIDES(weights)[1])))
 
-#define results(i0)\
+#define results(i0,i1)\
     (*(npy_float64*)((PyArray_DATA(results)+\
-    (i0) * PyArray_STRIDES(results)[0])))
-
-#define cc(i0)\
-    (*(npy_float64*)((PyArray_DATA(cc)+\
-    (i0) * PyArray_STRIDES(cc)[0])))
+    (i0) * PyArray_STRIDES(results)[0]+\
+    (i1) * PyArray_STRIDES(results)[1])))
 
 
 
@@ -69,23 +71,23 @@ static PyObject *misfit(PyObject *self, PyObject *args) {
 
   // scalar input arguments
   int hybrid_norm;
+  int optimize_magnitude;
   npy_float64 dt;
   int NPAD1, NPAD2;
   int debug_level;
   int msg_start, msg_stop, msg_percent;
+  int num_threads;
 
   int NSRC, NSTA, NC, NG, NGRP;
-  int isrc, ista, ic, ig, igrp;
+  int isrc, NPAD;
 
-  int cc_argmax, it, itpad, j1, j2, nd, NPAD;
-  npy_float64 cc_max, L2_sum, L2_tmp;
-
-  float iter, next_iter;
+  long iter, next_iter;
   int msg_count, msg_interval;
+  int failed;
 
 
   // parse arguments
-  if (!PyArg_ParseTuple(args, "O!O!O!O!O!O!idiiiiii",
+  if (!PyArg_ParseTuple(args, "O!O!O!O!O!O!iidiiiiiii",
                         &PyArray_Type, &data_data,
                         &PyArray_Type, &greens_data,
                         &PyArray_Type, &greens_greens,
@@ -93,13 +95,15 @@ static PyObject *misfit(PyObject *self, PyObject *args) {
                         &PyArray_Type, &groups,
                         &PyArray_Type, &weights,
                         &hybrid_norm,
+                        &optimize_magnitude,
                         &dt,
                         &NPAD1,
                         &NPAD2,
                         &debug_level,
                         &msg_start,
                         &msg_stop,
-                        &msg_percent)) {
+                        &msg_percent,
+                        &num_threads)) {
     return NULL;
   }
 
@@ -112,55 +116,133 @@ static PyObject *misfit(PyObject *self, PyObject *args) {
 
   NPAD = (int) NPAD1+NPAD2+1;
 
+#ifdef _OPENMP
+  if (num_threads < 1) {
+    num_threads = omp_get_max_threads();
+  }
+#else
+  num_threads = 1;
+#endif
+
   if (debug_level>1) {
     printf(" number of sources:  %d\n", NSRC);
     printf(" number of stations:  %d\n", NSTA);
     printf(" number of components:  %d\n", NC);
     printf(" number of Green's functions:  %d\n\n", NG);
     printf(" number of component groups:  %d\n", NGRP);
+    printf(" number of threads:  %d\n", num_threads);
   }
 
 
-  // allocate arrays
-  nd = 1;
-  npy_intp dims_cc[] = {(int)NPAD};
-  PyObject *cc = PyArray_SimpleNew(nd, dims_cc, NPY_DOUBLE);
-
-  nd = 2;
-  npy_intp dims_results[] = {(int)NSRC, 1};
-  PyObject *results = PyArray_SimpleNew(nd, dims_results, NPY_DOUBLE);
+  // allocate arrays (if magnitude is optimized, the second column holds
+  // the factor by which sources must be scaled to attain the minimum misfit)
+  npy_intp dims_results[] = {(int)NSRC, optimize_magnitude ? 2 : 1};
+  PyObject *results = PyArray_SimpleNew(2, dims_results, NPY_DOUBLE);
+  if (results == NULL) {
+    return NULL;
+  }
 
 
   // initialize progress messages
   if (msg_percent > 0) {
     msg_interval = msg_percent/100.*msg_stop;
-    msg_count = 100./msg_percent*msg_start/msg_stop;
-    iter = (float) msg_start;
-    next_iter = (float) msg_count*msg_interval;
+    if (msg_interval > 0) {
+      // skip messages already displayed by previous calls, which is
+      // necessary when sources are passed in one block at a time
+      msg_count = (msg_start + msg_interval - 1)/msg_interval;
+    }
+    else {
+      msg_count = 100./msg_percent*msg_start/msg_stop;
+    }
+    iter = (long) msg_start;
+    next_iter = (long) msg_count*msg_interval;
 
   }
   else {
+    msg_interval = 0;
+    msg_count = 0;
     iter = 0;
-    next_iter = INFINITY;
+    next_iter = LONG_MAX;
   }
 
+  failed = 0;
+
   //
   // Iterate over sources
   //
+  // Sources are independent of one another, so if the extension was compiled
+  // with OpenMP support, they are divided among threads.  All threads read
+  // from the same cross-correlation arrays, and each thread writes to its
+  // own slice of the results array.  The GIL is released for the duration
+  // of the loop, so no Python API calls are allowed inside it.
+  //
+
+  Py_BEGIN_ALLOW_THREADS
+
+#ifdef _OPENMP
+  #pragma omp parallel num_threads(num_threads)
+#endif
+  {
+
+  int ista, ic, ig, igrp;
+  int cc_argmax, it, itpad, j1, j2;
+  npy_float64 cc_max, L2_sum, L2_tmp;
+  npy_float64 ss_tmp, sd_tmp, ss_sum, sd_sum, dd_sum, scale;
+  long my_iter, my_next_iter;
 
+  // thread-private cross-correlation buffer
+  npy_float64 *cc = (npy_float64 *) malloc(NPAD*sizeof(npy_float64));
+
+  if (cc == NULL) {
+#ifdef _OPENMP
+    #pragma omp atomic write
+#endif
+    failed = 1;
+  }
+
+#ifdef _OPENMP
+  #pragma omp for schedule(static)
+#endif
   for(isrc=0; isrc<NSRC; ++isrc) {
 
+    if (cc == NULL) {
+      continue;
+    }
 
     // display progress message
-    if (iter >= next_iter) {
-        printf("  about %d percent finished\n", msg_percent*msg_count);
-        msg_count += 1;
-        next_iter = msg_count*msg_interval;
+#ifdef _OPENMP
+    #pragma omp atomic capture
+#endif
+    my_iter = iter++;
+
+#ifdef _OPENMP
+    #pragma omp atomic read
+#endif
+    my_next_iter = next_iter;
+
+    if (my_iter >= my_next_iter) {
+#ifdef _OPENMP
+      #pragma omp critical (progress)
+#endif
+      {
+        // another thread may have printed the message in the meantime
+        if (my_iter >= next_iter) {
+          printf("  about %d percent finished\n", msg_percent*msg_count);
+          fflush(stdout);
+          msg_count += 1;
+#ifdef _OPENMP
+          #pragma omp atomic write
+#endif
+          next_iter = (long) msg_count*msg_interval;
+        }
+      }
     }
-    iter += 1;
 
 
     L2_sum = (npy_float64) 0.;
+    ss_sum = (npy_float64) 0.;
+    sd_sum = (npy_float64) 0.;
+    dd_sum = (npy_float64) 0.;
 
     for (ista=0; ista<NSTA; ista++) {
       for (igrp=0; igrp<NGRP; igrp++) {
@@ -174,7 +256,7 @@ static PyObject *misfit(PyObject *self, PyObject *args) {
         */
 
         for (it=0; it<NPAD; it++) {
-          cc(it) = (npy_float64) 0.;
+          cc[it] = (npy_float64) 0.;
         }
 
         for (ic=0; ic<NC; ic++) {
@@ -197,15 +279,15 @@ static PyObject *misfit(PyObject *self, PyObject *args) {
           // Sum cross-correlations of all components being considered
           for (ig=0; ig<NG; ig++) {
             for (it=0; it<NPAD; it++) {
-                cc(it) += greens_data(ista,ic,ig,it) * sources(isrc,ig);
+                cc[it] += greens_data(ista,ic,ig,it) * sources(isrc,ig);
             }
           }
         }
         cc_max = -NPY_INFINITY;
         cc_argmax = 0;
         for (it=0; it<NPAD; it++) {
-          if (cc(it) > cc_max) {
-            cc_max = cc(it);
+          if (cc[it] > cc_max) {
+            cc_max = cc[it];
             cc_argmax= it;
           }
         }
@@ -224,7 +306,8 @@ static PyObject *misfit(PyObject *self, PyObject *args) {
 
         */
         for (ic=0; ic<NC; ic++) {
-          L2_tmp = 0.;
+          ss_tmp = 0.;
+          sd_tmp = 0.;
 
           // Skip components not in the component group being considered
           if (((int) groups(igrp,ic))==0) {
@@ -239,20 +322,26 @@ static PyObject *misfit(PyObject *self, PyObject *args) {
           // calculate s^2
           for (j1=0; j1<NG; j1++) {
             for (j2=0; j2<NG; j2++) {
-              L2_tmp += sources(isrc, j1) * sources(isrc, j2) *
+              ss_tmp += sources(isrc, j1) * sources(isrc, j2) *
                   greens_greens(ista,ic,itpad,j1,j2);
             }
           }
 
-          // calculate d^2
-          L2_tmp += data_data(ista,ic);
-
           // calculate sd
           for (ig=0; ig<NG; ig++) {
-            L2_tmp -= 2.*greens_data(ista,ic,ig,itpad) * sources(isrc, ig); 
+            sd_tmp += greens_data(ista,ic,ig,itpad) * sources(isrc, ig); 
           }
 
-          if (hybrid_norm==0) {
+          L2_tmp = ss_tmp + data_data(ista,ic) - 2.*sd_tmp;
+
+          if (optimize_magnitude) {
+              // L2 norm, with sums kept separately so that the scaling of
+              // sources can be optimized below
+              ss_sum += weights(ista,ic) * ss_tmp;
+              sd_sum += weights(ista,ic) * sd_tmp;
+              dd_sum += weights(ista,ic) * data_data(ista,ic);
+          }
+          else if (hybrid_norm==0) {
               // L2 norm
               L2_sum += dt * weights(ista,ic) * L2_tmp;
           }
@@ -264,9 +353,44 @@ static PyObject *misfit(PyObject *self, PyObject *args) {
 
       }
     }
-    results(isrc) = L2_sum;
+
+    if (optimize_magnitude) {
+      /*
+
+      Time shifts maximize cross-correlation regardless of how sources are
+      scaled, so misfit is a quadratic function of the scale factor a
+
+      ||a s - d||^2 = a^2 s^2 + d^2 - 2a sd
+
+      which is minimized, subject to a >= 0, by a = sd/s^2
+
+      */
+      if (ss_sum > 0. && sd_sum > 0.) {
+        scale = sd_sum/ss_sum;
+      }
+      else {
+        scale = 0.;
+      }
+      results(isrc,0) = dt * (dd_sum - scale*sd_sum);
+      results(isrc,1) = scale;
+    }
+    else {
+      results(isrc,0) = L2_sum;
+    }
 
   }
+
+  free(cc);
+
+  }
+
+  Py_END_ALLOW_THREADS
+
+  if (failed) {
+    Py_DECREF(results);
+    return PyErr_NoMemory();
+  }
+
   return results;
 
 }
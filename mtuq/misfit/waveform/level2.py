@@ -7,19 +7,95 @@ See ``mtuq/misfit/waveform/__init__.py`` for more information
 import numpy as np
 import time
 from copy import deepcopy
-from mtuq.misfit.waveform.level1 import correlate
+from scipy.fft import irfft, next_fast_len, rfft
 from mtuq.util.math import to_mij, to_rtp
 from mtuq.util.signal import get_components, get_time_sampling
-from mtuq.misfit.waveform import c_ext_L2
+from mtuq.misfit.waveform import c_ext_L1, c_ext_L2
 
 
 def misfit(data, greens, sources, norm, time_shift_groups,
-    time_shift_min, time_shift_max, msg_handle, debug_level=0):
+    time_shift_min, time_shift_max, msg_handle, debug_level=0, num_threads=1,
+    cache=None, chunk_size=None, optimize_magnitude=False):
     """
     Data misfit function (fast Python/C version)
 
     See ``mtuq/misfit/waveform/__init__.py`` for more information
     """
+    arrays = _prepare(data, greens, norm, time_shift_groups,
+        time_shift_min, time_shift_max, cache, optimize_magnitude)
+
+    #
+    # collect message attributes
+    #
+    try:
+        msg_args = [getattr(msg_handle, attrib) for attrib in 
+            ['start', 'stop', 'percent']]
+    except:
+        msg_args = [0, 0, 0]
+
+    #
+    # call C extension
+    #
+
+    start_time = time.time()
+
+    # rather than converting the entire grid to a NumPy array all at once,
+    # sources are passed to the C extension one block at a time, so that
+    # memory usage does not grow with grid size
+    # if magnitude is optimized, the second column holds the magnitude
+    # parameter (`rho` or `F0`) that attains the minimum misfit
+    results = np.zeros((len(sources), 2 if optimize_magnitude else 1))
+    msg_start, msg_stop, msg_percent = msg_args
+
+    start = 0
+    for array in _to_arrays(sources, chunk_size):
+        stop = start + len(array)
+
+        if len(array) > 0:
+            _check_sources(arrays[3], array)
+
+            results[start:stop] = _call_c_ext(arrays, array, debug_level,
+                msg_start+start, msg_stop, msg_percent, num_threads)
+
+        start = stop
+
+    if debug_level > 0:
+      print('  Elapsed time (C extension) (s): %f' % \
+          (time.time() - start_time))
+
+    return results
+
+
+def get_function(data, greens, dims, norm, time_shift_groups,
+    time_shift_min, time_shift_max, num_threads=1, cache=None,
+    optimize_magnitude=False):
+    """
+    Returns a function that evaluates misfit at a NumPy array of grid points
+
+    Data and Green's functions are collapsed into arrays and cross-correlated
+    only once, when `get_function` is called, so that subsequent calls, 
+    such as those made by local optimizers, reduce to C extension calls
+
+    See ``mtuq/misfit/waveform/__init__.py`` for more information
+    """
+    arrays = _prepare(data, greens, norm, time_shift_groups,
+        time_shift_min, time_shift_max, cache, optimize_magnitude)
+
+    def function(coords):
+        # `coords` has one row per grid point and one column per dimension
+        array = _to_array(dims, np.atleast_2d(coords))
+        _check_sources(arrays[3], array)
+        return _call_c_ext(arrays, array, 0, 0, 0, 0, num_threads)
+
+    return function
+
+
+def _prepare(data, greens, norm, time_shift_groups, time_shift_min,
+    time_shift_max, cache=None, optimize_magnitude=False):
+    # collapses data and Green's functions into NumPy arrays and computes
+    # the correlations needed by the C extensions, which can then be reused
+    # for any number of sources
+
     #
     # collect metadata
     #
@@ -40,51 +116,64 @@ def misfit(data, greens, sources, norm, time_shift_groups,
     #
     data = _get_data(data, stations, components)
     greens = _get_greens(greens, stations, components)
-    sources = _to_array(sources)
 
     # sanity checks
-    _check(data, greens, sources)
+    _check(data, greens)
 
 
     #
     # cross-correlate data and synthetics
     #
     padding = _get_padding(time_shift_min, time_shift_max, dt)
-    data_data = _autocorr_1(data)
-    greens_greens = _autocorr_2(greens, padding)
-    greens_data = _corr_1_2(data, greens, padding)
+
+    if norm=='L1':
+        # the L1 norm cannot be expressed in terms of correlations, so only
+        # the cross-correlations used to determine time shifts are needed;
+        # residuals are evaluated by the C extension from the arrays
+        # themselves
+        _check_padding(data, greens, padding)
+        data = np.ascontiguousarray(data, dtype=np.float64)
+        greens = np.ascontiguousarray(greens, dtype=np.float64)
+        greens_data = _corr_1_2(data, greens, padding)
+        data_data, greens_greens = None, None
+
+    else:
+        data_data, greens_greens, greens_data = _get_correlations(
+            data, greens, padding, cache)
+
+    return (norm, optimize_magnitude, data, greens, data_data, greens_greens,
+        greens_data, groups, mask, dt, padding)
+
+
+def _call_c_ext(arrays, sources, debug_level, msg_start, msg_stop,
+    msg_percent, num_threads):
+    # evaluates misfit for a NumPy array of moment tensor or force elements
+    (norm, optimize_magnitude, data, greens, data_data, greens_greens,
+        greens_data, groups, mask, dt, padding) = arrays
 
     if norm=='hybrid':
         hybrid_norm = 1
     else:
         hybrid_norm = 0
 
-    #
-    # collect message attributes
-    #
-    try:
-        msg_args = [getattr(msg_handle, attrib) for attrib in 
-            ['start', 'stop', 'percent']]
-    except:
-        msg_args = [0, 0, 0]
-
-    #
-    # call C extension
-    #
+    # nonpositive values let OpenMP choose the number of threads
+    if num_threads is None:
+        num_threads = 0
 
-    start_time = time.time()
+    if norm=='L1':
+        return c_ext_L1.misfit(
+           data, greens, greens_data, sources, groups, mask,
+           dt, padding[0], padding[1], debug_level,
+           msg_start, msg_stop, msg_percent, int(num_threads))
 
-    if norm in ['L2', 'hybrid']:
-        results = c_ext_L2.misfit(
-           data_data, greens_data, greens_greens, sources, groups, mask,
-           hybrid_norm, dt, padding[0], padding[1], debug_level, *msg_args)
+    results = c_ext_L2.misfit(
+       data_data, greens_data, greens_greens, sources, groups, mask,
+       hybrid_norm, int(optimize_magnitude), dt, padding[0], padding[1],
+       debug_level, msg_start, msg_stop, msg_percent, int(num_threads))
 
-    elif norm in ['L1']:
-        raise NotImplementedError
-
-    if debug_level > 0:
-      print('  Elapsed time (C extension) (s): %f' % \
-          (time.time() - start_time))
+    if optimize_magnitude:
+        # converts scale factors to magnitude parameters
+        results[:, 1] *= _get_magnitudes(sources)
 
     return results
 
@@ -106,6 +195,11 @@ def _get_padding(time_shift_min, time_shift_max, dt):
 
 
 def _get_greens(greens, stations, components):
+    if _in_order(greens, stations):
+        # uses the cached array maintained by the GreensTensorList itself,
+        # avoiding per-station lookups and copies
+        return greens.as_array(components)
+
     Ncomponents = len(components)
     Nstations = len(stations)
     Npts = len(greens[0][0])
@@ -143,6 +237,11 @@ def _get_data(data, stations, components):
     #    Requires that all streams have the same time discretization
     #    (or else an error is raised)
 
+    if len(stations)==len(data):
+        # no empty streams, so the Dataset itself can collect the array,
+        # avoiding per-station lookups
+        return data.as_array(components)
+
     nt, dt = _get_time_sampling(data)
 
     ns = len(stations)
@@ -188,18 +287,34 @@ def _get_mask(data, stations, components):
         Ncomponents, 
         ))
 
-    for _i, station in enumerate(stations):
-        for _j, component in enumerate(components):
+    if len(stations)==len(data):
+        # no empty streams, so streams are already in station order
+        streams = data
+    else:
+        streams = [data.select(station)[0] for station in stations]
 
-            stream = data.select(station)[0]
-            stream = stream.select(component=component)
+    for _i, stream in enumerate(streams):
+        for _j, component in enumerate(components):
 
-            if len(stream)==0:
+            if len(stream.select(component=component))==0:
                 mask[_i, _j] = 0.
 
     return mask
 
 
+def _in_order(greens, stations):
+    # do the GreensTensors correspond one-to-one and in order with the given
+    # stations?
+    if len(greens) != len(stations):
+        return False
+
+    for tensor, station in zip(greens, stations):
+        if tensor.station != station:
+            return False
+
+    return True
+
+
 def _get_stations(data):
     stations = []
     for stream in data:
@@ -226,7 +341,7 @@ def _get_groups(groups, components):
     return array
 
 
-def _check(data, greens, sources):
+def _check(data, greens):
     # array shape sanity checks
 
     if data.shape[0] != greens.shape[0]:
@@ -243,6 +358,23 @@ def _check(data, greens, sources):
         print()
         raise TypeError('Inconsistent shape')
 
+
+def _check_padding(data, greens, padding):
+    # Green's functions must extend far enough beyond the data to allow
+    # shifted synthetics to be generated for all time shifts
+
+    if greens.shape[3] < data.shape[2] + padding[0] + padding[1]:
+        print()
+        print('Number of samples (data): %d' % data.shape[2])
+        print('Number of samples (Green''s): %d' % greens.shape[3])
+        print('Number of samples (padding): %d' % (padding[0] + padding[1]))
+        print()
+        raise TypeError('Inconsistent shape')
+
+
+def _check_sources(greens, sources):
+    # array shape sanity checks
+
     if greens.shape[2] != sources.shape[1]:
         print()
         print('Number of Green''s functions in linear combination: %d' % greens.shape[2])
@@ -250,28 +382,51 @@ def _check(data, greens, sources):
         print()
 
 
-def _to_array(sources):
+def _to_arrays(sources, chunk_size=None):
+    # iterates over blocks of grid points, yielding one NumPy array of
+    # moment tensor or force elements per block
     dims = sources.dims
-    df = sources.to_dataframe()
+
+    if not chunk_size:
+        chunk_size = max(len(sources), 1)
+
+    for coords in sources.chunks(int(chunk_size)):
+        yield _to_array(dims, coords)
+
+
+def _to_array(dims, coords):
+    # converts an array of grid points, with one column per dimension,
+    # to an array of moment tensor or force elements
+    columns = {dim: coords[:, _i] for _i, dim in enumerate(dims)}
 
     if _type(dims)=='MomentTensor':
         return np.ascontiguousarray(to_mij(
-            df['rho'].to_numpy(),
-            df['v'].to_numpy(),
-            df['w'].to_numpy(),
-            df['kappa'].to_numpy(),
-            df['sigma'].to_numpy(),
-            df['h'].to_numpy(),
+            columns['rho'],
+            columns['v'],
+            columns['w'],
+            columns['kappa'],
+            columns['sigma'],
+            columns['h'],
             ))
 
     elif _type(dims)=='Force':
         return np.ascontiguousarray(to_rtp(
-            df['F0'].to_numpy(),
-            df['phi'].to_numpy(),
-            df['h'].to_numpy(),
+            columns['F0'],
+            columns['phi'],
+            columns['h'],
             ))
 
 
+def _get_magnitudes(sources):
+    # returns `rho` or `F0` for each row of an array of moment tensor or force
+    # elements (off-diagonal moment tensor elements count twice)
+    if sources.shape[1]==6:
+        return np.sqrt(np.sum(sources[:, :3]**2, axis=1) +
+            2.*np.sum(sources[:, 3:]**2, axis=1))
+    else:
+        return np.sqrt(np.sum(sources**2, axis=1))
+
+
 def _type(dims):
     if 'rho' in dims\
        and 'v' in dims\
@@ -294,45 +449,55 @@ def _type(dims):
 # cross-correlation utilities
 #
 
+def _get_correlations(data, greens, padding, cache=None):
+    # returns auto- and cross-correlations, reusing previous results if a
+    # CorrelationCache is given
+    if cache is not None:
+        key = cache.get_key(data, greens, padding)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    try:
+        data_data = _autocorr_1(data)
+        greens_greens = _autocorr_2(greens, padding)
+        greens_data = _corr_1_2(data, greens, padding)
+
+        if cache is not None:
+            cache.put(key, (data_data, greens_greens, greens_data))
+
+    finally:
+        # after a miss, other processes sharing the cache wait until the
+        # entry is written, so the claim must be given up even on failure
+        if cache is not None:
+            cache.release(key)
+
+    return data_data, greens_greens, greens_data
+
+
 def _corr_1_2(data, greens, padding):
     # correlates 1D and 2D data structures
-    Ncomponents = greens.shape[1]
-    Nstations = greens.shape[0]
-    Ngreens = greens.shape[2]
 
-    corr = np.zeros((
-        Nstations,
-        Ncomponents,
-        Ngreens,
-        padding[0]+padding[1]+1,
-        ))
+    # rather than calling `correlate` once for each station, component and
+    # Green's function, all cross-correlations are carried out together in 
+    # the frequency domain
+    Npts = greens.shape[3]
+    nt = data.shape[2]
+    nfft = next_fast_len(Npts+nt-1)
 
-    for _i in range(Nstations):
-        for _j in range(Ncomponents):
-            for _k in range(Ngreens):
+    greens_fft = rfft(greens, nfft, axis=-1)
+    data_fft = rfft(data, nfft, axis=-1)
 
-                corr[_i, _j, _k, :] = correlate(
-                    greens[_i, _j, _k, :], data[_i, _j, :])
+    corr = irfft(
+        greens_fft*np.conj(data_fft)[:, :, np.newaxis, :], nfft, axis=-1)
 
-    return corr
+    return np.ascontiguousarray(
+        corr[:, :, :, :padding[0]+padding[1]+1])
 
 
 def _autocorr_1(data):
     # autocorrelates 1D data strucutres (reduces to dot product)
-    Ncomponents = data.shape[1]
-    Nstations = data.shape[0]
-
-    corr = np.zeros((
-        Nstations,
-        Ncomponents,
-        ))
-
-    for _i in range(Nstations):
-        for _j in range(Ncomponents):
-            corr[_i, _j] = np.dot(
-                data[_i, _j, :], data[_i, _j, :])
-
-    return corr
+    return np.einsum('ijk,ijk->ij', data, data)
 
 
 def _autocorr_2(greens, padding):
@@ -342,31 +507,40 @@ def _autocorr_2(greens, padding):
     Nstations = greens.shape[0]
     Ngreens = greens.shape[2]
     Npts = greens.shape[3]
-
-    ones = np.pad(np.ones(Npts), 
-        (padding[0], padding[1]), 'constant')
+    Npad = padding[0]+padding[1]+1
 
     corr = np.zeros((
         Nstations,
         Ncomponents, 
-        padding[0]+padding[1]+1, 
+        Npad,
         Ngreens, 
         Ngreens,
         ))
 
+    # by symmetry, only upper elements need to be calculated
+    k1, k2 = np.triu_indices(Ngreens)
+
+    # Correlating with a zero-padded array of ones reduces to summing over a 
+    # sliding window, which we evaluate from cumulative sums instead of
+    # calling `correlate`
+    it = np.arange(Npad)
+    start = np.clip(it-padding[1], 0, Npts)
+    stop = np.clip(it-padding[1]+Npts, 0, Npts)
+
     for _i in range(Nstations):
-        for _j in range(Ncomponents):
-            for _k1 in range(Ngreens):
-                for _k2 in range(Ngreens):
+        # products of all pairs of Green's functions, with shape
+        # (Ncomponents, Npairs, Npts)
+        products = greens[_i, :, k1, :]*greens[_i, :, k2, :]
+        products = np.moveaxis(products, 0, 1)
 
-                    if _k1<=_k2:
-                        corr[_i, _j, :, _k1, _k2] = correlate(
-                            greens[_i, _j, _k1, :]*greens[_i, _j, _k2, :],
-                            ones)
+        sums = np.zeros((Ncomponents, len(k1), Npts+1))
+        np.cumsum(products, axis=-1, out=sums[:, :, 1:])
 
-                    else:
-                        corr[_i, _j, :, _k1, _k2] = corr[_i, _j, :, _k2, _k1]
+        window_sums = sums[:, :, stop] - sums[:, :, start]
 
-    return corr
+        # fill in upper and lower elements
+        corr[_i, :, :, k1, k2] = np.moveaxis(window_sums, 1, 0)
+        corr[_i, :, :, k2, k1] = np.moveaxis(window_sums, 1, 0)
 
+    return corr
 
@@ -6,11 +6,15 @@ import warnings
 
 from copy import deepcopy
 from obspy import taup
+from obspy.core import Trace
 from obspy.geodetics import gps2dist_azimuth
+from obspy.signal.filter import bandpass, highpass, lowpass
+from scipy.signal import detrend
 from os.path import basename, exists
 from mtuq.util import AttribDict, warn
 from mtuq.util.cap import WeightParser, taper
 from mtuq.util.signal import cut, get_arrival, m_to_deg
+from mtuq.util.traveltimes import TravelTimeTable
 
 
 class ProcessData(object):
@@ -100,6 +104,12 @@ class ProcessData(object):
     whether or not to apply distance-dependent amplitude scaling
 
 
+    ``batch`` (`bool`)
+    whether to detrend, taper and filter all traces from a given station
+    at once, rather than one trace at a time (numeric results are identical,
+    but ObsPy processing history is not recorded in trace headers)
+
+
 
     .. rubric:: Other input arguments that may be required, depending on the above
 
@@ -122,6 +132,11 @@ class ProcessData(object):
     Name of built-in ObsPy TauP model or path to custom ObsPy TauP model,
     required for `pick_type=taup`
 
+    ``taup_table`` (`bool`)
+    Whether to interpolate P, S arrival times from a precomputed table rather
+    than calling TauP for every station and origin, optional for
+    `pick_type=taup` (see `mtuq.util.traveltimes.TravelTimeTable`)
+
     ``FK_database`` (`str`)
     Path to FK database, required for `pick_type=FK_metadata`
 
@@ -137,6 +152,7 @@ class ProcessData(object):
          window_length=None,
          padding=None,
          taup_model=None,
+         taup_table=False,
          FK_database=None,
          FK_model=None,
          apply_statics=False,
@@ -145,6 +161,7 @@ class ProcessData(object):
          scaling_power=None,
          scaling_coefficient=None,
          capuaf_file=None,
+         batch=False,
          **parameters):
 
         if not filter_type:
@@ -169,6 +186,7 @@ class ProcessData(object):
         self.window_length = window_length
         self.padding = padding
         self.taup_model = taup_model
+        self.taup_table = taup_table
         self.FK_database = FK_database
         self.FK_model = FK_model
         self.apply_weights = apply_weights
@@ -177,6 +195,7 @@ class ProcessData(object):
         self.scaling_power = scaling_power
         self.scaling_coefficient = scaling_coefficient
         self.capuaf_file = capuaf_file
+        self.batch = batch
 
 
         #
@@ -272,6 +291,8 @@ class ProcessData(object):
         elif self.pick_type == 'taup':
             assert self.taup_model is not None
             self._taup = taup.TauPyModel(self.taup_model)
+            if self.taup_table:
+                self._taup_table = TravelTimeTable(self.taup_model)
 
 
         elif self.pick_type == 'FK_metadata':
@@ -402,7 +423,10 @@ class ProcessData(object):
         # part 1: filter traces
         #
 
-        if self.filter_type == 'bandpass':
+        if self.filter_type and self.batch:
+            self._filter_batch(traces)
+
+        elif self.filter_type == 'bandpass':
             for trace in traces:
                 trace.detrend('demean')
                 trace.detrend('linear')
@@ -474,7 +498,16 @@ class ProcessData(object):
         else:
             picks = dict()
 
-            if self.pick_type=='taup':
+            if self.pick_type=='taup' and self.taup_table:
+                P, S = self._taup_table.get_arrival_times(
+                    origin.depth_in_m/1000.,
+                    m_to_deg(distance_in_m))
+                if np.isnan(P) or np.isnan(S):
+                    raise Exception("Phase not found")
+                picks['P'] = float(P)
+                picks['S'] = float(S)
+
+            elif self.pick_type=='taup':
                 with warnings.catch_warnings():
                     # supress obspy warning that gets raised even when taup is
                     # used correctly (someone should submit an obspy fix)
@@ -602,3 +635,62 @@ class ProcessData(object):
 
 
         return traces
+
+
+    def _filter_batch(self, traces):
+        """ Detrends, tapers and filters all traces with the same time 
+        sampling together, giving the same numeric results as the 
+        trace-by-trace ObsPy calls in ``__call__``
+        """
+        groups = {}
+        for trace in traces:
+            key = (trace.stats.npts, trace.stats.sampling_rate, 
+                   trace.data.dtype.str)
+            groups.setdefault(key, []).append(trace)
+
+        for (npts, df, dtype), group in groups.items():
+            data = np.array([trace.data for trace in group])
+
+            data = detrend(data, type='constant', axis=-1)
+            if dtype == np.dtype(np.float32).str:
+                # like ObsPy, keep single precision data in single precision
+                data = np.require(data, dtype=np.float32)
+
+            # least squares fits are carried out row by row, since solving
+            # for all rows together changes results by roundoff
+            data = np.array([detrend(row, type='linear') for row in data])
+            if dtype == np.dtype(np.float32).str:
+                data = np.require(data, dtype=np.float32)
+
+            data *= self._get_taper(npts, df)
+
+            # a single sosfilt call filters all traces
+            if self.filter_type == 'bandpass':
+                data = bandpass(data, df=df, zerophase=False,
+                    freqmin=self.freq_min, freqmax=self.freq_max)
+
+            elif self.filter_type == 'lowpass':
+                data = lowpass(data, df=df, zerophase=False,
+                    freq=self.freq)
+
+            elif self.filter_type == 'highpass':
+                data = highpass(data, df=df, zerophase=False,
+                    freq=self.freq)
+
+            for _i, trace in enumerate(group):
+                trace.data = data[_i]
+
+
+    def _get_taper(self, npts, df):
+        """ Returns taper window used in ``__call__``, evaluated once for any
+        number of traces with the same time sampling
+        """
+        if not hasattr(self, '_tapers'):
+            self._tapers = {}
+
+        if (npts, df) not in self._tapers:
+            trace = Trace(np.ones(npts), {'sampling_rate': df})
+            trace.taper(0.05, type='hann')
+            self._tapers[npts, df] = trace.data
+
+        return self._tapers[npts, df]
@@ -0,0 +1,313 @@
+
+import numpy as np
+
+from mtuq.event import Origin
+from mtuq.grid import Grid, UnstructuredGrid
+from mtuq.grid_search import _PERIODIC, _RANGES, _to_dataframe_paired,\
+    _to_values
+
+
+def parallel_tempering(data, greens, misfit, origin, sources, var,
+    nsamples=10000, nwalkers=8, ntemps=4, tmax=100., burn=1000, thin=1,
+    results=None, seed=None, verbose=1):
+
+    """ Samples posterior distribution of source parameters using parallel
+    tempering Markov chain Monte Carlo
+
+    .. rubric :: Usage
+
+    Draws samples from the posterior distribution with likelihood
+    `exp(-misfit/(2*var))` and uniform prior over the parameters of `sources`.
+    In place of a grid search over a very large grid, misfit is evaluated
+    only along Markov chains, which concentrate where likelihood is high.
+
+    Returns an `MTUQDataFrame` of samples and corresponding misfit values,
+    which can be plotted in the same way as grid search results over an
+    `UnstructuredGrid`, for example using ``plot_marginal_vw`` or
+    ``plot_marginal_force``.
+
+
+    .. rubric :: Input arguments
+
+    ``data``, ``greens``, ``misfit``:
+    Same as for `grid_search`
+
+
+    ``origin`` (`mtuq.Origin`):
+    Origin at which sources are sampled
+
+
+    ``sources`` (`mtuq.Grid` or `mtuq.UnstructuredGrid`):
+    Moment tensor or force grid, such as `FullMomentTensorGridSemiregular`
+    or `ForceGridRegular`, which determines the parameterization (see note
+    below)
+
+
+    ``var`` (`float`):
+    Data variance
+
+
+    ``nsamples`` (`int`):
+    Number of samples returned
+
+
+    ``nwalkers`` (`int`):
+    Number of Markov chains at each temperature
+
+
+    ``ntemps`` (`int`):
+    Number of temperatures, spaced geometrically from `1` to `tmax`
+
+
+    ``burn`` (`int`):
+    Number of initial iterations discarded, during which proposal step sizes
+    are adapted
+
+
+    ``thin`` (`int`):
+    Number of iterations between samples retained from each chain
+
+
+    ``results`` (`MTUQDataArray` or `MTUQDataFrame`):
+    Optional output of `grid_search` over `sources`, in which case chains
+    start from the grid points with the lowest misfit.  Otherwise, chains
+    start from random draws from the prior
+
+
+    .. note:
+
+      The prior is uniform over `v`, `w`, `kappa`, `sigma`, `h` (that is,
+      uniform over moment tensors of a given magnitude) or over `phi`, `h`
+      (uniform over force directions).  Axes along which `sources` take a
+      single value, such as `v` and `w` for double couple grids, are held
+      fixed.  Magnitudes are sampled uniformly between the smallest and
+      largest magnitudes of `sources`.
+
+    .. note:
+
+      Misfit is evaluated using ``Misfit.get_function``, so that data and
+      Green's function cross-correlations are computed only once, and each
+      iteration of all chains at all temperatures requires only one call of
+      the C extension module.
+
+    .. note:
+
+      Because samples are drawn from the posterior itself, marginal
+      distributions are obtained by counting samples, and plotting functions
+      recognize returned `MTUQDataFrames` as samples.  The data variance
+      given to plotting functions is then ignored, and marginals correspond
+      to `var` above.  Misfit and maximum likelihood plots are unaffected.
+      Samples are flagged by ``attrs['sampled']``, which is kept when
+      saving with ``MTUQDataFrame.save`` and reading back with `open_ds`.
+
+    """
+    if type(origin) is not Origin:
+        raise TypeError
+
+    if not issubclass(type(sources), (Grid, UnstructuredGrid)):
+        raise TypeError
+
+    assert var > 0.,\
+        ValueError("Bad input argument: var")
+
+    assert nsamples >= 1,\
+        ValueError("Bad input argument: nsamples")
+
+    assert nwalkers >= 1,\
+        ValueError("Bad input argument: nwalkers")
+
+    assert ntemps >= 1,\
+        ValueError("Bad input argument: ntemps")
+
+    assert tmax >= 1.,\
+        ValueError("Bad input argument: tmax")
+
+    assert burn >= 0 and thin >= 1,\
+        ValueError("Bad input argument: burn or thin")
+
+    rng = np.random.default_rng(seed)
+
+    dims = sources.dims
+    lower, upper, periodic = _get_bounds(sources)
+    free = upper > lower
+
+    if not np.any(free):
+        raise ValueError("Nothing to sample: all parameters are fixed")
+
+    # data and Green's function correlations are computed only once
+    function = misfit.get_function(data, greens.select(origin), dims)
+
+    def log_likelihood(points):
+        return -function(points)[:, 0]/(2.*var)
+
+    temperatures = np.geomspace(1., tmax, ntemps)
+
+    # chains are stored with shape (ntemps, nwalkers, ndim)
+    points = _get_start(sources, results, lower, upper, free,
+        ntemps*nwalkers, rng).reshape(ntemps, nwalkers, len(dims))
+
+    values = log_likelihood(points.reshape(-1, len(dims))).reshape(
+        ntemps, nwalkers)
+
+    # proposal step sizes, as a fraction of the prior range, start out
+    # larger at higher temperatures
+    steps = 0.1*np.sqrt(temperatures)[:, np.newaxis]*np.ones(len(dims))
+    steps = np.minimum(steps, 1.)
+
+    niter = burn + int(np.ceil(nsamples/nwalkers))*thin
+    samples = []
+    sample_values = []
+
+    accepted = np.zeros(ntemps)
+    swapped = np.zeros(max(ntemps-1, 1))
+
+    if verbose>0:
+        print('  Sampling with %d chains at each of %d temperatures '
+            '(%d iterations)\n' % (nwalkers, ntemps, niter))
+
+    for _it in range(niter):
+        #
+        # Metropolis updates of all chains at once, using Gaussian proposals
+        # reflected at bounds or wrapped around periodic axes, which keeps
+        # proposals symmetric
+        #
+        proposals = points + free*(upper-lower)*steps[:, np.newaxis, :]*\
+            rng.standard_normal(points.shape)
+
+        proposals = _fold(proposals, lower, upper, periodic)
+
+        new_values = log_likelihood(proposals.reshape(-1, len(dims))).reshape(
+            ntemps, nwalkers)
+
+        accept = np.log(rng.random((ntemps, nwalkers))) <\
+            (new_values - values)/temperatures[:, np.newaxis]
+
+        points[accept] = proposals[accept]
+        values[accept] = new_values[accept]
+        accepted += accept.mean(axis=1)
+
+        #
+        # swaps between adjacent temperatures
+        #
+        for _k in range(ntemps-1):
+            ratio = (1./temperatures[_k] - 1./temperatures[_k+1])*\
+                (values[_k+1] - values[_k])
+
+            swap = np.log(rng.random(nwalkers)) < ratio
+            swapped[_k] += swap.mean()
+
+            points[_k, swap], points[_k+1, swap] =\
+                points[_k+1, swap], points[_k, swap]
+            values[_k, swap], values[_k+1, swap] =\
+                values[_k+1, swap], values[_k, swap]
+
+        #
+        # adapt step sizes toward an acceptance rate of about one quarter
+        # (during burn-in only, so that retained samples satisfy detailed
+        # balance)
+        #
+        if _it < burn and (_it+1) % 50 == 0:
+            steps *= np.exp(accepted/50. - 0.25)[:, np.newaxis]
+            steps = np.minimum(steps, 1.)
+            accepted[:] = 0.
+
+        if _it == burn-1:
+            accepted[:] = 0.
+            swapped[:] = 0.
+
+        if _it >= burn and (_it-burn+1) % thin == 0:
+            samples += [points[0].copy()]
+            sample_values += [values[0].copy()]
+
+    samples = np.concatenate(samples)[:nsamples]
+    sample_values = np.concatenate(sample_values)[:nsamples]
+
+    if verbose>0:
+        niter_kept = niter-burn
+        print('  Acceptance rates: %s\n' % ', '.join(['%.2f' % rate
+            for rate in accepted/niter_kept]))
+        if ntemps > 1:
+            print('  Swap rates: %s\n' % ', '.join(['%.2f' % rate
+                for rate in swapped/niter_kept]))
+
+    df = _to_dataframe_paired(np.zeros(len(samples), dtype=int),
+        UnstructuredGrid(dims=dims, coords=samples.T,
+        callback=sources.callback), -2.*var*sample_values)
+
+    df.attrs['sampled'] = True
+
+    return df
+
+
+#
+# utility functions
+#
+
+def _get_bounds(sources):
+    """ Returns prior bounds along each axis, and which axes are periodic
+    """
+    dims = sources.dims
+
+    if 'kappa' in dims:
+        ranges = _RANGES['MomentTensor']
+    elif 'phi' in dims:
+        ranges = _RANGES['Force']
+    else:
+        raise ValueError("Unexpected grid dimensions")
+
+    lower = np.zeros(len(dims))
+    upper = np.zeros(len(dims))
+    periodic = np.zeros(len(dims), dtype=bool)
+
+    for _k, (dim, coords) in enumerate(zip(dims, sources.coords)):
+        lower[_k] = np.min(coords)
+        upper[_k] = np.max(coords)
+
+        if upper[_k] == lower[_k]:
+            # axis is held fixed
+            continue
+
+        if dim in _PERIODIC:
+            lower[_k], upper[_k] = 0., 360.
+            periodic[_k] = True
+
+        elif dim in ranges and np.all(np.isfinite(ranges[dim])):
+            lower[_k], upper[_k] = ranges[dim]
+
+    return lower, upper, periodic
+
+
+def _get_start(sources, results, lower, upper, free, nchains, rng):
+    """ Returns starting points for Markov chains
+    """
+    if results is None:
+        # random draws from the prior
+        points = lower + (upper-lower)*rng.random((nchains, len(lower)))
+        return np.where(free, points, lower)
+
+    # grid points with the lowest misfit over all origins
+    values = _to_values(results, len(sources),
+        int(np.prod(results.shape))//len(sources)).min(axis=1)
+
+    nbest = min(nchains, len(values))
+    indices = np.argsort(values, kind='stable')[:nbest]
+    indices = np.resize(indices, nchains)
+
+    return sources.get_many(sources.start + indices)
+
+
+def _fold(points, lower, upper, periodic):
+    """ Maps points back into bounds, by reflection or, along periodic axes,
+    by wrapping around
+    """
+    width = upper - lower
+    width = np.where(width > 0., width, 1.)
+
+    wrapped = lower + np.mod(points - lower, width)
+
+    reflected = np.mod(points - lower, 2.*width)
+    reflected = lower + width - np.abs(width - reflected)
+
+    return np.where(periodic, wrapped,
+        np.where(upper > lower, reflected, points))
+
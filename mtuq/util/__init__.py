@@ -87,6 +87,51 @@ def gather2(comm, array):
         return
 
 
+def share_arrays(comm, arrays):
+    """ Places NumPy arrays in memory shared by all MPI processes on a node
+
+    Must be called by all processes in `comm`, each with arrays of the same
+    shapes and dtypes.  Values are taken from the first process on each node,
+    and one read-only view into a single MPI-3 shared memory window per node
+    is returned in place of each array
+
+    Returns a `(window, arrays)` tuple.  The window must outlive the returned
+    arrays, and once they are no longer needed, can be freed by calling
+    ``window.Free()`` from all processes in `comm`
+    """
+    from mpi4py import MPI
+
+    node = comm.Split_type(MPI.COMM_TYPE_SHARED)
+
+    # align each array to a 64-byte boundary
+    offsets = []
+    nbytes = 0
+    for array in arrays:
+        offsets += [nbytes]
+        nbytes += 64*int(ceil(array.nbytes/64.))
+
+    window = MPI.Win.Allocate_shared(
+        nbytes if node.rank==0 else 0, 1, comm=node)
+    buffer, _ = window.Shared_query(0)
+
+    shared = []
+    for array, offset in zip(arrays, offsets):
+        shared += [np.ndarray(array.shape, dtype=array.dtype,
+            buffer=buffer, offset=offset)]
+
+    if node.rank == 0:
+        for array, _array in zip(arrays, shared):
+            _array[...] = array
+    node.Barrier()
+
+    for array in shared:
+        array.setflags(write=False)
+
+    node.Free()
+
+    return window, shared
+
+
 def is_mpi_env():
     try:
         import mpi4py
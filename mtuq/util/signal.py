@@ -4,7 +4,7 @@ from copy import copy
 from mtuq.util.math import isclose
 from obspy.geodetics import gps2dist_azimuth, kilometers2degrees
 from obspy.signal.filter import highpass, lowpass
-from scipy.signal import fftconvolve
+from scipy.signal import fftconvolve, iirfilter, sosfilt, zpk2sos
 
 
 def cut(trace, t1, t2):
@@ -38,6 +38,9 @@ def resample(data, t1_old, t2_old, dt_old, t1_new, t2_new, dt_new):
     t1_new: desired start time for resampled data
     t2_new: desired end time for resampled data
     dt_new: desired time increment for resampled data
+
+    data can also be a 2-D array of shape (ntraces, nt), in which case all 
+    rows share the same time axis and are resampled at once
     """
     dt = dt_old
 
@@ -58,7 +61,7 @@ def resample(data, t1_old, t2_old, dt_old, t1_new, t2_new, dt_new):
     i2 = int(round((t2_old-t2_new)/dt))
 
     nt = int(round((t2_new-t1_new)/dt))
-    adjusted = np.zeros(nt+1)
+    adjusted = np.zeros(np.shape(data)[:-1]+(nt+1,))
 
     #
     # adjust end points, leaving sampling rate unchaged for now
@@ -66,19 +69,19 @@ def resample(data, t1_old, t2_old, dt_old, t1_new, t2_new, dt_new):
 
     if t1_old <= t1_new <= t2_new <= t2_old:
         # cut both ends
-        adjusted[0:nt] = data[-i1:nt-i1]
+        adjusted[..., 0:nt] = data[..., -i1:nt-i1]
 
     elif t1_old <= t1_new <= t2_old <= t2_new:
         # cut left, pad right
-        adjusted[0:nt+i2] = data[-i1:]
+        adjusted[..., 0:nt+i2] = data[..., -i1:]
 
     elif t1_new <= t1_old <= t2_new <= t2_old:
         # pad left, cut right
-        adjusted[i1:nt] = data[:-i2-1]
+        adjusted[..., i1:nt] = data[..., :-i2-1]
 
     elif t1_new <= t1_old <= t2_old <= t2_new:
         # pad both ends
-        adjusted[i1:i2] =  data[:]
+        adjusted[..., i1:i2] =  data[..., :]
 
     #
     # adjust sampling rate
@@ -111,20 +114,56 @@ def downsample(data, dt_old, dt_new, nt_old, nt_new):
     if freq > 0.999*freq_nyquist:
         freq = 0.999*freq_nyquist
 
-    filtered = lowpass(data, freq=freq, df=dt_old**-1, zerophase=True)
+    if np.ndim(data)==1:
+        filtered = lowpass(data, freq=freq, df=dt_old**-1, zerophase=True)
+    else:
+        filtered = _lowpass(data, freq=freq, df=dt_old**-1)
 
     t1, t2 = 0., nt_new*dt_new
     t_old = np.linspace(t1, t2, nt_old+1)
     t_new = np.linspace(t1, t2, nt_new+1)
 
-    return np.interp(t_new, t_old, filtered)
+    return _interp(t_new, t_old, filtered)
 
 
 def upsample(data, dt_old, dt_new, nt_old, nt_new):
     t1, t2 = 0., nt_new*dt_new
     t_old = np.linspace(t1, t2, nt_old+1)
     t_new = np.linspace(t1, t2, nt_new+1)
-    return np.interp(t_new, t_old, data)
+    return _interp(t_new, t_old, data)
+
+
+def _lowpass(data, freq, df, corners=4):
+    # zero-phase Butterworth lowpass filter applied along the last axis, 
+    # giving the same result as obspy.signal.filter.lowpass for each row
+    fe = 0.5*df
+    f = min(freq/fe, 1.)
+
+    z, p, k = iirfilter(corners, f, btype='lowpass', ftype='butter',
+        output='zpk')
+    sos = zpk2sos(z, p, k)
+
+    firstpass = sosfilt(sos, data, axis=-1)
+    return sosfilt(sos, firstpass[..., ::-1], axis=-1)[..., ::-1]
+
+
+def _interp(x, xp, data):
+    # linear interpolation along the last axis, giving the same result as
+    # np.interp for each row
+    if np.ndim(data)==1:
+        return np.interp(x, xp, data)
+
+    # interpolation weights depend only on the shared time axis, so they
+    # are computed once for all rows
+    j = np.clip(np.searchsorted(xp, x, side='right')-1, 0, len(xp)-2)
+    slope = (data[..., j+1] - data[..., j])/(xp[j+1] - xp[j])
+    interpolated = slope*(x - xp[j]) + data[..., j]
+
+    # np.interp returns end values exactly
+    interpolated[..., x <= xp[0]] = data[..., :1]
+    interpolated[..., x >= xp[-1]] = data[..., -1:]
+
+    return interpolated
 
 
 def pad(trace, padding):
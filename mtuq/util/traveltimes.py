@@ -0,0 +1,309 @@
+
+import hashlib
+import numpy as np
+import obspy
+import os
+import warnings
+
+from os.path import abspath, basename, exists, expanduser, isfile, join
+from obspy.taup import TauPyModel
+from obspy.taup.taup_time import TauPTime
+from mtuq.util import warn
+
+
+# phases used to determine P and S picks, as in mtuq.process_data
+PHASE_LIST = ['p', 's', 'P', 'S']
+
+
+class TravelTimeTable(object):
+    """ Lookup table of P and S first-arrival times
+
+    Interpolates P and S arrival times over a grid of source depths and
+    epicentral distances, avoiding a full TauP calculation for each
+    (station, origin) pair
+
+    .. rubric:: Usage
+
+    .. code::
+
+        table = TravelTimeTable('ak135')
+        P, S = table.get_arrival_times(depths_in_km, distances_in_deg)
+
+
+    .. rubric :: Input arguments
+
+    ``model`` (`str`): name of an ObsPy TauP model, or path to a
+    `.npz` TauP model file
+
+    ``depth_spacing`` (`float`): spacing in km of the source depth grid
+
+    ``path`` (`str`): directory in which the table is cached (defaults to
+    the ``TAUP_CACHE`` environment variable if set, or otherwise to
+    ``mtuq/taup`` in the user cache directory, ``$XDG_CACHE_HOME`` or
+    ``~/.cache``)
+
+
+    .. note::
+
+      P times are taken from the earliest `p` arrival or, if there is none,
+      the earliest `P` arrival, and likewise for S, which is the same
+      convention as ``ProcessData`` with ``pick_type='taup'``.
+      Where no such arrival exists, times are `NaN`.
+
+    .. note::
+
+      Rows of the table are computed as needed, one source depth at a time,
+      and saved to disk, so that later calls and later sessions using the
+      same model reuse them.  Distances are sampled every 0.02 deg out to
+      2 deg, every 0.05 deg out to 10 deg, every 0.1 deg out to 40 deg and
+      every 0.25 deg beyond that.  Where the four surrounding nodes do not
+      all use the same phase, times are computed directly from TauP instead.
+      Differences from TauP are typically a few hundredths of a second or
+      less, which can be verified using ``check``.
+
+    """
+    def __init__(self, model, depth_spacing=1., path=None):
+        assert depth_spacing > 0,\
+            ValueError("Bad input argument: depth_spacing")
+
+        if path is None:
+            path = _get_cache_dir()
+
+        self.model = model
+        self.depth_spacing = float(depth_spacing)
+        self.distances = np.concatenate([
+            np.linspace(0., 2., 101)[:-1],
+            np.linspace(2., 10., 161)[:-1],
+            np.linspace(10., 40., 301)[:-1],
+            np.linspace(40., 180., 561)])
+
+        self._taup = TauPyModel(model)
+
+        # tables with different models or grids are kept in different files
+        grid = np.append(self.distances, self.depth_spacing)
+        md5 = hashlib.md5(grid.tobytes())
+        md5.update(_get_model_id(model))
+        self.filename = join(path, '%s_%s.npz' % (
+            basename(model).split('.')[0], md5.hexdigest()[:8]))
+
+        self._rows = {}
+        if exists(self.filename):
+            self._load()
+
+
+    def get_arrival_times(self, depths_in_km, distances_in_deg):
+        """ Returns interpolated P and S arrival times in seconds
+
+        Accepts scalars or arrays of matching shape, and returns a tuple
+        ``(P, S)`` of the same shape
+        """
+        depths = np.asarray(depths_in_km, dtype=float)
+        distances = np.clip(
+            np.asarray(distances_in_deg, dtype=float), 0., 180.)
+
+        depths, distances = np.broadcast_arrays(depths, distances)
+        shape = depths.shape
+        depths = depths.ravel()
+        distances = distances.ravel()
+
+        assert np.all(depths >= 0.),\
+            ValueError("Bad input argument: depths_in_km")
+
+        # bracketing depth rows
+        _i0 = np.floor(depths/self.depth_spacing).astype(int)
+        _i1 = _i0 + (depths > _i0*self.depth_spacing)
+        wd = depths/self.depth_spacing - _i0
+
+        rows = np.union1d(_i0, _i1)
+        self._add_rows(rows)
+        _n0 = np.searchsorted(rows, _i0)
+        _n1 = np.searchsorted(rows, _i1)
+
+        # bracketing distance columns
+        _j1 = np.clip(np.searchsorted(self.distances, distances),
+            1, len(self.distances)-1)
+        _j0 = _j1 - 1
+        wx = (distances - self.distances[_j0])/\
+             (self.distances[_j1] - self.distances[_j0])
+
+        times = []
+        invalid = []
+        for _k in range(2):
+            table = np.array([self._rows[_i][_k] for _i in rows])
+            branch = np.array([self._rows[_i][_k+2] for _i in rows])
+
+            # bilinear interpolation
+            t0 = (1.-wx)*table[_n0, _j0] + wx*table[_n0, _j1]
+            t1 = (1.-wx)*table[_n1, _j0] + wx*table[_n1, _j1]
+            times += [(1.-wd)*t0 + wd*t1]
+
+            # the pick convention switches from one phase to the other
+            # discontinuously, so interpolation is only valid if all
+            # surrounding nodes use the same phase
+            corners = np.array([branch[_n0, _j0], branch[_n0, _j1],
+                branch[_n1, _j0], branch[_n1, _j1]])
+            invalid += [np.any(corners != corners[0], axis=0) |
+                (corners[0] < 0)]
+
+        # elsewhere, fall back to TauP
+        for _n in np.flatnonzero(invalid[0] | invalid[1]):
+            picks, _ = self._get_picks(depths[_n], distances[_n])
+            for _k in range(2):
+                if invalid[_k][_n]:
+                    times[_k][_n] = picks[_k]
+
+        return tuple(time.reshape(shape) for time in times)
+
+
+    def check(self, depths_in_km, distances_in_deg):
+        """ Compares interpolated arrival times with TauP
+
+        Returns a tuple ``(P, S)`` of maximum absolute differences in seconds
+        over the given (depth, distance) pairs, ignoring pairs for which
+        either TauP or the table has no arrival
+        """
+        depths, distances = np.broadcast_arrays(
+            np.asarray(depths_in_km, dtype=float).ravel(),
+            np.asarray(distances_in_deg, dtype=float).ravel())
+
+        P, S = self.get_arrival_times(depths, distances)
+
+        errors = [[], []]
+        for _n, (depth, distance) in enumerate(zip(depths, distances)):
+            picks, _ = self._get_picks(depth, distance)
+            errors[0] += [abs(P[_n] - picks[0])]
+            errors[1] += [abs(S[_n] - picks[1])]
+
+        return tuple(np.nanmax(np.array(error + [0.])) for error in errors)
+
+
+    def _add_rows(self, indices):
+        """ Computes any missing depth rows and saves the updated table
+        """
+        missing = [_i for _i in indices if _i not in self._rows]
+        if not missing:
+            return
+
+        for _i in missing:
+            self._rows[_i] = self._compute_row(_i*self.depth_spacing)
+
+        try:
+            self._save()
+        except OSError:
+            warn("Unable to write travel time table: %s" % self.filename)
+
+
+    def _compute_row(self, depth):
+        """ Computes P and S arrival times at all distances for a given
+        source depth
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore')
+
+            # the depth-corrected model and seismic phases are set up once,
+            # and then reused for all distances; ray parameters are not
+            # iteratively refined, which changes times by at most a few
+            # hundredths of a second but makes each row many times faster
+            tt = TauPTime(self._taup.model, PHASE_LIST, depth, None, 0.,
+                ray_param_tol=np.inf)
+            tt.depth_correct(depth)
+            tt.recalc_phases()
+
+            times = np.zeros((2, len(self.distances)))
+            branches = np.zeros((2, len(self.distances)), dtype=np.int8)
+            for _j, distance in enumerate(self.distances):
+                tt.calc_time(distance)
+                times[:, _j], branches[:, _j] = _get_picks(tt.arrivals)
+
+        return times[0], times[1], branches[0], branches[1]
+
+
+    def _get_picks(self, depth, distance):
+        """ Computes P and S arrival times directly from TauP
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore')
+            arrivals = self._taup.get_travel_times(
+                depth, distance, phase_list=PHASE_LIST)
+
+        return _get_picks(arrivals)
+
+
+    def _load(self):
+        try:
+            with np.load(self.filename) as table:
+                indices = np.round(table['depths']/self.depth_spacing)
+                for _n, _i in enumerate(indices.astype(int)):
+                    self._rows[_i] = tuple(table[key][_n] for key in
+                        ('P', 'S', 'P_branch', 'S_branch'))
+        except Exception:
+            warn("Unable to read travel time table: %s" % self.filename)
+            self._rows = {}
+
+
+    def _save(self):
+        dirname = os.path.dirname(self.filename)
+        if not exists(dirname):
+            os.makedirs(dirname, exist_ok=True)
+
+        indices = sorted(self._rows)
+
+        # writing to a temporary file first means that other processes never
+        # read a partially written table
+        temp = '%s.%d.npz' % (self.filename[:-4], os.getpid())
+        np.savez(temp,
+            model=basename(self.model),
+            depths=np.array(indices)*self.depth_spacing,
+            distances=self.distances,
+            P=np.array([self._rows[_i][0] for _i in indices]),
+            S=np.array([self._rows[_i][1] for _i in indices]),
+            P_branch=np.array([self._rows[_i][2] for _i in indices]),
+            S_branch=np.array([self._rows[_i][3] for _i in indices]))
+        os.replace(temp, self.filename)
+
+
+
+def _get_cache_dir():
+    """ Returns default directory for cached travel time tables
+    """
+    if 'TAUP_CACHE' in os.environ:
+        return os.environ['TAUP_CACHE']
+
+    dirname = os.environ.get('XDG_CACHE_HOME') or expanduser('~/.cache')
+    return join(dirname, 'mtuq', 'taup')
+
+
+def _get_model_id(model):
+    """ Returns bytes identifying a TauP model
+
+    For model files, both the absolute path and the file contents are used,
+    so that different or modified files with the same name never share a
+    table.  For models built into ObsPy, the ObsPy version is used
+    """
+    if isfile(model):
+        with open(model, 'rb') as file:
+            contents = hashlib.md5(file.read()).hexdigest()
+        return ('%s:%s' % (abspath(model), contents)).encode()
+    else:
+        return ('%s:%s' % (model, obspy.__version__)).encode()
+
+
+def _get_picks(arrivals):
+    """ Returns earliest `p` or else `P` time, and earliest `s` or else `S`
+    time, from time-sorted arrivals
+
+    Also returns which phase each time corresponds to (0 for `p` or `s`, 1 for
+    `P` or `S`, and -1 if neither arrival exists)
+    """
+    times = [np.nan, np.nan]
+    branches = [-1, -1]
+    for _k, phases in enumerate((['p', 'P'], ['s', 'S'])):
+        for branch, phase in enumerate(phases):
+            picks = [arrival.time for arrival in arrivals
+                if arrival.phase.name==phase]
+            if picks:
+                times[_k] = picks[0]
+                branches[_k] = branch
+                break
+    return times, branches
+
@@ -81,19 +81,46 @@ class Wavelet(object):
 
     def _convolve_array(self, y, dt, mode=1):
         """ Convolves NumPy array with given wavelet
+
+        If `y` is a 2-D array, each row is convolved with the same wavelet
         """
-        nt = len(y)
-        half_duration = (nt-1)*dt/2.
-        w = self._evaluate_on_interval(half_duration, nt)
-        w *= dt
+        nt = np.shape(y)[-1]
+        w = self._get_samples(dt, nt)
 
         if mode==1:
-            # frequency-domain implementation
-            return signal.fftconvolve(y, w, mode='same')
+            # frequency-domain implementation (all rows are transformed
+            # together)
+            w = w.reshape((1,)*(np.ndim(y)-1) + (-1,))
+            return signal.fftconvolve(y, w, mode='same', axes=-1)
 
         elif mode==2:
             # time-domain implementation
-            return np.convolve(y, w, mode='same')
+            if np.ndim(y)==1:
+                return np.convolve(y, w, mode='same')
+            else:
+                return np.array([np.convolve(row, w, mode='same')
+                    for row in y])
+
+
+    def _get_samples(self, dt, nt):
+        """ Returns wavelet time series used for convolution with arrays of
+        the given time sampling
+
+        The result is cached, so that the wavelet is evaluated only once
+        for any number of time series with the same time sampling
+        """
+        # changing wavelet parameters invalidates the cached time series
+        params = repr(sorted((key, val) for key, val in vars(self).items()
+            if not key.startswith('_')))
+
+        key = (dt, nt, params)
+        if getattr(self, '_samples', (None, None))[0] != key:
+            half_duration = (nt-1)*dt/2.
+            w = self._evaluate_on_interval(half_duration, nt)
+            w *= dt
+            self._samples = (key, w)
+
+        return self._samples[1]
 
 
 
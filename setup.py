@@ -23,9 +23,29 @@ def get_compile_args():
         compile_args += ['-Ofast']
         compile_args += ['-march=native']
 
+    compile_args += get_openmp_args()
+
     return compile_args
 
 
+def get_link_args():
+    return get_openmp_args()
+
+
+def get_openmp_args():
+    # OpenMP is used to divide misfit evaluations among threads (see
+    # `num_threads` in mtuq.misfit.Misfit); set MTUQ_NO_OPENMP to compile
+    # a serial-only extension, e.g. with compilers lacking OpenMP support
+    compiler = os.environ.get("CC", '')
+
+    if os.environ.get("MTUQ_NO_OPENMP"):
+        return []
+    elif compiler.endswith("icc"):
+        return ['-qopenmp']
+    else:
+        return ['-fopenmp']
+
+
 class PyTest(test_command):
     user_options = [('pytest-args=', 'a', "Arguments to pass to py.test")]
 
@@ -48,6 +68,7 @@ ENTRY_POINTS = {
         'AXISEM_NETCDF = mtuq.io.clients.AxiSEM_NetCDF:Client',
         'FK = mtuq.io.clients.FK_SAC:Client',
         'FK_SAC = mtuq.io.clients.FK_SAC:Client',
+        'FK_NPY = mtuq.io.clients.FK_NPY:Client',
         'SPECFEM3D = mtuq.io.clients.SPECFEM3D_SAC:Client',
         'SPECFEM3D_SAC = mtuq.io.clients.SPECFEM3D_SAC:Client',
         'SPECFEM3D_SGT = mtuq.io.clients.SPECFEM3D_SGT:Client',
@@ -106,10 +127,16 @@ setup(
         #"instaseis"
     ],
     ext_modules = [
+        Extension(
+            'mtuq.misfit.waveform.c_ext_L1', ['mtuq/misfit/waveform/c_ext_L1.c'],
+            include_dirs=[numpy.get_include()],
+            extra_compile_args=get_compile_args(),
+            extra_link_args=get_link_args()),
         Extension(
             'mtuq.misfit.waveform.c_ext_L2', ['mtuq/misfit/waveform/c_ext_L2.c'],
             include_dirs=[numpy.get_include()],
-            extra_compile_args=get_compile_args()),
+            extra_compile_args=get_compile_args(),
+            extra_link_args=get_link_args()),
     ],
 )
 
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+Grid search and shared memory checks run by unittest_mpi.py under mpirun
+
+Usage: mpirun -n NPROC python _mpi_grid_search.py PATH CASE [CASE ...]
+"""
+
+import os
+import sys
+import traceback
+import numpy as np
+
+from mpi4py import MPI
+from mtuq.grid import DoubleCoupleGridRegular, FullMomentTensorGridRandom
+from mtuq.grid_search import grid_search, open_ds, MTUQDataArray,\
+    _to_values
+from mtuq.misfit import Misfit
+
+from _synthetic import get_origins, get_problem
+
+
+comm = MPI.COMM_WORLD
+
+
+def _is_close(values, expected):
+    # results may differ by roundoff depending on how sources are divided up
+    return np.allclose(values, expected, rtol=1.e-12, atol=0.)
+
+
+def _grid_search(sources, msg_interval=0, **kwargs):
+    return grid_search(data, greens, Misfit(norm='L2'), origins, sources,
+        verbose=0, timed=False, msg_interval=msg_interval, **kwargs)
+
+
+def _serial(sources):
+    # reference results computed on process 0 alone
+    if comm.rank == 0:
+        values = [Misfit(norm='L2')(data, greens.select(origin), sources)
+            for origin in origins]
+        return np.concatenate(values, axis=1)
+
+
+def check_dynamic(sources, path):
+    expected = _serial(sources)
+    for task_size in [None, 7]:
+        results = _grid_search(sources, scheduler='dynamic',
+            task_size=task_size)
+        if comm.rank == 0:
+            assert _is_close(
+                _to_values(results, len(sources), len(origins)), expected)
+        else:
+            assert results is None
+
+
+def check_dynamic_resume(sources, path):
+    expected = _serial(sources)
+    filename = os.path.join(path, 'dynamic_%d.h5' % len(sources))
+    _grid_search(sources, scheduler='dynamic', task_size=7,
+        filename=filename)
+
+    # once all tasks are completed, resuming evaluates nothing
+    results = _grid_search(sources, scheduler='dynamic', task_size=7,
+        filename=filename, resume=True, msg_interval=25)
+    if comm.rank == 0:
+        assert _is_close(
+            _to_values(results, len(sources), len(origins)), expected)
+        assert np.array_equal(open_ds(filename).values, results.values)
+
+
+def check_static(sources, path):
+    expected = _serial(sources)
+    results = _grid_search(sources)
+    if comm.rank == 0:
+        assert _is_close(
+            _to_values(results, len(sources), len(origins)), expected)
+    else:
+        assert results is None
+
+
+def check_static_scatter(sources, path):
+    # with three processes and three origins, each process evaluates all
+    # sources for one origin
+    expected = _serial(sources)
+    results = _grid_search(sources, gather=False)
+
+    if type(results) is MTUQDataArray:
+        origin_idx = results.coords['origin_idx'].values
+    else:
+        origin_idx = np.unique(results.index.get_level_values('origin_idx'))
+
+    # origin indices refer to the full list of origins
+    assert list(origin_idx) == [comm.rank]
+
+    results = comm.gather((origin_idx[0],
+        _to_values(results, len(sources), 1)[:, 0]), root=0)
+
+    if comm.rank == 0:
+        for _i, values in results:
+            assert _is_close(values, expected[:, _i])
+
+
+def check_share(sources, path):
+    _greens = greens.select(origins[0])
+    expected = Misfit(norm='L2')(data, _greens, sources)
+
+    # sharing twice replaces, rather than adds to, the shared memory window
+    for _ in range(2):
+        _greens.share(components=['Z','R','T'])
+        assert not _greens.as_array().flags.writeable
+        assert _is_close(Misfit(norm='L2')(data, _greens, sources), expected)
+
+    _greens.unshare()
+    assert _greens._window is None
+    assert _greens.as_array().flags.writeable
+    assert _is_close(Misfit(norm='L2')(data, _greens, sources), expected)
+
+
+CASES = {
+    'share': check_share,
+    'static': check_static,
+    'static_scatter': check_static_scatter,
+    'dynamic': check_dynamic,
+    'dynamic_resume': check_dynamic_resume,
+    }
+
+
+if __name__ == '__main__':
+    path = sys.argv[1]
+
+    np.random.seed(0)
+    origins = get_origins([1.e4, 2.e4, 3.e4])
+    data, greens, _ = get_problem(origins=origins)
+
+    grids = [
+        DoubleCoupleGridRegular(npts_per_axis=4, magnitudes=[4.]),
+        FullMomentTensorGridRandom(npts=100, magnitudes=[4.])]
+
+    for case in sys.argv[2:]:
+        for sources in grids:
+            try:
+                CASES[case](sources, path)
+            except:
+                # keeps other processes from waiting forever
+                traceback.print_exc()
+                sys.stderr.flush()
+                comm.Abort(1)
+
+    comm.Barrier()
+    if comm.rank == 0:
+        print('OK')
+
@@ -0,0 +1,108 @@
+"""
+Small synthetic problems for unit tests, requiring no downloaded data
+"""
+
+import numpy as np
+import os
+
+from obspy.core import Stream, Trace, UTCDateTime
+
+from mtuq import Dataset, GreensTensorList, Origin, Station
+from mtuq.greens_tensor.FK import GreensTensor
+from mtuq.io.clients.FK_SAC import CHANNELS, EXTENSIONS
+
+
+def get_origins(depths_in_m=(10000.,)):
+    return [Origin({
+        'time': UTCDateTime(0),
+        'latitude': 0.,
+        'longitude': 0.,
+        'depth_in_m': depth_in_m,
+        }) for depth_in_m in depths_in_m]
+
+
+def get_station(latitude, longitude, name='S00', npts=200, dt=0.1):
+    station = Station({
+        'latitude': latitude,
+        'longitude': longitude,
+        'network': 'XX',
+        'station': name,
+        'location': '',
+        'delta': dt,
+        'npts': npts,
+        'starttime': UTCDateTime(0),
+        })
+    station.id = 'XX.%s.' % name
+    return station
+
+
+def write_fk_tree(path, model, depths_in_km, distances_in_km, npts=256,
+    dt=0.1, seed=0):
+    """ Writes FK directory tree of random SAC files
+    """
+    rng = np.random.default_rng(seed)
+
+    for depth in depths_in_km:
+        dirname = os.path.join(path, '%s_%d' % (model, depth))
+        os.makedirs(dirname, exist_ok=True)
+
+        for distance in distances_in_km:
+            for ext in EXTENSIONS:
+                trace = Trace(rng.normal(size=npts).astype('float32'),
+                    {'delta': dt})
+                trace.write(os.path.join(dirname,
+                    '%d.grn.%s' % (distance, ext)), format='SAC')
+
+
+def get_problem(nstations=5, npts=200, dt=0.1, origins=None, source=None,
+    seed=0):
+    """ Returns data and Green's functions with random waveforms
+
+    If a source is given, data are replaced by synthetics of that source
+    at the first origin
+    """
+    rng = np.random.default_rng(seed)
+
+    if origins is None:
+        origins = get_origins()
+
+    data = Dataset()
+    greens = []
+
+    t = dt*np.arange(npts)
+    for _i in range(nstations):
+        station = get_station(1.+0.3*_i, 0.5*_i, 'S%02d' % _i, npts, dt)
+
+        stream = Stream()
+        for component in 'ZRT':
+            trace = Trace(
+                np.sin(t*(1+_i)+rng.normal())*np.exp(-((t-npts*dt/2)/3)**2)
+                + 0.1*rng.normal(size=npts),
+                {'delta': dt, 'channel': 'BH'+component,
+                 'network': 'XX', 'station': 'S%02d' % _i})
+            trace.weight = 1.
+            stream += trace
+        stream.station = station
+        stream.origin = origins[0]
+        data.append(stream)
+
+        for origin in origins:
+            traces = [Trace(
+                np.convolve(rng.normal(size=npts), np.ones(10)/10., 'same'),
+                {'delta': dt, 'channel': channel})
+                for channel in CHANNELS]
+            greens += [GreensTensor(
+                traces=traces, station=station, origin=origin)]
+
+    greens = GreensTensorList(greens)
+
+    if source is not None:
+        synthetics = greens.select(origins[0]).get_synthetics(
+            source, components=['Z','R','T'])
+        for stream, synthetic in zip(data, synthetics):
+            for trace in stream:
+                component = trace.stats.channel[-1]
+                trace.data[:] = synthetic.select(component=component)[0].data
+
+    return data, greens, origins
+
@@ -204,3 +204,66 @@ if __name__=='__main__':
     assert results_0.argmin()==results_1.argmin()==results_2.argmin()
 
 
+    print('Evaluating body wave misfit (L1 norm)...\n')
+
+    misfit_bw_L1 = Misfit(
+        norm='L1',
+        time_shift_min=-2.,
+        time_shift_max=+2.,
+        time_shift_groups=['ZR'],
+        )
+
+    results_0 = misfit_bw_L1(
+        data_bw, greens_bw, grid, optimization_level=0)
+
+    results_2 = misfit_bw_L1(
+        data_bw, greens_bw, grid, optimization_level=2)
+
+    print('  optimization level:  0\n', 
+          '  argmin:  %d\n' % results_0.argmin(), 
+          '  min:     %e\n\n' % results_0.min())
+
+    print('  optimization level:  2\n', 
+          '  argmin:  %d\n' % results_2.argmin(), 
+          '  min:     %e\n\n' % results_2.min())
+
+    assert results_0.argmin()==results_2.argmin()
+    assert np.allclose(results_0, results_2, rtol=1.e-3)
+
+
+    print('Evaluating body wave misfit (L2 norm, optimized magnitude)...\n')
+
+    misfit_bw_L2 = Misfit(
+        norm='L2',
+        time_shift_min=-2.,
+        time_shift_max=+2.,
+        time_shift_groups=['ZR'],
+        )
+
+    misfit_bw_Mw = Misfit(
+        norm='L2',
+        time_shift_min=-2.,
+        time_shift_max=+2.,
+        time_shift_groups=['ZR'],
+        optimize_magnitude=True,
+        )
+
+    results_L2 = misfit_bw_L2(
+        data_bw, greens_bw, grid)
+
+    results_Mw, magnitudes = misfit_bw_Mw.get_magnitudes(
+        data_bw, greens_bw, grid)
+
+    print('  fixed magnitude\n', 
+          '  argmin:  %d\n' % results_L2.argmin(), 
+          '  min:     %e\n\n' % results_L2.min())
+
+    print('  optimized magnitude\n', 
+          '  argmin:  %d\n' % results_Mw.argmin(), 
+          '  min:     %e\n' % results_Mw.min(),
+          '  Mw:      %f\n\n' % magnitudes[results_Mw.argmin()])
+
+    # minimizing over magnitude can only reduce misfit
+    assert np.all(results_Mw <= results_L2 + 1.e-6*abs(results_L2).max())
+
+
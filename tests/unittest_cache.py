@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+
+import glob
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import numpy as np
+
+from mtuq.grid import FullMomentTensorGridRandom
+from mtuq.misfit import CorrelationCache, Misfit
+from mtuq.misfit.waveform import level2, _cache
+
+from _synthetic import get_problem
+
+
+def _is_close(a, b):
+    # recomputing correlations can change misfit by roundoff, depending on
+    # memory alignment, whereas results from cached correlations are exact
+    return np.allclose(a, b, rtol=1.e-12, atol=0.)
+
+
+class TestCorrelationCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        np.random.seed(0)
+        cls.data, cls.greens, _ = get_problem()
+        cls.sources = FullMomentTensorGridRandom(npts=100, magnitudes=[4.])
+        cls.results = Misfit(norm='L2', time_shift_max=1.)(
+            cls.data, cls.greens, cls.sources, optimization_level=2)
+
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+
+    def _evaluate(self, cache, norm='L2'):
+        misfit = Misfit(norm=norm, time_shift_max=1., cache=cache)
+        return misfit(self.data, self.greens, self.sources,
+            optimization_level=2)
+
+
+    def test_memory(self):
+        cache = CorrelationCache()
+        results = self._evaluate(cache)
+        assert _is_close(results, self.results)
+        assert (cache.hits, cache.misses) == (0, 1)
+
+        # correlations do not depend on the norm
+        self._evaluate(cache, norm='hybrid')
+        assert np.array_equal(self._evaluate(cache), results)
+        assert (cache.hits, cache.misses) == (2, 1)
+        assert len(cache) == 1
+
+
+    def test_eviction(self):
+        cache = CorrelationCache(maxsize=2)
+        for key in ['a', 'b', 'c']:
+            cache.put(key, (np.zeros(1), np.zeros(1), np.zeros(1)))
+        assert len(cache) == 2
+        assert cache.get('a') is None
+        assert cache.get('c') is not None
+
+
+    def test_disk(self):
+        for format in ['npz', 'npy', 'hdf5']:
+            path = tempfile.mkdtemp(dir=self.path)
+            results = self._evaluate(
+                CorrelationCache(path=path, format=format))
+            assert _is_close(results, self.results)
+
+            # a new cache, for example in a later session, reads entries
+            # from disk
+            cache = CorrelationCache(path=path, format=format)
+            assert np.array_equal(self._evaluate(cache), results)
+            assert (cache.hits, cache.misses) == (1, 0)
+
+
+    def test_read_only(self):
+        cache = CorrelationCache()
+        self._evaluate(cache)
+        for array in cache.get(list(cache._entries)[0]):
+            assert not array.flags.writeable
+
+
+    def test_release(self):
+        # a failed evaluation must not leave other processes waiting
+        cache = CorrelationCache(path=self.path)
+
+        def _autocorr_1(*args):
+            raise MemoryError
+
+        default = level2._autocorr_1
+        level2._autocorr_1 = _autocorr_1
+        try:
+            with self.assertRaises(MemoryError):
+                self._evaluate(cache)
+        finally:
+            level2._autocorr_1 = default
+
+        assert glob.glob(os.path.join(self.path, '*.lock')) == []
+
+        assert _is_close(self._evaluate(cache), self.results)
+        assert glob.glob(os.path.join(self.path, '*.lock')) == []
+
+
+    def test_stale_lock(self):
+        # a lock left behind by a process that never finished is taken over
+        # by exactly one waiting process, and the others keep waiting
+        key = 'stale'
+        value = tuple(np.ones(3) for _ in range(3))
+
+        caches = [CorrelationCache(path=self.path) for _ in range(3)]
+        lockname = caches[0]._filename(key)+'.lock'
+        open(lockname, 'w').close()
+        stale = time.time() - 2.*_cache._TIMEOUT
+        os.utime(lockname, (stale, stale))
+
+        results = {}
+        def _get(_i):
+            results[_i] = caches[_i].get(key)
+
+        threads = [threading.Thread(target=_get, args=(_i,))
+            for _i in range(len(caches))]
+        for thread in threads:
+            thread.start()
+
+        # wait for the winning claim
+        start = time.time()
+        while len(results)==0 and time.time()-start < 10.:
+            time.sleep(0.01)
+        time.sleep(0.5)
+
+        assert list(results.values()) == [None]
+        assert os.path.getmtime(lockname) > stale
+        assert glob.glob(os.path.join(self.path, '*.stale')) == []
+
+        winner, = results
+        caches[winner].put(key, value)
+        for thread in threads:
+            thread.join(10.)
+
+        assert len(results) == len(caches)
+        for _i in results:
+            if _i != winner:
+                assert np.array_equal(results[_i][0], value[0])
+        assert glob.glob(os.path.join(self.path, '*.lock')) == []
+
+
+if __name__ == '__main__':
+    unittest.main()
+
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from mtuq.io.clients.FK_NPY import Client as ClientNPY, convert
+from mtuq.io.clients.FK_SAC import Client
+from mtuq.io.clients.base import GreensTensorCache
+from obspy.geodetics import gps2dist_azimuth
+
+from _synthetic import get_origins, get_station, write_fk_tree
+
+try:
+    import seisgen
+except ImportError:
+    seisgen = None
+
+
+MODEL = 'model'
+
+
+class CountingClient(Client):
+    # counts how many time series are read from disk
+    def _read_trace(self, *args):
+        self.nreads += 1
+        return super(CountingClient, self)._read_trace(*args)
+
+
+class TestClients(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.path = tempfile.mkdtemp()
+        cls.tree = os.path.join(cls.path, MODEL)
+
+        cls.origins = get_origins([1.e4, 2.e4])
+
+        # the first two stations are at the same distance, and share
+        # Green's functions
+        cls.stations = [
+            get_station(0., 1., 'S00'),
+            get_station(0., -1., 'S01'),
+            get_station(0., 2., 'S02'),
+            ]
+
+        # FK Green's functions are looked up by distance in km, rounded up
+        distances = sorted(set([int(np.ceil(gps2dist_azimuth(
+            0., 0., station.latitude, station.longitude)[0]/1000.))
+            for station in cls.stations]))
+
+        write_fk_tree(cls.tree, MODEL, [10, 20], distances)
+
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.path)
+
+
+    def _get_client(self, **kwargs):
+        client = CountingClient(self.tree, **kwargs)
+        client.nreads = 0
+        return client
+
+
+    def _check_equal(self, greens, expected):
+        assert len(greens) == len(expected)
+        for tensor, _tensor in zip(greens, expected):
+            assert tensor.station.id == _tensor.station.id
+            assert tensor.origin == _tensor.origin
+            assert len(tensor) == len(_tensor) == 10
+            for trace, _trace in zip(tensor, _tensor):
+                assert trace.stats.channel == _trace.stats.channel
+                assert np.array_equal(trace.data, _trace.data)
+
+
+    def test_deduplication(self):
+        client = self._get_client()
+        greens = client.get_greens_tensors(self.stations, self.origins)
+
+        # one (station, origin) pair out of three per origin is a copy
+        assert len(greens) == 6
+        assert client.nreads == 4*10
+
+        # order follows origins, then stations
+        for _i, tensor in enumerate(greens):
+            assert tensor.origin == self.origins[_i//3]
+            assert tensor.station.id == self.stations[_i%3].id
+
+        # copies have their own time series
+        assert np.array_equal(greens[0][0].data, greens[1][0].data)
+        greens[1][0].data[:] = 0.
+        assert np.any(greens[0][0].data != 0.)
+
+
+    def test_pool(self):
+        expected = self._get_client().get_greens_tensors(
+            self.stations, self.origins)
+
+        for executor in ['thread', 'process']:
+            greens = self._get_client().get_greens_tensors(
+                self.stations, self.origins, max_workers=3,
+                executor=executor)
+            self._check_equal(greens, expected)
+
+
+    def test_npy(self):
+        expected = self._get_client().get_greens_tensors(
+            self.stations, self.origins)
+
+        store = os.path.join(self.path, 'store')
+        convert(self.tree, store)
+
+        client = ClientNPY(store)
+        assert client.model == MODEL
+
+        greens = client.get_greens_tensors(self.stations, self.origins)
+        self._check_equal(greens, expected)
+
+        # time series not in the store
+        with self.assertRaises(Exception):
+            client.get_greens_tensors(self.stations, get_origins([3.e4]))
+
+
+    def test_cache(self):
+        expected = self._get_client().get_greens_tensors(
+            self.stations, self.origins)
+
+        client = self._get_client(cache_size=10)
+        greens = client.get_greens_tensors(self.stations, self.origins)
+        assert client.nreads == 4*10
+        assert (client.cache.hits, client.cache.misses) == (0, 4)
+
+        # processing returned Green's functions does not affect the cache
+        for tensor in greens:
+            for trace in tensor:
+                trace.data[:] = 0.
+
+        greens = client.get_greens_tensors(self.stations, self.origins)
+        assert client.nreads == 4*10
+        assert (client.cache.hits, client.cache.misses) == (4, 4)
+        self._check_equal(greens, expected)
+
+
+    def test_cache_eviction(self):
+        cache = GreensTensorCache(maxsize=2)
+        for key in ['a', 'b']:
+            cache.put(key, key)
+
+        # 'a' becomes the most recently used entry
+        assert cache.get('a') == 'a'
+        cache.put('c', 'c')
+
+        assert len(cache) == 2
+        assert cache.get('b') is None
+        assert cache.get('a') == 'a'
+        assert cache.get('c') == 'c'
+
+
+    @unittest.skipIf(seisgen is None, "seisgen not installed")
+    def test_sgt_pool(self):
+        # the SGT client keeps track of the most recent origin between reads,
+        # so concurrent reads are refused
+        from mtuq.io.clients.SPECFEM3D_SGT import Client as ClientSGT
+        client = ClientSGT(self.path)
+
+        for executor in ['thread', 'process']:
+            with self.assertRaises(NotImplementedError):
+                client.get_greens_tensors(self.stations, self.origins,
+                    max_workers=2, executor=executor)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
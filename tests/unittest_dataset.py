@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+
+import unittest
+import numpy as np
+
+from mtuq.grid import FullMomentTensorGridRandom
+from mtuq.misfit import Misfit
+
+from _synthetic import get_problem
+
+
+class TestDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.data, self.greens, _ = get_problem()
+
+
+    def test_as_array(self):
+        # a missing component is filled with zeros
+        self.data[1].remove(self.data[1].select(component='T')[0])
+
+        array = self.data.as_array(['Z', 'R', 'T'])
+        assert array.shape == (5, 3, 200)
+
+        for stream, _array in zip(self.data, array):
+            for component, data in zip(['Z', 'R', 'T'], _array):
+                selected = stream.select(component=component)
+                if selected:
+                    assert np.array_equal(data, selected[0].data)
+                else:
+                    assert np.all(data == 0.)
+
+
+    def test_as_array_copy(self):
+        for stream in self.data:
+            for trace in stream:
+                trace.data = trace.data.astype('float32')
+
+        traces = [trace for stream in self.data for trace in stream]
+        arrays = [trace.data for trace in traces]
+
+        # neither collecting arrays nor evaluating misfit changes the traces
+        array = self.data.as_array()
+        Misfit(norm='L2')(self.data, self.greens,
+            FullMomentTensorGridRandom(npts=10, magnitudes=[4.]))
+
+        for trace, _array in zip(traces, arrays):
+            assert trace.data is _array
+            assert trace.data.dtype == np.float32
+            assert not np.shares_memory(trace.data, array)
+
+        # later changes to traces are reflected in new arrays only
+        traces[0].data[:] = 0.
+        assert np.any(array[0, 0] != 0.)
+        assert np.all(self.data.as_array()[0, 0] == 0.)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+
+import unittest
+import numpy as np
+
+from copy import deepcopy
+from mtuq import MomentTensor
+from mtuq.wavelet import EarthquakeTrapezoid, Gaussian
+
+from _synthetic import get_problem
+
+
+EPSVAL = 1.e-12
+
+COMPONENTS = ['Z', 'R', 'T']
+
+
+def _relative_error(a, b):
+    return np.max(np.abs(a-b))/np.max(np.abs(b))
+
+
+class TestGreensTensor(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        _, self.greens, _ = get_problem()
+        self.sources = [MomentTensor(mt) for mt in rng.normal(size=(4, 6))]
+
+
+    def _get_expected(self, tensor):
+        return np.array([[trace.data for trace in
+            tensor.get_synthetics(source, components=COMPONENTS)]
+            for source in self.sources])
+
+
+    def test_get_synthetics_array(self):
+        tensor = self.greens[0]
+        expected = self._get_expected(tensor)
+
+        array = np.array([source.as_vector() for source in self.sources])
+
+        for sources in [self.sources, array, array.astype('float32')]:
+            synthetics = tensor.get_synthetics_array(sources, COMPONENTS)
+            assert synthetics.shape == expected.shape
+            assert _relative_error(synthetics, expected) < 1.e-6
+
+        # a single source vector
+        synthetics = tensor.get_synthetics_array(array[0])
+        assert _relative_error(synthetics[0], expected[0]) < EPSVAL
+
+        # preallocated output array
+        out = np.empty(expected.shape)
+        assert tensor.get_synthetics_array(array, out=out) is out
+        assert _relative_error(out, expected) < EPSVAL
+
+
+    def test_get_synthetics_array_list(self):
+        expected = np.stack([self._get_expected(tensor)
+            for tensor in self.greens], axis=1)
+
+        synthetics = self.greens.get_synthetics_array(
+            self.sources, COMPONENTS)
+        assert synthetics.shape == expected.shape
+        assert _relative_error(synthetics, expected) < EPSVAL
+
+
+    def test_as_array(self):
+        stack = self.greens.as_array(COMPONENTS)
+        assert stack.shape == (5, 3, 6, 200)
+
+        # repeated calls return the cached array
+        assert self.greens.as_array() is stack
+
+        # GreensTensors refer to rows of the array, and lists selected from
+        # this one reuse them without copying
+        for tensor, array in zip(self.greens, stack):
+            assert np.shares_memory(tensor._array, array)
+
+        subset = self.greens.__class__(self.greens[1:4])
+        assert np.shares_memory(subset.as_array(), stack)
+        assert np.array_equal(subset.as_array(), stack[1:4])
+
+        # changing components replaces the cached array
+        stack = self.greens.as_array(['Z', 'R'])
+        assert stack.shape == (5, 2, 6, 200)
+        for tensor, array in zip(self.greens, stack):
+            assert np.shares_memory(tensor._array, array)
+
+        expected = self._get_expected(self.greens[2])
+        synthetics = self.greens[2].get_synthetics_array(self.sources,
+            COMPONENTS)
+        assert _relative_error(synthetics, expected) < EPSVAL
+
+
+    def test_convolve(self):
+        for wavelet in [Gaussian(sigma=1.),
+            EarthquakeTrapezoid(rise_time=1., rupture_time=4.)]:
+
+            # convolving a whole list at once must give the same result as
+            # convolving one trace at a time
+            greens = deepcopy(self.greens)
+            greens.convolve(wavelet)
+
+            for tensor, _tensor in zip(greens, self.greens):
+                for trace, _trace in zip(tensor, _tensor):
+                    expected = wavelet.convolve(_trace.copy()).data
+                    assert _relative_error(trace.data, expected) < EPSVAL
+
+
+    def test_convolve_custom(self):
+        # custom convolution methods are respected
+        class Wavelet(Gaussian):
+            def convolve(self, trace):
+                trace.data *= 2.
+                return trace
+
+        greens = deepcopy(self.greens)
+        greens.convolve(Wavelet(sigma=1.))
+
+        for tensor, _tensor in zip(greens, self.greens):
+            for trace, _trace in zip(tensor, _tensor):
+                assert np.array_equal(trace.data, 2.*_trace.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+import unittest
+import numpy as np
+
+from mtuq.grid import Grid, UnstructuredGrid
+
+
+class TestGrid(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.grid = Grid(
+            dims=('x', 'y', 'z'),
+            coords=(np.arange(3.), 10.+np.arange(4.), 100.+np.arange(5.)))
+
+        self.unstructured_grid = UnstructuredGrid(
+            dims=('x', 'y'),
+            coords=(np.random.rand(50), np.random.rand(50)))
+
+
+    def test_get_many(self):
+        # the last axis varies fastest
+        expected = np.array([[x, y, z]
+            for x in self.grid.coords[0]
+            for y in self.grid.coords[1]
+            for z in self.grid.coords[2]])
+
+        indices = np.arange(len(self.grid))
+        assert np.array_equal(self.grid.get_many(indices), expected)
+
+        indices = np.random.permutation(indices)
+        assert np.array_equal(self.grid.get_many(indices), expected[indices])
+
+        for index in indices[:10]:
+            assert np.array_equal(
+                self.grid.get(index, callback=None), expected[index])
+
+
+    def test_get_many_unstructured(self):
+        subset = self.unstructured_grid.partition(2)[1]
+        indices = subset.start + np.arange(5)
+        expected = np.column_stack(self.unstructured_grid.coords)[indices]
+
+        assert np.array_equal(subset.get_many(indices), expected)
+        assert np.array_equal(
+            subset.get(indices[0], callback=None), expected[0])
+
+
+    def test_chunks(self):
+        for grid in [self.grid, self.unstructured_grid]:
+            for chunk_size in [1, 7, len(grid), 2*len(grid)]:
+                chunks = list(grid.chunks(chunk_size))
+                assert all(len(chunk) <= chunk_size for chunk in chunks)
+                assert np.array_equal(np.vstack(chunks), grid.to_array())
+
+
+    def test_chunks_partition(self):
+        # partitioned subsets iterate over their own points only
+        for grid in [self.grid, self.unstructured_grid]:
+            subsets = grid.partition(3)
+            assert np.array_equal(
+                np.vstack([chunk for subset in subsets
+                    for chunk in subset.chunks(4)]),
+                grid.to_array())
+
+
+if __name__ == '__main__':
+    unittest.main()
+
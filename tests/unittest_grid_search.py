@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from mtuq.grid import DoubleCoupleGridRegular, FullMomentTensorGridRandom,\
+    UnstructuredGrid
+from mtuq.grid_search import grid_search, grid_search_adaptive,\
+    local_search, open_ds, StreamingWriter, _to_dataframe, _to_values
+from mtuq.misfit import CorrelationCache, Misfit
+
+from _synthetic import get_origins, get_problem
+
+
+class TestGridSearch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        np.random.seed(0)
+        cls.origins = get_origins([1.e4, 2.e4, 3.e4])
+        cls.data, cls.greens, _ = get_problem(origins=cls.origins)
+
+        # correlations are cached, since recomputing them can change results
+        # by roundoff, depending on memory alignment
+        cls.misfit = Misfit(norm='L2', cache=CorrelationCache())
+
+        cls.grids = [
+            DoubleCoupleGridRegular(npts_per_axis=4, magnitudes=[4.]),
+            FullMomentTensorGridRandom(npts=100, magnitudes=[4.])]
+
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.filename = os.path.join(self.path, 'results.h5')
+
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+
+    def _grid_search(self, sources, misfit=None, **kwargs):
+        return grid_search(self.data, self.greens, misfit or self.misfit,
+            self.origins, sources, verbose=0, timed=False, msg_interval=0,
+            **kwargs)
+
+
+    def test_to_dataframe(self):
+        np.random.seed(0)
+        origins = get_origins([1.e4, 2.e4, 3.e4])
+        sources = UnstructuredGrid(
+            dims=('x', 'y'),
+            coords=(np.random.rand(20), np.random.choice([1., 2.], 20)))
+
+        # values have shape (number of sources, number of origins)
+        values = np.random.rand(len(sources), len(origins))
+
+        df = _to_dataframe(origins, sources, values)
+        assert df.index.names == ['origin_idx', 'source_idx', 'x', 'y']
+        assert len(df) == len(origins)*len(sources)
+
+        for (origin_idx, source_idx, x, y), value in df[0].items():
+            assert value == values[source_idx, origin_idx]
+            assert x == sources.coords[0][source_idx]
+            assert y == sources.coords[1][source_idx]
+
+        assert df.source_idxmin() ==\
+            np.unravel_index(values.argmin(), values.shape)[0]
+
+
+    def test_streaming(self):
+        for sources in self.grids:
+            results = self._grid_search(sources)
+            streamed = self._grid_search(sources, filename=self.filename)
+
+            assert np.array_equal(streamed.values, results.values)
+            assert type(open_ds(self.filename)) is type(results)
+            assert np.array_equal(open_ds(self.filename).values,
+                results.values)
+
+
+    def test_streaming_partial(self):
+        # blocks not yet written are read back as NaN
+        sources = self.grids[1]
+        with StreamingWriter(self.filename, self.origins, sources) as writer:
+            writer.write(np.ones(10), 1, start=20)
+
+        values = open_ds(self.filename).values.reshape(
+            len(self.origins), len(sources))
+        assert np.all(values[1, 20:30] == 1.)
+        assert np.sum(np.isfinite(values)) == 10
+
+
+    def test_resume(self):
+        for sources in self.grids:
+            results = self._grid_search(sources)
+
+            class InterruptedMisfit(Misfit):
+                # interrupts the grid search at the second origin
+                ncalls = 0
+                def __call__(self, *args, **kwargs):
+                    InterruptedMisfit.ncalls += 1
+                    if InterruptedMisfit.ncalls == 2:
+                        raise KeyboardInterrupt
+                    return super().__call__(*args, **kwargs)
+
+            misfit = InterruptedMisfit(norm='L2', cache=self.misfit.cache)
+            with self.assertRaises(KeyboardInterrupt):
+                self._grid_search(sources, misfit=misfit,
+                    filename=self.filename)
+
+            with open(self.filename+'.checkpoint') as file:
+                assert file.read() == '0 0 %d\n' % len(sources)
+
+            # only the two remaining origins are evaluated
+            resumed = self._grid_search(sources, misfit=misfit,
+                filename=self.filename, resume=True)
+
+            assert InterruptedMisfit.ncalls == 4
+            assert np.array_equal(resumed.values, results.values)
+
+
+    def test_resume_mismatch(self):
+        self._grid_search(self.grids[0], filename=self.filename)
+        with self.assertRaises(Exception):
+            self._grid_search(self.grids[1], filename=self.filename,
+                resume=True)
+
+
+class TestRefinement(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.grid = DoubleCoupleGridRegular(npts_per_axis=5, magnitudes=[-6.])
+
+        # off-grid double couple, with the same magnitude as the grid
+        cls.truth = np.array(
+            [cls.grid.coords[0][0], 0., 0., 123.4, 17.3, 0.61])
+        source = UnstructuredGrid(dims=cls.grid.dims,
+            coords=cls.truth[:, np.newaxis], callback=cls.grid.callback).get(0)
+
+        cls.data, cls.greens, cls.origins = get_problem(source=source)
+        cls.misfit = Misfit(norm='L2', cache=CorrelationCache())
+
+        cls.results = grid_search(cls.data, cls.greens, cls.misfit,
+            cls.origins, cls.grid, verbose=0, timed=False, msg_interval=0)
+
+
+    def test_adaptive(self):
+        results = grid_search_adaptive(self.data, self.greens, self.misfit,
+            self.origins, self.grid, npasses=3, verbose=0, msg_interval=0)
+
+        # the first pass is an ordinary grid search
+        assert np.array_equal(results.values[:len(self.grid)],
+            self.results.values.reshape(-1, 1))
+
+        df = results.reset_index()
+        best = df.loc[df[0].idxmin()]
+        assert best[0] < 0.01*self.results.values.min()
+
+        # after three passes, the best point lies within a fraction of the
+        # coarse grid spacing of the true source
+        assert np.all(np.abs(best[list(self.grid.dims)].values - self.truth)
+            <= [0., 0., 0., 72./9., 36./9., 0.2/9.])
+
+
+    def test_local_search(self):
+        nstart = 3
+        refined = local_search(self.data, self.greens, self.misfit,
+            self.origins, self.grid, self.results, nstart=nstart, verbose=0)
+
+        assert len(refined) == nstart
+
+        # each starting point is improved upon
+        start = np.sort(self.results.values, axis=None)[:nstart]
+        assert np.all(refined.values[:, 0] < start)
+
+        # and converges to the true source, with fixed axes left unchanged
+        df = refined.reset_index()
+        for _, row in df.iterrows():
+            assert row[0] < 1.e-4*start[0]
+            assert np.all(np.abs(row[list(self.grid.dims)].values -
+                self.truth) <= [0., 0., 0., 0.1, 0.1, 0.001])
+
+        # reported misfit values agree with grid search
+        sources = UnstructuredGrid(dims=self.grid.dims,
+            coords=df[list(self.grid.dims)].values.T,
+            callback=self.grid.callback)
+        values = _to_values(grid_search(self.data, self.greens, self.misfit,
+            self.origins, sources, verbose=0, timed=False, msg_interval=0),
+            nstart, 1)
+        assert np.allclose(values[:, 0], refined.values[:, 0], rtol=1.e-10)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
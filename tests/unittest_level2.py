@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+import unittest
+import numpy as np
+
+from mtuq.grid import DoubleCoupleGridRegular, FullMomentTensorGridRandom,\
+    ForceGridRandom, UnstructuredGrid
+from mtuq.misfit import CorrelationCache, Misfit
+
+from _synthetic import get_problem
+
+
+EPSVAL = 1.e-10
+
+
+def _relative_error(a, b):
+    return np.max(np.abs(a-b))/np.max(np.abs(b))
+
+
+class TestLevel2(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        np.random.seed(0)
+        cls.data, cls.greens, _ = get_problem()
+        cls.mt_sources = FullMomentTensorGridRandom(npts=100, magnitudes=[4.])
+        cls.force_sources = ForceGridRandom(magnitudes_in_N=[1.e12], npts=100)
+
+
+    def test_level0_moment_tensor(self):
+        # without time shifts, the correlation-based misfit must agree with
+        # the misfit computed from synthetics
+        for norm in ['L1', 'L2', 'hybrid']:
+            misfit = Misfit(norm=norm)
+            results0 = misfit(self.data, self.greens, self.mt_sources,
+                optimization_level=0)
+            results2 = misfit(self.data, self.greens, self.mt_sources,
+                optimization_level=2)
+            assert _relative_error(results2, results0) < EPSVAL
+
+
+    def test_level0_force(self):
+        for norm in ['L1', 'L2', 'hybrid']:
+            misfit = Misfit(norm=norm)
+            results0 = misfit(self.data, self.greens, self.force_sources,
+                optimization_level=0)
+            results2 = misfit(self.data, self.greens, self.force_sources,
+                optimization_level=2)
+            assert _relative_error(results2, results0) < EPSVAL
+
+
+    def test_level0_time_shifts(self):
+        # for the L1 norm, time-shifted synthetics are built inside the C
+        # extension, and must still agree with level0
+        for time_shift_min in [-1., 0.]:
+            for sources in [self.mt_sources, self.force_sources]:
+                data, greens, _ = get_problem()
+                misfit = Misfit(norm='L1', time_shift_min=time_shift_min,
+                    time_shift_max=+1.)
+                results0 = misfit(data, greens, sources,
+                    optimization_level=0)
+                results2 = misfit(data, greens, sources,
+                    optimization_level=2)
+                assert _relative_error(results2, results0) < EPSVAL
+
+
+    def test_chunk_size(self):
+        # splitting the grid into blocks must not change results (correlations
+        # are cached, since recomputing them can change results by roundoff,
+        # depending on memory alignment)
+        data, greens, _ = get_problem()
+        misfit = Misfit(norm='L2', time_shift_max=1., cache=CorrelationCache())
+        results = misfit(data, greens, self.mt_sources, optimization_level=2)
+
+        for chunk_size in [1, 7, 99, 1000]:
+            misfit.chunk_size = chunk_size
+            assert np.array_equal(results, misfit(data, greens,
+                self.mt_sources, optimization_level=2))
+
+
+    def test_optimize_magnitude(self):
+        # data are synthetics of a grid mechanism at a different magnitude
+        Mw = -5.8
+        sources = DoubleCoupleGridRegular(npts_per_axis=5, magnitudes=[-6.])
+        coords = sources.get_many([42])
+        coords[0, sources.dims.index('rho')] = np.sqrt(2.)*10.**(1.5*Mw+9.1)
+        source = UnstructuredGrid(dims=sources.dims, coords=coords.T,
+            callback=sources.callback).get(0)
+
+        data, greens, _ = get_problem(source=source)
+        misfit = Misfit(norm='L2', optimize_magnitude=True,
+            cache=CorrelationCache())
+
+        values, magnitudes = misfit.get_magnitudes(data, greens, sources)
+        assert np.array_equal(values, misfit(data, greens, sources))
+
+        assert values.argmin() == 42
+        assert values[42, 0] < EPSVAL*values.max()
+        assert abs(magnitudes[42] - Mw) < EPSVAL
+
+        # optimized misfit never exceeds fixed-magnitude misfit
+        fixed = Misfit(norm='L2')(data, greens, sources)
+        assert np.all(values <= fixed*(1.+EPSVAL))
+
+        with self.assertRaises(NotImplementedError):
+            misfit(data, greens, sources, set_attributes=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
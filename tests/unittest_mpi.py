@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+    '_mpi_grid_search.py')
+
+# seconds after which a hung MPI job is considered a failure
+TIMEOUT = 300
+
+
+def _has_mpi():
+    try:
+        import mpi4py.MPI
+    except ImportError:
+        return False
+    return shutil.which('mpirun') is not None
+
+
+@unittest.skipUnless(_has_mpi(), 'MPI not available')
+class TestMPI(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+
+    def _run(self, *cases, nproc=3):
+        env = dict(os.environ,
+            OMPI_ALLOW_RUN_AS_ROOT='1',
+            OMPI_ALLOW_RUN_AS_ROOT_CONFIRM='1',
+            OMPI_MCA_rmaps_base_oversubscribe='1')
+
+        try:
+            process = subprocess.run(
+                ['mpirun', '-n', str(nproc), sys.executable, SCRIPT,
+                 self.path] + list(cases),
+                env=env, capture_output=True, text=True, timeout=TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.fail('MPI grid search did not finish: %s' % ' '.join(cases))
+
+        assert process.returncode == 0, process.stdout + process.stderr
+        assert process.stdout.strip().endswith('OK')
+
+
+    def test_static(self):
+        self._run('static', 'static_scatter')
+
+
+    def test_dynamic(self):
+        self._run('dynamic')
+
+
+    def test_dynamic_resume(self):
+        self._run('dynamic_resume')
+
+
+    def test_share(self):
+        self._run('share')
+
+
+if __name__ == '__main__':
+    unittest.main()
+
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+import glob
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import numpy as np
+
+from mtuq.grid import FullMomentTensorGridRandom
+from mtuq.misfit import Misfit
+from mtuq.misfit.waveform import level2
+from mtuq.util.signal import check_padding
+
+from _synthetic import get_problem
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _build_without_openmp(path):
+    """ Compiles C extensions into a scratch directory with OpenMP disabled
+    """
+    env = dict(os.environ, MTUQ_NO_OPENMP='1')
+    subprocess.run([sys.executable, 'setup.py', '-q', 'build_ext',
+        '--build-lib', os.path.join(path, 'lib'),
+        '--build-temp', os.path.join(path, 'temp')],
+        cwd=ROOT, env=env, check=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    filename, = glob.glob(os.path.join(
+        path, 'lib', 'mtuq', 'misfit', 'waveform', 'c_ext_L2*'))
+
+    spec = importlib.util.spec_from_file_location('c_ext_L2', filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestOpenMP(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        np.random.seed(0)
+        cls.data, cls.greens, _ = get_problem()
+        cls.sources = FullMomentTensorGridRandom(npts=1000, magnitudes=[4.])
+
+
+    def _evaluate(self, **kwargs):
+        misfit = Misfit(norm='L2', time_shift_max=1., **kwargs)
+        return misfit(self.data, self.greens, self.sources,
+            optimization_level=2)
+
+
+    def _call_c_ext(self, norm, num_threads_list):
+        # correlations are prepared once, so that only the C extension call
+        # differs (recomputing correlations can change results by roundoff,
+        # depending on memory alignment)
+        misfit = Misfit(norm=norm, time_shift_max=1.)
+        check_padding(self.greens, misfit.time_shift_min,
+            misfit.time_shift_max)
+        arrays = level2._prepare(self.data, self.greens, misfit.norm,
+            misfit.time_shift_groups, misfit.time_shift_min,
+            misfit.time_shift_max)
+        sources = level2._to_array(self.sources.dims, self.sources.to_array())
+
+        return [level2._call_c_ext(arrays, sources, 0, 0, 0, 0, num_threads)
+            for num_threads in num_threads_list]
+
+
+    def test_num_threads(self):
+        results = self._call_c_ext('L2', [1, 2, 4])
+        for other in results[1:]:
+            assert np.array_equal(results[0], other)
+
+        # the same holds for complete misfit evaluations, up to roundoff
+        assert np.allclose(self._evaluate(num_threads=1),
+            self._evaluate(num_threads=4), rtol=1.e-12, atol=0.)
+
+
+    def test_hybrid_num_threads(self):
+        results = self._call_c_ext('hybrid', [1, 3])
+        assert np.array_equal(results[0], results[1])
+
+
+    def test_no_openmp(self):
+        if shutil.which(os.environ.get('CC', 'cc')) is None:
+            self.skipTest('No C compiler')
+
+        path = tempfile.mkdtemp()
+        try:
+            try:
+                c_ext_L2 = _build_without_openmp(path)
+            except (subprocess.CalledProcessError, ValueError):
+                self.skipTest('Could not compile C extensions')
+
+            results = self._evaluate(num_threads=2)
+
+            # the serial-only extension ignores num_threads
+            default = level2.c_ext_L2
+            level2.c_ext_L2 = c_ext_L2
+            try:
+                serial = self._evaluate(num_threads=2)
+            finally:
+                level2.c_ext_L2 = default
+
+            assert np.allclose(results, serial, rtol=1.e-12, atol=0.)
+
+        finally:
+            shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
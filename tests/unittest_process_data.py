@@ -0,0 +1,61 @@
+
+import numpy as np
+import unittest
+
+from copy import deepcopy
+from mtuq import ProcessData
+
+from _synthetic import get_problem
+
+
+def _get_streams(dtype='float64'):
+    data, _, _ = get_problem(nstations=3)
+
+    for stream in data:
+        stream.id = stream.station.id
+        stream.tags = ['units:m']
+        stream.station.sac = {}
+        for trace in stream:
+            trace.data = trace.data.astype(dtype)
+
+    # traces with different time sampling fall into separate groups
+    data[-1][-1].data = data[-1][-1].data[:150]
+
+    return data
+
+
+class TestProcessData(unittest.TestCase):
+
+    def test_filter_batch(self):
+        """ Batch filtering gives the same results as trace-by-trace
+        filtering
+        """
+        filters = [
+            dict(filter_type='bandpass', freq_min=0.2, freq_max=1.),
+            dict(filter_type='lowpass', freq=1.),
+            dict(filter_type='highpass', freq=0.2),
+            ]
+
+        for dtype in ['float64', 'float32']:
+            data = _get_streams(dtype)
+
+            for parameters in filters:
+                serial = ProcessData(batch=False, apply_weights=False,
+                    apply_scaling=False, **parameters)
+                batch = ProcessData(batch=True, apply_weights=False,
+                    apply_scaling=False, **parameters)
+
+                for stream in data:
+                    expected = serial(deepcopy(stream))
+                    actual = batch(deepcopy(stream))
+
+                    for trace1, trace2 in zip(expected, actual):
+                        assert trace1.data.dtype == trace2.data.dtype
+                        assert np.array_equal(trace1.data, trace2.data)
+
+                # input data are left untouched
+                assert data[0][0].data.dtype == np.dtype(dtype)
+
+
+if __name__ == '__main__':
+    unittest.main()
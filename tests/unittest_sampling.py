@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from mtuq import open_ds
+from mtuq.graphics.uq import force, vw
+from mtuq.grid import ForceGridRandom, FullMomentTensorGridRandom
+from mtuq.misfit import CorrelationCache, Misfit
+from mtuq.sampling import parallel_tempering, _get_bounds
+
+from _synthetic import get_problem
+
+
+class TestParallelTempering(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data, cls.greens, cls.origins = get_problem()
+
+        # correlations are cached, since recomputing them can change misfit
+        # by roundoff, depending on memory alignment
+        cls.misfit = Misfit(norm='L2', cache=CorrelationCache())
+
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+
+    def _sample(self, sources, seed=0):
+        return parallel_tempering(self.data, self.greens, self.misfit,
+            self.origins[0], sources, var=1., nsamples=200, nwalkers=4,
+            ntemps=2, burn=50, seed=seed, verbose=0)
+
+
+    def _check(self, sources, df):
+        assert df.attrs['sampled']
+        assert len(df) == 200
+
+        # samples stay within prior bounds
+        lower, upper, _ = _get_bounds(sources)
+        points = df.reset_index()[list(sources.dims)].values
+        assert np.all(points >= lower) and np.all(points <= upper)
+
+        # misfit values correspond to samples
+        function = self.misfit.get_function(
+            self.data, self.greens.select(self.origins[0]), sources.dims)
+        assert np.allclose(df.values, function(points), rtol=1.e-12)
+
+        # runs are reproducible given a seed
+        assert np.array_equal(df.values, self._sample(sources).values)
+        assert not np.array_equal(df.values,
+            self._sample(sources, seed=1).values)
+
+
+    def test_moment_tensor(self):
+        np.random.seed(0)
+        sources = FullMomentTensorGridRandom(npts=100, magnitudes=[-6.])
+        df = self._sample(sources)
+        self._check(sources, df)
+
+        # marginals are given by the density of samples
+        da = vw._marginals_vw_random(df, var=1.)
+        assert np.isclose(da.values.sum(), 1./vw.vw_area)
+        assert np.isclose(da.values.sum(), vw._count_vw_semiregular(
+            df.reset_index()).values.sum())
+
+        # samples are still recognized after writing to disk
+        filename = os.path.join(self.path, 'samples.h5')
+        df.save(filename)
+        assert open_ds(filename).attrs['sampled']
+        assert np.array_equal(vw._marginals_vw_random(
+            open_ds(filename), var=1.).values, da.values)
+
+
+    def test_force(self):
+        np.random.seed(0)
+        sources = ForceGridRandom(magnitudes_in_N=[1.], npts=100)
+        df = self._sample(sources)
+        self._check(sources, df)
+
+        da = force._marginals_random(df, var=1.)
+        assert np.isclose(da.values.sum(), 1./(4.*np.pi))
+
+        filename = os.path.join(self.path, 'samples.h5')
+        df.save(filename)
+        assert np.array_equal(force._marginals_random(
+            open_ds(filename), var=1.).values, da.values)
+
+
+if __name__ == '__main__':
+    unittest.main()
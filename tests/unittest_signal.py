@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+import unittest
+import numpy as np
+
+from mtuq.util.signal import resample
+
+
+EPSVAL = 1.e-12
+
+
+class TestResample(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.data = rng.normal(size=(10, 501))
+
+
+    def _check_rows(self, *args):
+        # resampling a stack of traces must give the same result as
+        # resampling one trace at a time
+        stacked = resample(self.data, *args)
+        assert stacked.shape[0] == len(self.data)
+
+        for row, _row in zip(self.data, stacked):
+            assert np.max(np.abs(resample(row, *args) - _row)) < EPSVAL
+
+
+    def test_downsample(self):
+        self._check_rows(0., 50., 0.1, 5., 40., 0.25)
+
+
+    def test_upsample(self):
+        self._check_rows(0., 50., 0.1, 5., 40., 0.05)
+
+
+    def test_pad(self):
+        self._check_rows(0., 50., 0.1, -10., 60., 0.2)
+        self._check_rows(0., 50., 0.1, -10., 40., 0.1)
+
+
+    def test_sine(self):
+        # signals well below the new Nyquist frequency are preserved
+        t = np.arange(501)*0.1
+        data = np.array([np.sin(0.2*np.pi*t), np.cos(0.1*np.pi*t)])
+
+        resampled = resample(data, 0., 50., 0.1, 10., 40., 0.2)
+
+        t = 10. + np.arange(resampled.shape[1])*0.2
+        expected = np.array([np.sin(0.2*np.pi*t), np.cos(0.1*np.pi*t)])
+        assert np.max(np.abs(resampled - expected)[:, 10:-10]) < 0.05
+
+
+if __name__ == '__main__':
+    unittest.main()
+
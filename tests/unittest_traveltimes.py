@@ -0,0 +1,111 @@
+
+import numpy as np
+import os
+import shutil
+import tempfile
+import unittest
+
+import obspy.taup
+
+from obspy.taup import TauPyModel
+from mtuq.util.traveltimes import TravelTimeTable
+
+
+class TestTravelTimeTable(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.path = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.path)
+
+
+    def test_arrival_times(self):
+        """ Interpolated times agree with TauP
+        """
+        taup = TauPyModel('ak135')
+        table = TravelTimeTable('ak135', depth_spacing=5., path=self.path)
+
+        depths = [2., 12.5, 33.]
+        distances = [0.3, 1.7, 7.35, 24.1, 61.]
+
+        P, S = table.get_arrival_times(*np.meshgrid(depths, distances,
+            indexing='ij'))
+
+        for _i, depth in enumerate(depths):
+            for _j, distance in enumerate(distances):
+                # same convention as ProcessData with pick_type='taup'
+                assert abs(P[_i, _j] -
+                    _get_pick(taup, depth, distance, 'p', 'P')) < 0.1
+                assert abs(S[_i, _j] -
+                    _get_pick(taup, depth, distance, 's', 'S')) < 0.1
+
+        # rows are reused from disk
+        cached = TravelTimeTable('ak135', depth_spacing=5., path=self.path)
+        assert sorted(cached._rows) == sorted(table._rows)
+        assert np.array_equal(cached.get_arrival_times(12.5, 24.1)[0],
+            P[1, 3])
+
+
+    def test_filename(self):
+        """ Different models and grids never share a table
+        """
+        dirnames = [os.path.join(self.path, name) for name in ['a', 'b']]
+
+        filenames = []
+        for dirname in dirnames:
+            os.makedirs(dirname)
+            filename = os.path.join(dirname, 'model.npz')
+            shutil.copy(_get_builtin('ak135'), filename)
+            filenames += [filename]
+
+        names = [
+            TravelTimeTable(filenames[0], path=self.path).filename,
+            TravelTimeTable(filenames[1], path=self.path).filename,
+            TravelTimeTable(filenames[0], depth_spacing=2.,
+                path=self.path).filename,
+            TravelTimeTable('ak135', path=self.path).filename,
+            ]
+        assert len(set(names)) == len(names)
+
+        # modifying the file changes the table
+        with open(filenames[0], 'ab') as file:
+            file.write(b'\0')
+        assert TravelTimeTable(filenames[0], path=self.path).filename\
+            != names[0]
+
+
+    def test_default_path(self):
+        """ Tables are not written inside the package
+        """
+        environ = dict(os.environ)
+        try:
+            os.environ.pop('TAUP_CACHE', None)
+            os.environ['XDG_CACHE_HOME'] = self.path
+            table = TravelTimeTable('ak135')
+            assert table.filename.startswith(
+                os.path.join(self.path, 'mtuq', 'taup'))
+
+            os.environ['TAUP_CACHE'] = os.path.join(self.path, 'taup')
+            table = TravelTimeTable('ak135')
+            assert table.filename.startswith(os.environ['TAUP_CACHE'])
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+
+
+def _get_pick(taup, depth, distance, *phases):
+    for phase in phases:
+        arrivals = taup.get_travel_times(depth, distance, phase_list=[phase])
+        if arrivals:
+            return arrivals[0].time
+
+
+def _get_builtin(model):
+    return os.path.join(os.path.dirname(obspy.taup.__file__), 'data', model+'.npz')
+
+
+if __name__ == '__main__':
+    unittest.main()